@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.metrics.MetricsMiddleware',
+    'tasks.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,14 +79,99 @@ WSGI_APPLICATION = 'Manager_task_12.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Профиль SQLite: 'default' (как было) или 'production' — WAL, synchronous=NORMAL,
+# busy_timeout, mmap, кэш страниц (см. tasks.db) и постоянные соединения.
+# Отдельные прагмы переопределяются переменными TASKS_SQLITE_<ПРАГМА>.
+TASKS_DB_PROFILE = os.environ.get('TASKS_DB_PROFILE', 'default')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('TASKS_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # Соединение переиспользуется между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': int(os.environ.get('TASKS_DB_CONN_MAX_AGE',
+                                           600 if TASKS_DB_PROFILE == 'production' else 0)),
+        'CONN_HEALTH_CHECKS': TASKS_DB_PROFILE == 'production',
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Для нескольких воркеров укажите общий бэкенд (Redis/Memcached): через него
+# же расходятся версии кэша статусов и ответов API (tasks.status_cache, tasks.http_cache).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tasks',
+        # Календарь дедлайнов держит по две записи на день (версия и счётчики);
+        # при стандартных 300 год по дням вытеснял бы сам себя
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    # Версии процессных индексов (tasks.suggest): файловый кэш общий для всех
+    # процессов машины, а LocMem выше — у каждого свой
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('TASKS_VERSION_CACHE_DIR',
+                                   os.path.join(tempfile.gettempdir(), 'manager_task_versions')),
+    },
+}
+# Алиас кэша версий; с общим default (Redis/Memcached) можно указать 'default'
+TASKS_VERSION_CACHE = 'versions'
+
+# Справочник статусов (tasks.status_cache): с процессным бэкендом кэша изменения
+# статусов из других процессов видны не позже чем через столько секунд
+TASKS_STATUS_CACHE_TTL = 30
+
+# Индекс автодополнения (tasks.suggest): сборка в фоне при старте веб-сервера
+# и не чаще чем раз в столько секунд — перестройка после записей других процессов
+TASKS_SUGGEST_PRELOAD = True
+TASKS_SUGGEST_REBUILD_INTERVAL = 30
+
+# Кэш ответов api_task_list / api_task_detail / api_task_subtasks
+TASKS_RESPONSE_CACHE = 'default'
+TASKS_RESPONSE_CACHE_TIMEOUT = 300
+# Счётчики дней календаря дедлайнов (tasks.deadline_calendar): сбрасываются записью
+# в день, так что срок хранения ограничивает только объём кэша
+TASKS_CALENDAR_CACHE_TIMEOUT = 86400
+
+# POST /api/tasks/bulk/: размер пачки bulk_create и лимит задач в одном запросе
+TASKS_BULK_BATCH_SIZE = 500
+TASKS_BULK_MAX_ITEMS = 10000
+
+# Групповой коммит api_create_task / api_create_subtask (tasks.write_queue):
+# записи конкурентных запросов за окно в несколько мс идут одной транзакцией
+TASKS_WRITE_QUEUE = os.environ.get('TASKS_WRITE_QUEUE', '') == '1'
+TASKS_WRITE_QUEUE_WINDOW_MS = 5
+TASKS_WRITE_QUEUE_MAX_BATCH = 200
+
+# Энкодер JSON-ответов API (tasks.rendering): auto — orjson, если установлен; orjson; stdlib
+TASKS_JSON_RENDERER = os.environ.get('TASKS_JSON_RENDERER', 'auto')
+
+# Бюджет SQL-запросов вью (tasks.query_budget): превышение — исключение в
+# тестах или с TASKS_QUERY_BUDGET_RAISE=1 в окружении, иначе (и при DEBUG,
+# чтобы runserver не отдавал 500) предупреждение в лог
+TASKS_QUERY_BUDGET_RAISE = 'test' in sys.argv or os.environ.get('TASKS_QUERY_BUDGET_RAISE', '') == '1'
+
+# GET /metrics (tasks.metrics): каталог общих файлов метрик для нескольких
+# процессов-воркеров; без него метрики только процессные
+TASKS_METRICS_DIR = os.environ.get('TASKS_METRICS_DIR')
+TASKS_METRICS_FLUSH_INTERVAL = 5
+
+# Планировщик просрочки (tasks.scheduler) — единственный, кто ставит is_overdue
+# наступившим дедлайнам (?overdue=true, is_overdue в списке, статистика):
+# thread — поток в процессе веб-сервера (runserver, wsgi/asgi); off — только
+# если запущен отдельный процесс manage.py run_scheduler, иначе флаг не
+# обновляется. При нескольких воркерах лучше off и один run_scheduler: потоки
+# событий не дублируют, но повторяют работу. Горизонт кучи дедлайнов и
+# период её перечитывания — в секундах
+TASKS_OVERDUE_SCHEDULER = os.environ.get('TASKS_OVERDUE_SCHEDULER', 'thread')
+TASKS_OVERDUE_HORIZON = 3600
+TASKS_OVERDUE_RELOAD_INTERVAL = 30
+TASKS_OVERDUE_BATCH_SIZE = 500
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
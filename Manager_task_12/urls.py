@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from tasks.views import api_task_list  # импортируем существующую функцию
+from tasks.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', api_task_list, name='home'),  # используем существующую функцию
     path('api/', include('tasks.urls')),   # API endpoints
+    path('metrics', metrics_view, name='metrics'),  # Prometheus
 ]
\ No newline at end of file
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
 
 application = get_wsgi_application()
+
+# После настройки Django: поток планировщика просрочки (TASKS_OVERDUE_SCHEDULER = 'thread')
+# и фоновая сборка индекса автодополнения (TASKS_SUGGEST_PRELOAD)
+from tasks import scheduler, suggest  # noqa: E402
+
+scheduler.autostart()
+suggest.autostart()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Сравнение синхронных и асинхронных эндпоинтов чтения под ASGI.
+
+Запросы подаются прямо в ASGI-приложение проекта (Manager_task_12.asgi)
+без сетевого сервера: ``--concurrency`` клиентов одновременно шлют запросы,
+пока не будет отправлено ``--requests`` на каждый эндпоинт. Для каждой
+пары sync/async печатаются запросы в секунду и задержки p50/p99.
+
+База — временный файл SQLite, заполняемый перед прогоном. По умолчанию
+каждый запрос уникален (параметр ``_``), чтобы кэш ответов не подменял
+работу с БД; ``--cached`` выключает это.
+
+    python benchmarks/async_views.py --concurrency 200 --requests 2000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+# (имя, URL sync-вью, URL async-вью, нужен ли id задачи)
+PAIRS = [
+    ('list', 'api_task_list', 'api_async_task_list', False),
+    ('detail', 'api_task_detail', 'api_async_task_detail', True),
+    ('subtasks', 'api_task_subtasks', 'api_async_task_subtasks', True),
+    ('stats', 'api_task_stats', 'api_async_task_stats', False),
+]
+
+
+def setup_database(path, tasks, subtasks):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = path
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    call_command('migrate', verbosity=0)
+
+    from tasks import bulk
+    from tasks.models import SubTask, Task
+    from tasks.status_cache import status_cache
+
+    todo, done = status_cache.get_or_create('To Do'), status_cache.get_or_create('Done')
+    now = timezone.now()
+    created = bulk.create(Task, [
+        Task(title=f'Задача {i}', description='' if i % 4 == 0 else f'Описание {i}',
+             status=done if i % 3 == 0 else todo, deadline=now + timedelta(hours=i - tasks // 2))
+        for i in range(tasks)
+    ])
+    bulk.create(SubTask, [
+        SubTask(title=f'Подзадача {i}.{j}', status=todo, deadline=task.deadline, task=task)
+        for i, task in enumerate(created) for j in range(subtasks)
+    ])
+    return created[len(created) // 2].id
+
+
+async def request(application, path, query):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 50000),
+        'server': ('localhost', 80),
+    }
+    status = None
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+async def run(application, path, total, concurrency, cached):
+    latencies = []
+    counter = iter(range(total))
+
+    async def client():
+        for n in counter:
+            query = '' if cached else f'_={n}'
+            started = time.perf_counter()
+            status = await request(application, path, query)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f'{path}: HTTP {status}')
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main(options):
+    from django.urls import reverse
+    from Manager_task_12.asgi import application
+
+    print(f"{'эндпоинт':<10} {'вид':<6} {'req/s':>9} {'p50, мс':>9} {'p99, мс':>9}")
+    for name, sync_url, async_url, with_task in PAIRS:
+        if options.only and name not in options.only:
+            continue
+        args = [options.task_id] if with_task else []
+        for kind, url in (('sync', sync_url), ('async', async_url)):
+            path = reverse(url, args=args)
+            # Прогрев: кэш статусов и прочие процессные кэши
+            await run(application, path, min(50, options.requests), 10, options.cached)
+            result = await run(application, path, options.requests, options.concurrency,
+                               options.cached)
+            print(f"{name:<10} {kind:<6} {result['rps']:>9.0f} "
+                  f"{result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=1000, help='Запросов на эндпоинт')
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--subtasks', type=int, default=3, help='Подзадач на задачу')
+    parser.add_argument('--cached', action='store_true',
+                        help='Повторять один и тот же URL (с кэшем ответов)')
+    parser.add_argument('--only', nargs='*', choices=[pair[0] for pair in PAIRS])
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        options.task_id = setup_database(os.path.join(tmp, 'bench.sqlite3'),
+                                         options.tasks, options.subtasks)
+        asyncio.run(main(options))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Размер ответа и задержка эндпоинтов чтения с ``?fields=`` / ``?expand=``
+и без них (tasks.fieldsets).
+
+Запросы идут через django.test.Client к временной базе SQLite; кэш ответов
+обходится уникальным параметром ``_``. Для каждого варианта печатается
+размер тела и медиана времени ответа.
+
+    python benchmarks/fieldsets.py --tasks 5000 --description-size 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+# (эндпоинт, нужен ли id задачи, параметры)
+CASES = [
+    ('api_task_list', False, {'limit': 200}),
+    ('api_task_list', False, {'limit': 200, 'fields': 'id,title,status,deadline'}),
+    ('api_task_detail', True, {}),
+    ('api_task_detail', True, {'fields': 'id,title,status,deadline'}),
+    ('api_task_detail', True, {'expand': 'subtasks'}),
+    ('api_task_subtasks', True, {}),
+    ('api_task_subtasks', True, {'fields': 'id,title,status'}),
+]
+
+
+def setup_database(path, tasks, subtasks, description_size):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = path
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    call_command('migrate', verbosity=0)
+
+    from tasks import bulk
+    from tasks.models import SubTask, Task
+    from tasks.status_cache import status_cache
+
+    todo = status_cache.get_or_create('To Do')
+    description = ('Описание задачи ' * (description_size // 16 + 1))[:description_size]
+    now = timezone.now()
+    created = bulk.create(Task, [
+        Task(title=f'Задача {i}', description=description, status=todo,
+             deadline=now + timedelta(hours=i))
+        for i in range(tasks)
+    ])
+    bulk.create(SubTask, [
+        SubTask(title=f'Подзадача {i}.{j}', description=description, status=todo,
+                deadline=task.deadline, task=task)
+        for i, task in enumerate(created) for j in range(subtasks)
+    ])
+    return created[0].id
+
+
+def main(options):
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    print(f"{'запрос':<62} {'байт':>9} {'мс (p50)':>9}")
+    for name, with_task, params in CASES:
+        url = reverse(name, args=[options.task_id] if with_task else [])
+        sizes, timings = [], []
+        for n in range(options.repeat):
+            started = time.perf_counter()
+            response = client.get(url, {**params, '_': n})
+            timings.append(time.perf_counter() - started)
+            sizes.append(len(response.content))
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        print(f"{url + ('?' + query if query else ''):<62} {sizes[-1]:>9} "
+              f"{statistics.median(timings) * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=2000)
+    parser.add_argument('--subtasks', type=int, default=20, help='Подзадач у задачи')
+    parser.add_argument('--description-size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        options.task_id = setup_database(os.path.join(tmp, 'bench.sqlite3'), options.tasks,
+                                         options.subtasks, options.description_size)
+        main(options)
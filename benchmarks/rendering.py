@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Скорость энкодеров JSON-ответов (tasks.rendering): stdlib против orjson.
+
+Две части:
+
+* кодирование готового ответа api_task_list из ``--rows`` строк (собранного
+  тем же TASK_LIST, что во вью) — только ``rendering.dumps``;
+* запросы целиком через django.test.Client: страница списка (limit=500) и
+  потоковая выгрузка ``?format=json-stream`` всех задач.
+
+Без установленного orjson сравнивать не с чем — печатается только stdlib.
+
+    python benchmarks/rendering.py --rows 500 5000 50000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+
+def setup_database(path, tasks, description_size):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = path
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    call_command('migrate', verbosity=0)
+
+    from tasks import bulk
+    from tasks.models import Task
+    from tasks.status_cache import status_cache
+
+    todo = status_cache.get_or_create('To Do')
+    description = ('Описание задачи ' * (description_size // 16 + 1))[:description_size]
+    now = timezone.now()
+    bulk.create(Task, [
+        Task(title=f'Задача {i}', description=description, status=todo,
+             deadline=now + timedelta(hours=i - tasks // 2))
+        for i in range(tasks)
+    ])
+
+
+def payload(rows):
+    """Тело api_task_list из первых ``rows`` задач (повторяются, если задач меньше)"""
+    from django.utils import timezone
+    from tasks import fieldsets
+    from tasks.models import Task
+
+    names = fieldsets.TASK_LIST.names
+    render, context = fieldsets.TASK_LIST.compile(names), fieldsets.context(timezone.now())
+    source = list(Task.objects.values(*fieldsets.TASK_LIST.columns(names))[:rows])
+    tasks = [render(source[i % len(source)], context) for i in range(rows)]
+    return {'tasks': tasks, 'count': rows, 'limit': rows, 'next': None, 'prev': None,
+            'filters': {'status': None, 'overdue': None}}
+
+
+def measure(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, result
+
+
+def main(options):
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+    from tasks import rendering
+
+    backends = ['stdlib'] + (['orjson'] if rendering.orjson is not None else [])
+    print(f"{'что':<34} {'энкодер':<8} {'байт':>11} {'мс (p50)':>10}")
+
+    for rows in options.rows:
+        data = payload(rows)
+        for name in backends:
+            settings.TASKS_JSON_RENDERER = name
+            ms, body = measure(lambda: rendering.dumps(data), options.repeat)
+            print(f"{f'dumps, {rows} задач':<34} {name:<8} {len(body):>11} {ms:>10.2f}")
+
+    client = Client()
+    url = reverse('api_task_list')
+    requests = [('список, limit=500', {'limit': 500}),
+                ('выгрузка json-stream', {'format': 'json-stream'})]
+    for label, params in requests:
+        for name in backends:
+            settings.TASKS_JSON_RENDERER = name
+            counter = iter(range(10 ** 9))  # обход кэша ответов
+
+            def get():
+                response = client.get(url, {**params, '_': f'{name}{next(counter)}'})
+                return response.getvalue()
+
+            ms, body = measure(get, options.repeat)
+            print(f'{label:<34} {name:<8} {len(body):>11} {ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[500, 5000, 50000],
+                        help='Размеры ответа для чистого кодирования')
+    parser.add_argument('--tasks', type=int, default=5000, help='Задач в базе')
+    parser.add_argument('--description-size', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'), options.tasks, options.description_size)
+        main(options)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Стоимость сериализации одного объекта: DRF (SubTaskDetailSerializer,
+TaskDetailSerializer) против быстрого пути на values() (tasks.fieldsets)
+для 1, 100 и 10 000 подзадач у задачи.
+
+Время включает запросы к БД: у DRF — с select_related/prefetch_related,
+чтобы сравнивать сериализацию, а не N+1. Результат обоих путей сверяется.
+
+    python benchmarks/serializers.py --sizes 1 100 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+
+def setup_database(path, sizes):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = path
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    call_command('migrate', verbosity=0)
+
+    from tasks import bulk
+    from tasks.models import SubTask, Task
+    from tasks.status_cache import status_cache
+
+    todo = status_cache.get_or_create('To Do')
+    now = timezone.now()
+    tasks = {}
+    for size in sizes:
+        task = Task.objects.create(title=f'Задача на {size}', description='Описание',
+                                   status=todo, deadline=now + timedelta(days=1))
+        bulk.create(SubTask, [
+            SubTask(title=f'Подзадача {i}', description='Описание подзадачи', status=todo,
+                    deadline=now + timedelta(hours=i), task=task)
+            for i in range(size)
+        ])
+        tasks[size] = task.id
+    return tasks
+
+
+def measure(fn, objects, min_time=0.5):
+    """Микросекунд на объект (лучшее из повторов за ~min_time секунд)"""
+    best, spent, result = float('inf'), 0.0, None
+    while spent < min_time or best == float('inf'):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best, spent = min(best, elapsed), spent + elapsed
+    return best / max(objects, 1) * 1e6, result
+
+
+def main(options, tasks):
+    from django.test import RequestFactory
+    from tasks import fieldsets
+    from tasks.models import SubTask, Task
+    from tasks.serializers import SubTaskDetailSerializer, TaskDetailSerializer
+
+    request = RequestFactory().get('/')
+
+    def drf_subtasks(task_id):
+        queryset = SubTask.objects.filter(task_id=task_id).select_related('status', 'task__status')
+        return SubTaskDetailSerializer(queryset, many=True).data
+
+    def fast_subtasks(task_id):
+        subtasks, task, fields, expand = fieldsets.subtasks_query(request, task_id)
+        return fieldsets.render_subtasks(subtasks, task.first(), fields, expand, fieldsets.context())
+
+    def drf_detail(task_id):
+        task = Task.objects.select_related('status').prefetch_related('subtasks__status').get(id=task_id)
+        return TaskDetailSerializer(task).data
+
+    def fast_detail(task_id):
+        task, subtasks, fields, expand = fieldsets.task_detail_query(request, task_id)
+        return fieldsets.render_task_detail(task.first(), list(subtasks), fields, fieldsets.context())
+
+    print(f"{'сериализатор':<28} {'объектов':>9} {'DRF, мкс':>10} {'values, мкс':>12} {'ускорение':>10}")
+    for name, drf, fast in (('SubTaskDetailSerializer', drf_subtasks, fast_subtasks),
+                            ('TaskDetailSerializer', drf_detail, fast_detail)):
+        for size, task_id in tasks.items():
+            drf_cost, expected = measure(lambda: drf(task_id), size)
+            fast_cost, actual = measure(lambda: fast(task_id), size)
+            if actual != expected:
+                raise AssertionError(f'{name}: ответы расходятся при {size} объектах')
+            print(f'{name:<28} {size:>9} {drf_cost:>10.1f} {fast_cost:>12.1f} '
+                  f'{drf_cost / fast_cost:>9.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 100, 10000])
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tasks = setup_database(os.path.join(tmp, 'bench.sqlite3'), options.sizes)
+        main(options, tasks)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python
+"""
+Набор бенчмарков всех эндпоинтов tasks, списков админки и orm_operations.
+
+Одна команда заполняет базу нужного масштаба (или берёт уже заполненную),
+прогоняет каждый случай и пишет результаты в JSON: задержки p50/p90/p99,
+пропускную способность одного клиента и число SQL-запросов на запрос.
+С ``--baseline`` результаты сравниваются с сохранённым прогоном, регрессии
+печатаются, а код возврата — 1 (для CI).
+
+    python benchmarks/suite.py --scale 10k
+    python benchmarks/suite.py --scale 1m --baseline benchmarks/baselines/1m.json
+    python benchmarks/suite.py --scale 10k --save-baseline benchmarks/baselines/10k.json
+
+Заполненная база масштаба хранится в ``--data-dir`` и переиспользуется;
+каждый прогон идёт на её копии, поэтому случаи с записью не меняют данные
+следующих прогонов. Случаи, которые на большом масштабе бессмысленны
+(HTML-список и выгрузка всех задач, построение индекса автодополнения),
+пропускаются выше своего ``max_tasks``.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+SUBTASKS_PER_TASK = 2
+STATUSES = ('To Do', 'In Progress', 'Done')
+SEED_BATCH = 20_000
+# Меняется вместе с генератором данных: старые заполненные базы не подходят
+DATA_VERSION = 2
+
+# run(n) -> response (или None для случаев без HTTP); max_tasks — верхний масштаб случая;
+# settings — переопределения settings на время замера
+Case = namedtuple('Case', 'name run expected_status max_tasks settings')
+
+
+def case(name, run, expected_status=200, max_tasks=None, settings=None):
+    return Case(name, run, expected_status, max_tasks, settings or {})
+
+
+# --- база ---
+
+def seed(tasks, options):
+    """Задачи и подзадачи командой seed_tasks (через tasks.bulk: счётчики, поиск)"""
+    from django.core.management import call_command
+
+    call_command('seed_tasks', tasks=tasks, subtasks_per_task=f'fixed:{SUBTASKS_PER_TASK}',
+                 seed=options.seed, batch_size=SEED_BATCH, stdout=sys.stderr)
+
+
+def prepare_database(options):
+    """Копия заполненной базы масштаба для прогона; заполняет её при первом запуске"""
+    os.makedirs(options.data_dir, exist_ok=True)
+    template = os.path.join(options.data_dir, f'tasks-{options.scale}-seed{options.seed}-v{DATA_VERSION}.sqlite3')
+    work = os.path.join(options.tmp, 'bench.sqlite3')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = work
+    settings.TASKS_DB_PROFILE = options.profile
+    settings.DEBUG = False  # иначе connection.queries копит все запросы
+    settings.TASKS_QUERY_BUDGET_RAISE = False
+    settings.ALLOWED_HOSTS = ['*']
+
+    if os.path.exists(template):
+        shutil.copyfile(template, work)
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.db import connections
+
+    call_command('migrate', verbosity=0)
+    if not os.path.exists(template):
+        started = time.perf_counter()
+        seed(SCALES[options.scale], options)
+        print(f'база {options.scale} заполнена за {time.perf_counter() - started:.1f} с', file=sys.stderr)
+        connections.close_all()
+        shutil.copyfile(work, template)
+
+
+# --- случаи ---
+
+def build_cases(options):
+    from django.contrib.auth.models import User
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from tasks.models import SubTask, Task
+    from tasks.orm_operations import perform_all_orm_operations
+    from tasks.status_cache import status_cache
+
+    client = Client()
+    admin = Client()
+    user = User.objects.filter(username='bench').first() or \
+        User.objects.create_superuser('bench', 'bench@example.com', 'bench')
+    admin.force_login(user)
+
+    middle = Task.objects.order_by('deadline', 'id').values_list('id', flat=True)[SCALES[options.scale] // 2]
+    task_ids = list(Task.objects.order_by('-id').values_list('id', flat=True)[:50])
+    done = status_cache.get('Done')
+    deadline = (timezone.now() + timedelta(days=30)).isoformat()
+    today = timezone.localdate()
+    day = {'from': (today - timedelta(days=7)).isoformat(), 'to': (today - timedelta(days=7)).isoformat()}
+    # Данные seed_tasks: дедлайны от -90 до +180 дней
+    year = {'from': (today - timedelta(days=182)).isoformat(),
+            'to': (today + timedelta(days=182)).isoformat(), 'bucket': 'month'}
+    # Дни календаря сразу устаревают — каждый запрос считает их в БД
+    no_calendar_cache = {'TASKS_CALENDAR_CACHE_TIMEOUT': 0}
+    cursor = client.get(reverse('api_task_list'), {'limit': 50}).json()['next']
+
+    def get(name, args=(), cached=False, **params):
+        url = reverse(name, args=args)
+
+        def run(n):
+            # По умолчанию уникальный параметр: мимо кэша ответов, до БД
+            return client.get(url, params if cached else {**params, '_': n})
+        return run
+
+    def admin_get(name, **params):
+        # Админка не кэширует ответы, а неизвестный параметр для неё — ошибка фильтра
+        url = reverse(name)
+        return lambda n: admin.get(url, params)
+
+    def post(name, body):
+        url = reverse(name)
+
+        def run(n):
+            return http_post(url, body(n))
+        return run
+
+    def http_post(url, data):
+        return client.post(url, json.dumps(data), content_type='application/json')
+
+    def orm_operations(n):
+        with contextlib.redirect_stdout(io.StringIO()):
+            perform_all_orm_operations()
+
+    return [
+        case('html:task_list', get('home'), max_tasks=100_000),
+        case('list:default', get('api_task_list')),
+        case('list:cached', get('api_task_list', cached=True)),
+        case('list:limit500', get('api_task_list', limit=500)),
+        case('list:status', get('api_task_list', status='Done')),
+        case('list:overdue', get('api_task_list', overdue='true')),
+        case('list:fields', get('api_task_list', fields='id,title,status')),
+        case('list:cursor', get('api_task_list', cursor=cursor)),
+        case('list:json-stream', get('api_task_list', format='json-stream'), max_tasks=100_000),
+        case('detail', get('api_task_detail', [middle])),
+        case('detail:cached', get('api_task_detail', [middle], cached=True)),
+        case('detail:fields', get('api_task_detail', [middle], fields='id,title,status')),
+        case('subtasks', get('api_task_subtasks', [middle])),
+        case('subtasks:expand', get('api_task_subtasks', [middle], expand='task')),
+        case('stats', get('api_task_stats')),
+        case('calendar:day', get('api_task_calendar', **day), settings=no_calendar_cache),
+        case('calendar:year', get('api_task_calendar', **year), settings=no_calendar_cache),
+        # Тёплый кэш: все дни года из кэша, как прошедшие корзины, куда почти не пишут
+        case('calendar:year:cached', get('api_task_calendar', **year)),
+        case('search', get('api_search', q='релиз')),
+        case('suggest', get('api_task_suggest', prefix='Задача 12'), max_tasks=1_000_000),
+        case('suggest:stats', get('api_task_suggest_stats')),
+        case('create:task', post('api_task_create', lambda n: {
+            'title': f'Бенчмарк {n}', 'deadline': deadline}), 201),
+        case('create:subtask', post('api_subtask_create', lambda n: {
+            'title': f'Бенчмарк {n}', 'deadline': deadline, 'task_id': middle,
+            'status_id': done.id}), 201),
+        case('create:bulk100', post('api_task_bulk_create', lambda n: [
+            {'title': f'Пачка {n}.{i}', 'deadline': deadline} for i in range(100)]), 201),
+        case('status-transitions', post('api_status_transitions', lambda n: {
+            'status': STATUSES[n % len(STATUSES)], 'target': 'tasks', 'ids': task_ids})),
+        case('admin:task_changelist', admin_get('admin:tasks_task_changelist')),
+        case('admin:task_search', admin_get('admin:tasks_task_changelist', q='релиз')),
+        case('admin:task_filter', admin_get('admin:tasks_task_changelist',
+                                            status__id__exact=done.id)),
+        case('admin:subtask_changelist', admin_get('admin:tasks_subtask_changelist')),
+        case('admin:subtask_changelist_page', admin_get('admin:tasks_subtask_changelist', p=50)),
+        case('orm:perform_all_orm_operations', orm_operations, None),
+        case('orm:subtask_count_by_task', lambda n: SubTask.objects.filter(task_id=middle).count(), None),
+    ]
+
+
+# --- измерение ---
+
+def measure(bench, options):
+    from django.core.cache import cache
+    from django.test import override_settings
+
+    cache.clear()
+    with override_settings(**bench.settings):
+        return _measure(bench, options)
+
+
+def _measure(bench, options):
+    for n in range(options.warmup):
+        check(bench, bench.run(-n - 1))
+    timings, queries = [], []
+    for n in range(options.requests):
+        started = time.perf_counter()
+        response = bench.run(n)
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)  # потоковый ответ — до конца
+        timings.append(time.perf_counter() - started)
+        check(bench, response)
+        stats = getattr(getattr(response, 'wsgi_request', None), 'query_stats', None)
+        if stats is not None:
+            queries.append(stats.count)
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    result = {
+        'requests': len(timings),
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentiles[49] * 1000,
+        'p90_ms': percentiles[89] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+        'max_ms': max(timings) * 1000,
+        'rps': len(timings) / sum(timings),
+    }
+    if queries:
+        result['queries'] = statistics.median(queries)
+    return result
+
+
+def check(bench, response):
+    if bench.expected_status is not None and response.status_code != bench.expected_status:
+        raise RuntimeError(f'{bench.name}: HTTP {response.status_code}, ожидался '
+                           f'{bench.expected_status}: {response.content[:300]!r}')
+
+
+def metadata(options):
+    import django
+    from django.conf import settings
+    from tasks import rendering
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'scale': options.scale,
+        'tasks': SCALES[options.scale],
+        'subtasks': SCALES[options.scale] * SUBTASKS_PER_TASK,
+        'seed': options.seed,
+        'profile': options.profile,
+        'requests': options.requests,
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'json_renderer': rendering.backend(),
+        'machine': f'{platform.system()} {platform.machine()} ({os.cpu_count()} CPU)',
+        'debug': settings.DEBUG,
+    }
+
+
+def run(options):
+    prepare_database(options)
+    scale = SCALES[options.scale]
+    results = {}
+    print(f"{'случай':<34} {'p50 мс':>9} {'p90 мс':>9} {'p99 мс':>9} {'зап/с':>9} {'SQL':>5}")
+    for bench in build_cases(options):
+        if options.only and not any(bench.name.startswith(prefix) for prefix in options.only):
+            continue
+        if bench.max_tasks is not None and scale > bench.max_tasks:
+            results[bench.name] = {'skipped': f'scale above {bench.max_tasks} tasks'}
+            continue
+        result = results[bench.name] = measure(bench, options)
+        print(f"{bench.name:<34} {result['p50_ms']:>9.2f} {result['p90_ms']:>9.2f} "
+              f"{result['p99_ms']:>9.2f} {result['rps']:>9.0f} {result.get('queries', ''):>5}")
+    return {'meta': metadata(options), 'results': results}
+
+
+# --- сравнение с базовым прогоном ---
+
+def compare(report, baseline, threshold, min_ms):
+    """Список регрессий: задержка выросла больше чем на threshold (и на min_ms), SQL-запросов стало больше"""
+    if baseline['meta'].get('scale') != report['meta']['scale']:
+        print(f"внимание: базовый прогон масштаба {baseline['meta'].get('scale')}, "
+              f"текущий — {report['meta']['scale']}", file=sys.stderr)
+    regressions = []
+    print(f"\n{'случай':<34} {'было p50':>9} {'стало p50':>10} {'изм.':>7}")
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if not old or 'skipped' in old or 'skipped' in result:
+            continue
+        change = result['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0
+        print(f"{name:<34} {old['p50_ms']:>9.2f} {result['p50_ms']:>10.2f} {change:>+7.0%}")
+        for metric in ('p50_ms', 'p90_ms'):
+            if result[metric] > old[metric] * (1 + threshold) and result[metric] - old[metric] >= min_ms:
+                regressions.append(f'{name}: {metric} {old[metric]:.2f} -> {result[metric]:.2f}')
+        if result.get('queries', 0) > old.get('queries', float('inf')):
+            regressions.append(f"{name}: SQL-запросов {old['queries']} -> {result['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='10k')
+    parser.add_argument('--requests', type=int, default=50, help='Измеряемых запросов на случай')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--only', nargs='+', help='Только случаи с этими префиксами имён')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--profile', default='production', help='Профиль SQLite (tasks.db)')
+    parser.add_argument('--data-dir', default=os.path.join(ROOT, 'benchmarks', '.data'))
+    parser.add_argument('--output', help='Файл результатов (по умолчанию benchmarks/results/)')
+    parser.add_argument('--baseline', help='Сравнить с этим JSON-файлом результатов')
+    parser.add_argument('--save-baseline', help='Записать результаты ещё и как базовый прогон')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Допустимый рост задержки, доля (0.25 = +25%%)')
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help='Рост задержки меньше этого не считается регрессией')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as options.tmp:
+        report = run(options)
+
+    output = options.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"{options.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    for path in filter(None, [output, options.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nрезультаты: {output}')
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compare(report, json.load(f), options.threshold, options.min_ms)
+        if regressions:
+            print('\nРЕГРЕССИИ:\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+        print('\nрегрессий нет')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+Вставок в секунду через api_create_task: обычный путь против группового
+коммита (tasks.write_queue).
+
+``--threads`` потоков-клиентов параллельно создают задачи через
+django.test.Client, каждый в своём соединении с временной базой SQLite
+(как потоки WSGI-сервера). Профиль базы — ``--profile`` (см. tasks.db).
+
+    python benchmarks/write_queue.py --threads 16 --requests 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Manager_task_12.settings')
+
+
+def setup_database(path, profile):
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = path
+    settings.TASKS_DB_PROFILE = profile
+    settings.ALLOWED_HOSTS = ['*']
+
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from tasks.status_cache import status_cache
+    status_cache.get_or_create('To Do')
+
+
+def run(threads, total):
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+
+    url = reverse('api_task_create')
+    deadline = (timezone.now() + timedelta(days=30)).isoformat()
+    counter = iter(range(total))
+    errors = []
+
+    def client():
+        http = Client()
+        for n in counter:
+            response = http.post(url, json.dumps({'title': f'Задача {n}', 'deadline': deadline}),
+                                 content_type='application/json')
+            if response.status_code != 201:
+                errors.append(response.content)
+        connection.close()
+
+    workers = [threading.Thread(target=client) for _ in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise RuntimeError(f'{len(errors)} запросов с ошибкой, первая: {errors[0][:200]!r}')
+    return total / elapsed
+
+
+def main(options):
+    from django.conf import settings
+    from tasks.write_queue import write_queue
+
+    print(f"{'режим':<14} {'вставок/с':>10} {'коммитов':>9}")
+    for mode in ('inline', 'write-queue'):
+        settings.TASKS_WRITE_QUEUE = mode == 'write-queue'
+        settings.TASKS_WRITE_QUEUE_WINDOW_MS = options.window_ms
+        batches = write_queue.batches
+        rate = run(options.threads, options.requests)
+        commits = write_queue.batches - batches if settings.TASKS_WRITE_QUEUE else options.requests
+        print(f'{mode:<14} {rate:>10.0f} {commits:>9}')
+    write_queue.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000, help='Запросов на режим')
+    parser.add_argument('--window-ms', type=float, default=5)
+    parser.add_argument('--profile', default='production', help='Профиль SQLite (tasks.db)')
+    parser.add_argument('--dir', help='Каталог для временной базы (важна файловая система: fsync)')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=options.dir) as tmp:
+        setup_database(os.path.join(tmp, 'bench.sqlite3'), options.profile)
+        main(options)
@@ -1,5 +1,7 @@
 from django.contrib import admin
 from .models import Status, Task, SubTask
+from . import bulk, search
+from .status_cache import status_cache
 
 
 class SubTaskInline(admin.TabularInline):  # или admin.StackedInline
@@ -8,12 +10,22 @@ class SubTaskInline(admin.TabularInline):  # или admin.StackedInline
     fields = ['title', 'description', 'status', 'deadline']
 
 
+class FullTextSearchMixin:
+    """Поиск в списке админки через FTS5-индекс вместо icontains по search_fields"""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_queryset(queryset, search_term), False
+
+
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
-    list_display = ['short_title', 'status', 'deadline']
+class TaskAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ['short_title', 'status', 'deadline', 'subtasks_progress']
     list_filter = ['status', 'deadline']
     search_fields = ['title', 'description']
     date_hierarchy = 'deadline'
+    ordering = ['-deadline']  # по индексу на deadline, а не полным просмотром по id
     inlines = [SubTaskInline]  # Добавляем инлайн формы
 
     def short_title(self, obj):
@@ -21,13 +33,20 @@ class TaskAdmin(admin.ModelAdmin):
 
     short_title.short_description = 'Title'
 
+    def subtasks_progress(self, obj):
+        # Из сводки в строке задачи (tasks.rollup), без запроса подзадач
+        return f"{obj.subtask_done}/{obj.subtask_total}"
+
+    subtasks_progress.short_description = 'Subtasks done'
+
 
 @admin.register(SubTask)
-class SubTaskAdmin(admin.ModelAdmin):
+class SubTaskAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['short_title', 'task', 'status', 'deadline']
     list_filter = ['status', 'deadline']
     search_fields = ['title', 'description']
     date_hierarchy = 'deadline'
+    ordering = ['-deadline']  # по индексу на deadline, а не полным просмотром по id
     actions = ['mark_as_done']  # Добавляем action для задания 3
 
     def short_title(self, obj):
@@ -37,8 +56,9 @@ class SubTaskAdmin(admin.ModelAdmin):
 
     # Задание 3: Action для пометки как Done
     def mark_as_done(self, request, queryset):
-        done_status = Status.objects.get(name="Done")
-        updated_count = queryset.update(status=done_status)
+        done_status = status_cache.get("Done")
+        # bulk.update_status вместо queryset.update(): UPDATE + обновление счётчиков статистики
+        updated_count = bulk.update_status(queryset, done_status)
         self.message_user(
             request,
             f"{updated_count} подзадач помечено как выполненные"
@@ -0,0 +1,150 @@
+"""
+Асинхронные версии эндпоинтов чтения (маршруты ``api/async/...``).
+
+Под ASGI (Manager_task_12/asgi.py) синхронное вью занимает поток на всё
+время ожидания БД; эти вью пользуются async ORM (afirst, acount, aiterator)
+и отдают управление циклу событий. Ответы совпадают с синхронными
+api_task_list / api_task_detail / api_task_subtasks / api_task_stats и
+так же кэшируются (tasks.http_cache).
+
+В Django 4.2 async ORM — обёртка над синхронными запросами в одном
+выделенном потоке, поэтому выигрыш — в потоках, а не в параллелизме самих
+запросов к БД (для SQLite он невозможен в любом случае).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponseNotAllowed
+from django.utils import timezone
+
+from . import fieldsets
+from .http_cache import cached_response, task_keys, task_list_keys
+from .models import Task
+from .query_budget import query_budget
+from .rendering import json_response
+from .pagination import DEFAULT_PAGE_SIZE, apaginate_by_deadline, parse_limit
+from .stats import acollect_stats
+from .status_cache import status_cache
+
+
+def require_get(view):
+    """require_http_methods(["GET"]) для async-вью: в Django 4.2 он их не поддерживает"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def _context(status_ids, now=None):
+    """
+    Контекст геттеров tasks.fieldsets. Статусы читаются заранее: в async-коде
+    синхронный status_cache.get_by_id мог бы пойти в БД.
+    """
+    statuses = {status.id: status for status in await sync_to_async(status_cache.all)()}
+    for status_id in set(status_ids) - statuses.keys():
+        statuses[status_id] = await sync_to_async(status_cache.get_by_id)(status_id)
+    return {'now': now, 'status': statuses.__getitem__, 'datetime': fieldsets.datetime_formatter()}
+
+
+@query_budget(2)
+@require_get
+@cached_response(task_list_keys)
+async def api_task_list(request):
+    """Асинхронный api_task_list (без потоковой выгрузки ?format=)"""
+    try:
+        fields = fieldsets.TASK_LIST.parse(request.GET.get('fields'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    tasks = Task.objects.values(*fieldsets.TASK_LIST.columns(fields))
+
+    status_filter = request.GET.get('status')
+    if status_filter:
+        status = await sync_to_async(status_cache.find)(status_filter)
+        tasks = tasks.filter(status_id=status.id) if status is not None else tasks.none()
+
+    now = timezone.now()
+
+    overdue = request.GET.get('overdue')
+    if overdue and overdue.lower() == 'true':
+        tasks = tasks.filter(is_overdue=True)
+
+    cursor = request.GET.get('cursor')
+    try:
+        # Без limit и cursor — весь список, как в api_task_list
+        limit = parse_limit(request.GET.get('limit'), default=DEFAULT_PAGE_SIZE if cursor else None)
+        page, next_cursor, prev_cursor = await apaginate_by_deadline(tasks, limit, cursor)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    status_ids = [task['status_id'] for task in page] if 'status' in fields else []
+    render, context = fieldsets.TASK_LIST.compile(fields), await _context(status_ids, now)
+    tasks_data = [render(task, context) for task in page]
+
+    return json_response({
+        'tasks': tasks_data,
+        'count': len(tasks_data),
+        'limit': limit,
+        'next': next_cursor,
+        'prev': prev_cursor,
+        'filters': {
+            'status': status_filter,
+            'overdue': overdue
+        }
+    })
+
+
+@query_budget(3)
+@require_get
+@cached_response(task_keys)
+async def api_task_detail(request, task_id):
+    """Асинхронный api_task_detail"""
+    try:
+        task, subtasks, fields, expand = fieldsets.task_detail_query(request, task_id)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    task = await task.afirst()
+    if task is None:
+        raise Http404('No Task matches the given query.')
+    status_ids = [task['status_id']] if 'status' in fields else []
+    if subtasks is not None:
+        subtasks = [subtask async for subtask in subtasks.aiterator()]
+        status_ids += [subtask['status_id'] for subtask in subtasks]
+    context = await _context(status_ids)
+    return json_response(fieldsets.render_task_detail(task, subtasks, fields, context))
+
+
+@query_budget(3)
+@require_get
+@cached_response(task_keys)
+async def api_task_subtasks(request, task_id):
+    """Асинхронный api_task_subtasks"""
+    try:
+        subtasks, task, fields, expand = fieldsets.subtasks_query(request, task_id)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    task = await task.afirst()
+    if task is None:
+        raise Http404('No Task matches the given query.')
+    subtasks = [subtask async for subtask in subtasks.aiterator()]
+    status_ids = [subtask['status_id'] for subtask in subtasks] if 'status' in fields else []
+    if 'task' in expand:
+        status_ids.append(task['status_id'])
+    context = await _context(status_ids)
+    return json_response({
+        'subtasks': fieldsets.render_subtasks(subtasks, task, fields, expand, context),
+        'task_id': task_id,
+    })
+
+
+@query_budget(5)
+@require_get
+async def api_task_stats(request):
+    """Асинхронный api_task_stats: независимые запросы статистики выполняются одновременно"""
+    now = timezone.now()
+    return json_response({
+        'stats': await acollect_stats(now),
+        'timestamp': now.isoformat(),
+        'success': True
+    })
@@ -0,0 +1,184 @@
+"""
+Массовые операции над Task/SubTask.
+
+``QuerySet.update()`` и ``bulk_create()`` не вызывают сигналы моделей, поэтому
+любой массовый путь записи должен идти через эти функции: они выполняют
+операцию и в той же транзакции рассылают tasks.signals.bulk_created /
+status_updated, чтобы производные данные (счётчики и т.п.) остались верными.
+"""
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import SubTask, Task, deadline_passed
+from .signals import became_overdue, bulk_created, status_updated
+from .status_cache import status_cache
+
+
+def update_status(queryset, status):
+    """
+    Переводит все строки ``queryset`` в ``status`` одним UPDATE.
+    Возвращает число обновлённых строк.
+    """
+    model = queryset.model
+    # Для подзадач «затронутые задачи» — их родители
+    task_field = 'task_id' if model is SubTask else 'pk'
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list('pk', 'status_id', task_field, 'deadline'))
+        if not rows:
+            return 0
+        updated = queryset.update(status=status)
+        status_updated.send(
+            sender=model,
+            pks=[pk for pk, _, _, _ in rows],
+            before=Counter(status_id for _, status_id, _, _ in rows),
+            status=status,
+            task_ids={task_id for _, _, task_id, _ in rows},
+            deadlines={deadline for _, _, _, deadline in rows},
+        )
+    return updated
+
+
+def create(model, objs, batch_size=None):
+    """
+    ``bulk_create`` с рассылкой ``bulk_created`` (и ``became_overdue`` для
+    строк с уже прошедшим дедлайном). Возвращает созданные объекты.
+    """
+    if model in (Task, SubTask):
+        now = timezone.now()
+        for obj in objs:
+            obj.is_overdue = deadline_passed(obj.deadline, now)
+    with transaction.atomic():
+        objs = model.objects.bulk_create(objs, batch_size=batch_size)
+        bulk_created.send(sender=model, objs=objs)
+        overdue = [obj for obj in objs if getattr(obj, 'is_overdue', False)]
+        if overdue:
+            became_overdue.send(sender=model, pks=[obj.pk for obj in overdue],
+                                task_ids={obj.task_id if model is SubTask else obj.pk for obj in overdue})
+    return objs
+
+
+def insert_rows(model, fields, rows):
+    """
+    Вставка без объектов модели — для генерации и загрузки сотен тысяч строк,
+    где ``bulk_create`` упирается в создание объектов и подготовку каждого
+    значения. ``fields`` — attname полей (``'status_id'``, ``'deadline'``...),
+    ``rows`` — кортежи значений в том же порядке. Остальные поля получают
+    значения по умолчанию модели (auto_now_add — текущее время). Флаг
+    ``is_overdue`` не вычисляется: его передают в ``fields`` или строки с
+    прошедшим дедлайном отметит tasks.scheduler.
+
+    ``bulk_created`` рассылается с лёгкими строками — namedtuple из ``pk`` и
+    всех записанных полей, — которых обработчикам достаточно. Возвращает их.
+    """
+    opts = model._meta
+    given = [opts.get_field(name) for name in fields]
+    defaults = []
+    for field in opts.concrete_fields:
+        if field.primary_key or field in given:
+            continue
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            defaults.append((field, timezone.now()))
+        elif field.has_default() or field.null:
+            defaults.append((field, field.get_default()))
+    all_fields = given + [field for field, _ in defaults]
+    extra = tuple(value for _, value in defaults)
+
+    def adapter(field):
+        if isinstance(field, models.DateTimeField):
+            return _datetime_adapter()
+        return None
+    adapters = [(i, adapt) for i, adapt in enumerate(map(adapter, all_fields)) if adapt]
+
+    quote = connection.ops.quote_name
+    placeholder = '(' + ', '.join(['%s'] * len(all_fields)) + ')'
+    prefix = (f'INSERT INTO {quote(opts.db_table)} '
+              f'({", ".join(quote(field.column) for field in all_fields)}) VALUES ')
+    suffix = f' RETURNING {quote(opts.pk.column)}'
+    per_statement = max(1, connection.features.max_query_params // len(all_fields))
+    Row = namedtuple(f'{model.__name__}Row', ['pk'] + [field.attname for field in all_fields])
+
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), per_statement):
+            chunk = [tuple(row) + extra for row in rows[start:start + per_statement]]
+            params = []
+            for row in chunk:
+                row = list(row)
+                for i, adapt in adapters:
+                    row[i] = adapt(row[i])
+                params.extend(row)
+            cursor.execute(prefix + ', '.join([placeholder] * len(chunk)) + suffix, params)
+            # Как и bulk_create на SQLite, полагаемся на порядок строк RETURNING
+            created.extend(Row(pk, *row) for (pk,), row in zip(cursor.fetchall(), chunk))
+        bulk_created.send(sender=model, objs=created)
+    return created
+
+
+def _datetime_adapter():
+    """
+    ``adapt_datetimefield_value`` для SQLite без проверок на выражения:
+    на сотнях тысяч значений вызовы make_naive/is_aware заметны.
+    """
+    if connection.vendor != 'sqlite' or not settings.USE_TZ:
+        return connection.ops.adapt_datetimefield_value
+    tz = connection.timezone
+
+    def adapt(value):
+        if value is None:
+            return None
+        if value.tzinfo is not None:
+            value = value.astimezone(tz).replace(tzinfo=None)
+        return str(value)
+    return adapt
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    Снимает неуникальные индексы таблиц ``models`` на время загрузки и
+    пересоздаёт их на выходе: построить индекс по заполненной таблице
+    дешевле, чем обновлять его на каждой вставке. Пока блок выполняется,
+    запросы к таблицам идут без индексов, так что это для заливки пустой
+    базы, а не рабочей. Только SQLite (определения берутся из sqlite_master).
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND sql NOT LIKE 'CREATE UNIQUE%%' AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables)
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+def create_tasks(items, batch_size=None):
+    """
+    Создаёт задачи из проверенных данных TaskSerializer одним bulk_create
+    (пачками по ``batch_size``) в одной транзакции. Статус по умолчанию,
+    как и в TaskSerializer.create, — 'To Do'; он вычисляется один раз на всю
+    пачку, а не на каждую строку.
+    """
+    default_status = None
+    objs = []
+    for data in items:
+        data = dict(data)
+        if data.get('status') is None:
+            if default_status is None:
+                default_status = status_cache.get_or_create('To Do')
+            data['status'] = default_status
+        objs.append(Task(**data))
+    return create(Task, objs, batch_size=batch_size)
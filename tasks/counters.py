@@ -0,0 +1,103 @@
+"""
+Инкрементально поддерживаемые счётчики статистики (таблица StatCounter).
+
+Счётчики меняются в той же транзакции, что и сами строки Task/SubTask:
+через сигналы save/delete (см. tasks.signals) и через массовые операции
+из tasks.bulk, которые обходят сигналы Django. Благодаря этому
+api_task_stats читает готовые числа одним запросом, а не сканирует таблицы.
+Сверка и полный пересчёт — команда ``rebuild_stats``.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+
+from .models import StatCounter, SubTask, Task
+
+TOTAL = 'total'
+WITHOUT_DESCRIPTION = 'without_description'
+
+SCOPES = {
+    Task: 'task',
+    SubTask: 'subtask',
+}
+
+
+def status_key(status_id):
+    return f'status:{status_id}'
+
+
+def row_keys(status_id, description):
+    """Ключи счётчиков, в которые входит одна строка."""
+    keys = [TOTAL, status_key(status_id)]
+    if description == '':
+        keys.append(WITHOUT_DESCRIPTION)
+    return keys
+
+
+def apply(scope, deltas):
+    """Прибавляет ``deltas`` ({key: delta}) к счётчикам одним UPDATE."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    with transaction.atomic():
+        counters = StatCounter.objects.filter(scope=scope, key__in=list(deltas))
+        updated = counters.update(value=F('value') + Case(
+            *[When(key=key, then=Value(delta)) for key, delta in deltas.items()],
+            default=Value(0),
+        ))
+        if updated < len(deltas):
+            _create_missing(scope, deltas)
+
+
+def _create_missing(scope, deltas):
+    existing = set(StatCounter.objects.filter(scope=scope, key__in=list(deltas))
+                   .values_list('key', flat=True))
+    for key, delta in deltas.items():
+        if key in existing:
+            continue
+        try:
+            with transaction.atomic():
+                StatCounter.objects.create(scope=scope, key=key, value=delta)
+        except IntegrityError:
+            # Строку успел создать параллельный запрос
+            StatCounter.objects.filter(scope=scope, key=key).update(value=F('value') + delta)
+
+
+def on_saved(model, instance, created, before):
+    """Строка сохранена; ``before`` — её status_id/description до записи."""
+    deltas = Counter()
+    if not created and before is not None:
+        deltas.subtract(row_keys(before['status_id'], before['description']))
+    deltas.update(row_keys(instance.status_id, instance.description))
+    apply(SCOPES[model], deltas)
+
+
+def on_deleted(model, instance):
+    deltas = Counter()
+    deltas.subtract(row_keys(instance.status_id, instance.description))
+    apply(SCOPES[model], deltas)
+
+
+def on_bulk_created(model, objs):
+    deltas = Counter()
+    for obj in objs:
+        deltas.update(row_keys(obj.status_id, obj.description))
+    apply(SCOPES[model], deltas)
+
+
+def on_status_updated(model, before, status_id):
+    """Массовая смена статуса; ``before`` — {старый status_id: число строк}."""
+    deltas = Counter()
+    for old_status_id, count in before.items():
+        deltas[status_key(old_status_id)] -= count
+        deltas[status_key(status_id)] += count
+    apply(SCOPES[model], deltas)
+
+
+def read_all():
+    """Счётчики обеих областей одним запросом: {scope: {key: value}}."""
+    result = {scope: {} for scope in SCOPES.values()}
+    for scope, key, value in StatCounter.objects.values_list('scope', 'key', 'value'):
+        result.setdefault(scope, {})[key] = value
+    return result
@@ -0,0 +1,70 @@
+"""
+Настройка соединений SQLite (профиль ``TASKS_DB_PROFILE`` из settings).
+
+Профиль ``production`` переводит базу в WAL: читатели работают со своим
+снимком и не ждут писателя (api_create_task, api_create_subtask, импорт),
+а писатели при занятой базе ждут ``busy_timeout`` вместо мгновенного
+"database is locked". ``synchronous=NORMAL`` в режиме WAL безопасен для
+целостности и убирает fsync на каждый коммит; mmap и увеличенный кэш
+страниц сокращают системные вызовы на чтение.
+
+Прагмы применяются на каждое новое соединение (сигнал connection_created);
+любую из них можно переопределить переменной окружения
+``TASKS_SQLITE_<ПРАГМА>``, например ``TASKS_SQLITE_BUSY_TIMEOUT=10000``.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Порядок важен: busy_timeout первым, чтобы смена journal_mode ждала блокировку
+PROFILES = {
+    'default': {},
+    'production': {
+        'busy_timeout': 5000,              # мс
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,    # байт
+        'cache_size': -64000,              # отрицательное — в КиБ, т.е. ~64 МБ
+        'temp_store': 'MEMORY',
+    },
+}
+PRAGMAS = ('busy_timeout', 'journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+
+_VALUE = re.compile(r'^-?\w+$')
+
+
+def pragmas(profile, environ=None):
+    """Прагмы профиля с учётом переопределений из окружения: {name: value}"""
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(
+            f'Unknown TASKS_DB_PROFILE "{profile}", expected one of: {", ".join(PROFILES)}')
+    environ = os.environ if environ is None else environ
+    result = dict(PROFILES[profile])
+    for name in PRAGMAS:
+        value = environ.get(f'TASKS_SQLITE_{name.upper()}')
+        if value:
+            result[name] = value
+    for name, value in result.items():
+        # Значение подставляется в текст PRAGMA — параметры там не поддерживаются
+        if not _VALUE.match(str(value)):
+            raise ImproperlyConfigured(f'Invalid value for PRAGMA {name}: {value!r}')
+    return result
+
+
+def apply_pragmas(cursor, values):
+    for name, value in values.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    values = pragmas(getattr(settings, 'TASKS_DB_PROFILE', 'default'))
+    if values:
+        with connection.cursor() as cursor:
+            apply_pragmas(cursor, values)
@@ -0,0 +1,209 @@
+"""
+Календарь дедлайнов (``GET /api/tasks/calendar/?from=&to=&bucket=``): число
+задач и подзадач с дедлайном в каждом дне, неделе или месяце, по статусам.
+
+Счёт по дням делает SQL — ``TruncDate`` + ``Count`` с GROUP BY (день,
+статус) по диапазону deadline, который идёт по индексам
+task_deadline_id_idx / subtask_deadline_idx. Недели (с понедельника) и
+месяцы складываются из дней. Границы дней — в часовом поясе проекта
+(TIME_ZONE).
+
+Счётчики дня зависят только от deadline и статуса строк, а не от текущего
+времени, поэтому каждый день кэшируется целиком под своей версией
+(``tasks:ver:calendar:<день>``). Версию меняет любая запись, затрагивающая
+день: создание и удаление строки, смена статуса, перенос дедлайна (старый
+и новый день) — см. tasks.signals. Так прошедшие дни, куда почти не пишут,
+живут в кэше неограниченно, а год с тёплым кэшем читается двумя get_many
+без обращения к БД. Недостающие дни считаются одним запросом на таблицу.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import http_cache, metrics
+from .models import SubTask, Task
+from .status_cache import status_cache
+
+KEY_PREFIX = 'tasks:calendar'
+MODELS = {'tasks': Task, 'subtasks': SubTask}
+# Не больше ~10 лет по дням за один запрос
+MAX_DAYS = 3660
+# Больше отрезков недостающих дней — один диапазон от первого до последнего
+MAX_RUNS = 50
+
+
+def _week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+# bucket -> (начало корзины дня, начало следующей корзины)
+BUCKETS = {
+    'day': (lambda day: day, lambda start: start + timedelta(days=1)),
+    'week': (_week_start, lambda start: start + timedelta(days=7)),
+    'month': (lambda day: day.replace(day=1), _next_month),
+}
+
+
+def _cache():
+    return caches[getattr(settings, 'TASKS_RESPONSE_CACHE', 'default')]
+
+
+def version_key(day):
+    return f'tasks:ver:calendar:{day.isoformat()}'
+
+
+def _day(value, tz):
+    """Локальный день дедлайна (значение поля может быть ещё строкой)"""
+    if not isinstance(value, datetime):
+        value = Task._meta.get_field('deadline').to_python(value)
+        if value is None:
+            return None
+    if timezone.is_naive(value):
+        return value.date()
+    return timezone.localtime(value, tz).date()
+
+
+def bump_days(deadlines):
+    """Сбросить кэш дней, в которые попадают ``deadlines``"""
+    tz = timezone.get_default_timezone()
+    days = {_day(deadline, tz) for deadline in deadlines}
+    days.discard(None)
+    http_cache.bump(version_key(day) for day in days)
+
+
+def parse_range(params):
+    """
+    (first, last, bucket) из ``from``, ``to`` (дата или дата-время ISO 8601,
+    обе границы включительно) и ``bucket``; границы расширяются до целых
+    корзин. Некорректные параметры — ValueError.
+    """
+    bucket = params.get('bucket') or 'day'
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of: {", ".join(BUCKETS)}')
+    tz = timezone.get_default_timezone()
+    bounds = []
+    for name in ('from', 'to'):
+        raw = params.get(name)
+        if not raw:
+            raise ValueError(f'"{name}" is required')
+        try:
+            value = parse_date(raw) or _day(parse_datetime(raw), tz)
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValueError(f'"{name}" must be an ISO 8601 date or datetime')
+        bounds.append(value)
+    first, last = bounds
+    if first > last:
+        raise ValueError('"from" must not be after "to"')
+    bucket_start, next_start = BUCKETS[bucket]
+    first = bucket_start(first)
+    last = next_start(bucket_start(last)) - timedelta(days=1)
+    if (last - first).days + 1 > MAX_DAYS:
+        raise ValueError(f'Range is too long: at most {MAX_DAYS} days')
+    return first, last, bucket
+
+
+def _runs(days):
+    """Отсортированные дни -> непрерывные отрезки [(первый, следующий за последним)]"""
+    runs = []
+    for day in days:
+        if runs and runs[-1][1] == day:
+            runs[-1][1] = day + timedelta(days=1)
+        else:
+            runs.append([day, day + timedelta(days=1)])
+    return runs
+
+
+def _compute(days, tz):
+    """{день: {'tasks': {status_id: n}, 'subtasks': {...}}} из БД, один запрос на таблицу"""
+    runs = _runs(days)
+    if len(runs) > MAX_RUNS:
+        runs = [[runs[0][0], runs[-1][1]]]
+    condition = Q()
+    for start, end in runs:
+        condition |= Q(deadline__gte=timezone.make_aware(datetime.combine(start, time.min), tz),
+                       deadline__lt=timezone.make_aware(datetime.combine(end, time.min), tz))
+    result = {day: {name: {} for name in MODELS} for day in days}
+    for name, model in MODELS.items():
+        rows = (model.objects.filter(condition)
+                .annotate(day=TruncDate('deadline', tzinfo=tz))
+                .values_list('day', 'status_id')
+                .annotate(count=Count('id'))
+                .order_by())
+        for day, status_id, count in rows:
+            if day in result:  # в общем диапазоне попадаются и дни из кэша
+                result[day][name][status_id] = count
+    return result
+
+
+def day_counts(first, last):
+    """Счётчики дней ``first``..``last`` включительно: из кэша, недостающие — из БД"""
+    tz = timezone.get_default_timezone()
+    days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+    versions = http_cache.get_versions([version_key(day) for day in days])
+    entry_keys = {day: f'{KEY_PREFIX}:{day.isoformat()}:{version}' for day, version in zip(days, versions)}
+    cache = _cache()
+    cached = cache.get_many(list(entry_keys.values()))
+    result = {}
+    missing = []
+    for day in days:
+        entry = cached.get(entry_keys[day])
+        if entry is None:
+            missing.append(day)
+        else:
+            result[day] = entry
+    metrics.cache_lookup('calendar', True, len(days) - len(missing))
+    metrics.cache_lookup('calendar', False, len(missing))
+    if missing:
+        computed = _compute(missing, tz)
+        cache.set_many({entry_keys[day]: computed[day] for day in missing},
+                       getattr(settings, 'TASKS_CALENDAR_CACHE_TIMEOUT', 86400))
+        result.update(computed)
+    return result
+
+
+def calendar(first, last, bucket):
+    """Тело ответа api_task_calendar; корзины идут подряд, пустые — с нулями"""
+    next_start = BUCKETS[bucket][1]
+    counts = day_counts(first, last)
+    statuses = status_cache.all()
+    known = {status.id for status in statuses}
+
+    buckets = []
+    start = first
+    while start <= last:
+        end = next_start(start)
+        totals = {name: {} for name in MODELS}
+        day = start
+        while day < end:
+            for name, by_status in counts[day].items():
+                for status_id, count in by_status.items():
+                    totals[name][status_id] = totals[name].get(status_id, 0) + count
+            day += timedelta(days=1)
+        item = {'start': start.isoformat()}
+        for name, by_id in totals.items():
+            by_status = {status.name: by_id.get(status.id, 0) for status in statuses}
+            for status_id in by_id.keys() - known:
+                # Статус появился после снимка status_cache
+                by_status[status_cache.get_by_id(status_id).name] = by_id[status_id]
+            item[name] = {'total': sum(by_id.values()), 'by_status': by_status}
+        buckets.append(item)
+        start = end
+
+    return {
+        'bucket': bucket,
+        'from': first.isoformat(),
+        'to': last.isoformat(),
+        'timezone': timezone.get_default_timezone_name(),
+        'buckets': buckets,
+    }
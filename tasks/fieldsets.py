@@ -0,0 +1,228 @@
+"""
+Выборочные поля (``?fields=``) и раскрытие связей (``?expand=``) для
+эндпоинтов чтения задач и подзадач, и быстрая сериализация этих ответов.
+
+Каждое поле ответа знает, какие колонки ему нужны, поэтому запрос строится
+через ``values()`` только по запрошенным полям: ненужные колонки (прежде
+всего ``description``) не читаются из БД, а связи не загружаются без
+``expand``. Имя статуса берётся из status_cache по ``status_id`` — без JOIN.
+
+    GET /api/tasks/?fields=id,title,status,deadline
+    GET /api/tasks/5/?fields=id,title&expand=subtasks
+    GET /api/tasks/5/subtasks/?fields=id,title,status&expand=task
+
+Строки из ``values()`` превращаются в словари ответа заранее собранной
+функцией (``Fieldset.compile``) — без полей DRF и их интроспекции на
+каждый объект. Полный набор полей даёт тот же JSON, что TaskDetailSerializer
+и SubTaskDetailSerializer; сами сериализаторы остаются для записи и валидации.
+Без ``fields`` и ``expand`` детальные эндпоинты раскрывают связи как раньше
+(подзадачи у задачи, задачу у подзадачи).
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .models import SubTask, Task
+from .status_cache import status_cache
+
+Field = namedtuple('Field', 'columns getter')
+
+_datetime = serializers.DateTimeField()
+
+
+def _drf_datetime(value):
+    """Формат дат как в DRF-сериализаторах детальных эндпоинтов"""
+    return _datetime.to_representation(value) if value else None
+
+
+def datetime_formatter():
+    """
+    То же, что _drf_datetime, но формат и часовой пояс DRF определяются один
+    раз на ответ, а не на каждое поле каждого объекта.
+    """
+    output_format = api_settings.DATETIME_FORMAT
+    if not settings.USE_TZ or output_format is None or output_format.lower() != ISO_8601:
+        return _drf_datetime
+    tz = timezone.get_current_timezone()
+
+    def formatter(value):
+        if not value:
+            return None
+        if timezone.is_naive(value):
+            return _drf_datetime(value)
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return formatter
+
+
+def _status(status):
+    return {'id': status.id, 'name': status.name}
+
+
+def context(now=None):
+    """Контекст геттеров: справочник статусов читается один раз на ответ"""
+    statuses = status_cache.by_id()
+    return {
+        'now': now,
+        'status': lambda pk: statuses.get(pk) or status_cache.get_by_id(pk),
+        'datetime': datetime_formatter(),
+    }
+
+
+def parse_names(raw, allowed, param):
+    """'a,b' -> ['a', 'b']; None — параметр не передан. Неизвестное имя — ValueError"""
+    if raw is None:
+        return None
+    names = list(dict.fromkeys(part.strip() for part in raw.split(',') if part.strip()))
+    if not names:
+        raise ValueError(f'{param} must not be empty')
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise ValueError(f'Unknown {param}: {", ".join(unknown)}. '
+                         f'Allowed: {", ".join(allowed)}')
+    return names
+
+
+class Fieldset:
+    """
+    Поля представления модели. Геттер получает строку ``values()`` и
+    контекст (``context()``): ``now``, ``status`` (функция status_id -> Status)
+    и ``datetime`` (форматирование дат как в DRF).
+    """
+
+    def __init__(self, fields, required_columns=('id',)):
+        self.fields = fields
+        self.names = list(fields)
+        self.required_columns = required_columns
+        self._compiled = {}
+
+    def parse(self, raw):
+        names = parse_names(raw, self.fields, 'fields')
+        return self.names if names is None else names
+
+    def columns(self, names):
+        columns = dict.fromkeys(self.required_columns)
+        for name in names:
+            columns.update(dict.fromkeys(self.fields[name].columns))
+        return list(columns)
+
+    def compile(self, names):
+        """Функция (row, context) -> dict для набора полей; собирается один раз"""
+        key = tuple(names)
+        render = self._compiled.get(key)
+        if render is None:
+            getters = [(name, self.fields[name].getter) for name in names]
+
+            def render(row, context):
+                return {name: getter(row, context) for name, getter in getters}
+            self._compiled[key] = render
+        return render
+
+    def render(self, row, names, context):
+        return self.compile(names)(row, context)
+
+
+def _column(name):
+    return Field((name,), lambda row, ctx: row[name])
+
+
+# Элемент api_task_list: статус — строкой, дата — объектом (isoformat делает энкодер, tasks.rendering)
+TASK_LIST = Fieldset({
+    'id': _column('id'),
+    'title': _column('title'),
+    'description': _column('description'),
+    'status': Field(('status_id',), lambda row, ctx: ctx['status'](row['status_id']).name),
+    'deadline': _column('deadline'),
+    'is_overdue': _column('is_overdue'),
+    'subtask_total': _column('subtask_total'),
+    'subtask_done': _column('subtask_done'),
+    'next_subtask_deadline': _column('next_subtask_deadline'),
+}, required_columns=('id', 'deadline'))  # ключ keyset-курсора
+
+# Задача в api_task_detail и вложенная задача подзадачи (как TaskSerializer)
+TASK = Fieldset({
+    'id': _column('id'),
+    'title': _column('title'),
+    'description': _column('description'),
+    'status': Field(('status_id',), lambda row, ctx: _status(ctx['status'](row['status_id']))),
+    'deadline': Field(('deadline',), lambda row, ctx: ctx['datetime'](row['deadline'])),
+    'subtask_total': _column('subtask_total'),
+    'subtask_done': _column('subtask_done'),
+    'next_subtask_deadline': Field(('next_subtask_deadline',),
+                                   lambda row, ctx: ctx['datetime'](row['next_subtask_deadline'])),
+})
+
+# Подзадача в api_task_subtasks и в expand=subtasks (как SubTaskDetailSerializer)
+SUBTASK = Fieldset({
+    'id': _column('id'),
+    'title': _column('title'),
+    'description': _column('description'),
+    'status': Field(('status_id',), lambda row, ctx: _status(ctx['status'](row['status_id']))),
+    'deadline': Field(('deadline',), lambda row, ctx: ctx['datetime'](row['deadline'])),
+    'created_at': Field(('created_at',), lambda row, ctx: ctx['datetime'](row['created_at'])),
+})
+
+TASK_EXPAND = ('subtasks',)
+SUBTASK_EXPAND = ('task',)
+
+
+def _parse(request, fieldset, allowed_expand, default_expand):
+    names = fieldset.parse(request.GET.get('fields'))
+    expand = parse_names(request.GET.get('expand'), allowed_expand, 'expand')
+    if expand is None:
+        # Без параметров — прежний полный ответ со связью; с fields — только по expand
+        expand = default_expand if 'fields' not in request.GET else []
+    return names, expand
+
+
+def task_detail_query(request, task_id):
+    """
+    Запросы api_task_detail: (queryset задачи, queryset подзадач или None,
+    names, expand). Бросает ValueError на неизвестные fields/expand.
+    """
+    names, expand = _parse(request, TASK, TASK_EXPAND, ['subtasks'])
+    task = Task.objects.filter(id=task_id).values(*TASK.columns(names))
+    subtasks = None
+    if 'subtasks' in expand:
+        # Порядок как у task.subtasks.all() в сериализаторе
+        subtasks = SubTask.objects.filter(task_id=task_id).values(*SUBTASK.columns(SUBTASK.names))
+    return task, subtasks, names, expand
+
+
+def render_task_detail(task, subtasks, names, context):
+    data = TASK.render(task, names, context)
+    if subtasks is not None:
+        render = SUBTASK.compile(SUBTASK.names)
+        data['subtasks'] = [render(subtask, context) for subtask in subtasks]
+    return data
+
+
+def subtasks_query(request, task_id):
+    """
+    Запросы api_task_subtasks: (queryset подзадач, queryset задачи —
+    для expand=task, иначе только для проверки существования, names, expand).
+    """
+    names, expand = _parse(request, SUBTASK, SUBTASK_EXPAND, ['task'])
+    subtasks = SubTask.objects.filter(task_id=task_id).values(*SUBTASK.columns(names))
+    task_columns = TASK.columns(TASK.names) if 'task' in expand else ['id']
+    return subtasks, Task.objects.filter(id=task_id).values(*task_columns), names, expand
+
+
+def render_subtasks(subtasks, task, names, expand, context):
+    """Все подзадачи одной задачи: вложенная задача одна и сериализуется один раз"""
+    render = SUBTASK.compile(names)
+    if 'task' not in expand:
+        return [render(subtask, context) for subtask in subtasks]
+    parent = TASK.render(task, TASK.names, context)
+    result = []
+    for subtask in subtasks:
+        data = render(subtask, context)
+        data['task'] = parent
+        if 'created_at' in data:
+            # Порядок ключей как в SubTaskDetailSerializer: task перед created_at
+            data['created_at'] = data.pop('created_at')
+        result.append(data)
+    return result
@@ -0,0 +1,170 @@
+"""
+Кэш готовых ответов JSON-эндпоинтов чтения с ETag / If-None-Match.
+
+Каждый ответ зависит от набора ключей версий (список задач, конкретная
+задача, справочник статусов). Любая запись в Task/SubTask меняет
+соответствующие версии (см. tasks.signals), поэтому старые записи кэша
+просто перестают находиться — явно удалять ничего не нужно. Повторное
+чтение без изменений не трогает ни ORM, ни сериализаторы, а при совпадении
+If-None-Match отдаёт 304 без тела.
+
+Бэкенд — алиас ``TASKS_RESPONSE_CACHE`` из settings.CACHES (по умолчанию
+'default', т.е. locmem).
+"""
+import asyncio
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+from . import metrics
+from .status_cache import VERSION_KEY as STATUS_VERSION_KEY
+
+KEY_PREFIX = 'tasks:http'
+LIST_VERSION_KEY = 'tasks:ver:list'
+
+
+def task_version_key(task_id):
+    return f'tasks:ver:task:{task_id}'
+
+
+def _cache():
+    return caches[getattr(settings, 'TASKS_RESPONSE_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'TASKS_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def _set_versions(keys):
+    _cache().set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def bump(keys):
+    """
+    Новые версии для ``keys``: сразу (для текущей транзакции) и после
+    коммита — иначе параллельный запрос мог бы закэшировать старые данные
+    под уже новой версией.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    _set_versions(keys)
+    transaction.on_commit(lambda: _set_versions(keys))
+
+
+def bump_tasks(task_ids, list_changed=True):
+    keys = [task_version_key(task_id) for task_id in set(task_ids)]
+    if list_changed:
+        keys.append(LIST_VERSION_KEY)
+    bump(keys)
+
+
+def get_versions(keys):
+    cache = _cache()
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Ключ ещё не создан или вытеснен — заводим новую уникальную версию
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def _not_modified(etag):
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _lookup(view, request, keys):
+    """(ключ записи, запись или None) для запроса к ``view``"""
+    keys = list(keys) + [STATUS_VERSION_KEY]
+    fingerprint = '\n'.join([view.__module__, view.__qualname__,
+                             request.get_full_path()] + get_versions(keys))
+    entry_key = f'{KEY_PREFIX}:{hashlib.sha1(fingerprint.encode()).hexdigest()}'
+
+    entry = _cache().get(entry_key)
+    metrics.cache_lookup('response', entry is not None)
+    return entry_key, entry
+
+
+def _store(entry_key, response):
+    """Сохранить ответ; None — ответ не кэшируется"""
+    if response.status_code != 200 or response.streaming:
+        return None
+    body = response.content
+    entry = {
+        'body': body,
+        'content_type': response['Content-Type'],
+        'etag': '"%s"' % hashlib.sha1(body).hexdigest(),
+    }
+    _cache().set(entry_key, entry, _timeout())
+    return entry
+
+
+def _respond(request, entry):
+    if _etag_matches(request, entry['etag']):
+        return _not_modified(entry['etag'])
+    response = HttpResponse(entry['body'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def cached_response(version_keys):
+    """
+    Декоратор GET-вью. ``version_keys(request, **kwargs)`` возвращает ключи
+    версий, от которых зависит ответ.
+    Кэшируются только обычные (не потоковые) ответы со статусом 200.
+    Поддерживает и async-вью: обращения к кэшу тогда идут через sync_to_async.
+    """
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                entry_key, entry = await sync_to_async(_lookup)(
+                    view, request, version_keys(request, **kwargs))
+                if entry is None:
+                    response = await view(request, *args, **kwargs)
+                    entry = await sync_to_async(_store)(entry_key, response)
+                    if entry is None:
+                        return response
+                return _respond(request, entry)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            entry_key, entry = _lookup(view, request, version_keys(request, **kwargs))
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                entry = _store(entry_key, response)
+                if entry is None:
+                    return response
+            return _respond(request, entry)
+        return wrapper
+    return decorator
+
+
+def task_list_keys(request):
+    return [LIST_VERSION_KEY]
+
+
+def task_keys(request, task_id):
+    return [task_version_key(task_id)]
@@ -0,0 +1,168 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tasks import bulk
+from tasks.models import ImportCheckpoint, SubTask, Task
+from tasks.status_cache import status_cache
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Импорт задач с вложенными подзадачами из NDJSON-файла '
+            '(по одной задаче на строку) с докачкой после сбоя')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON-файл: {"title", "description", "status", '
+                                         '"deadline", "subtasks": [...]} на строку')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Строк в одной транзакции (по умолчанию 1000)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Размер пачки bulk_create (по умолчанию 500)')
+        parser.add_argument('--default-status', default='To Do',
+                            help='Статус для записей без status (по умолчанию "To Do")')
+        parser.add_argument('--restart', action='store_true',
+                            help='Начать с начала файла, игнорируя сохранённую позицию')
+        parser.add_argument('--strict', action='store_true',
+                            help='Остановиться на первой некорректной строке вместо пропуска')
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        if options['chunk_size'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--chunk-size и --batch-size должны быть положительными')
+
+        self.default_status = options['default_status']
+        self.strict = options['strict']
+        self.batch_size = options['batch_size']
+
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=path)
+        if options['restart']:
+            checkpoint.line = checkpoint.offset = 0
+            checkpoint.save()
+        elif checkpoint.line:
+            self.stdout.write(f'Продолжаем со строки {checkpoint.line + 1}')
+
+        self.totals = {'tasks': 0, 'subtasks': 0, 'skipped': 0}
+        started = time.monotonic()
+        line_no, offset = checkpoint.line, checkpoint.offset
+        chunk = []
+
+        # Бинарный режим: позиция в байтах нужна, чтобы при докачке сделать seek,
+        # а не перечитывать уже загруженные строки
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                line_no += 1
+                offset += len(raw)
+                if raw.strip():
+                    chunk.append((line_no, raw))
+                if len(chunk) >= options['chunk_size']:
+                    self.commit_chunk(checkpoint, chunk, line_no, offset, started)
+                    chunk = []
+            if chunk or line_no != checkpoint.line:
+                self.commit_chunk(checkpoint, chunk, line_no, offset, started)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Импорт завершён: задач {self.totals['tasks']}, подзадач {self.totals['subtasks']}, "
+            f"пропущено строк {self.totals['skipped']} за {elapsed:.1f} с"
+        ))
+
+    def commit_chunk(self, checkpoint, chunk, line_no, offset, started):
+        """Одна транзакция: задачи, подзадачи и новая позиция в файле"""
+        tasks, subtasks_per_task = [], []
+        for record_line, raw in chunk:
+            try:
+                task, subtasks = self.parse(raw)
+            except InvalidRecord as e:
+                if self.strict:
+                    raise CommandError(f'Строка {record_line}: {e}')
+                self.totals['skipped'] += 1
+                self.stderr.write(f'Строка {record_line} пропущена: {e}')
+                continue
+            tasks.append(task)
+            subtasks_per_task.append(subtasks)
+
+        with transaction.atomic():
+            tasks = bulk.create(Task, tasks, batch_size=self.batch_size)
+            # bulk_create вернул pk, поэтому родителя подзадачи связываем без запросов
+            subtasks = []
+            for task, task_subtasks in zip(tasks, subtasks_per_task):
+                for subtask in task_subtasks:
+                    subtask.task = task
+                    subtasks.append(subtask)
+            bulk.create(SubTask, subtasks, batch_size=self.batch_size)
+
+            checkpoint.line, checkpoint.offset = line_no, offset
+            checkpoint.save(update_fields=['line', 'offset', 'updated_at'])
+
+        self.totals['tasks'] += len(tasks)
+        self.totals['subtasks'] += len(subtasks)
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            f"строка {line_no}: задач {self.totals['tasks']}, подзадач {self.totals['subtasks']}, "
+            f"{(self.totals['tasks'] + self.totals['subtasks']) / elapsed:.0f} записей/с"
+        )
+
+    def parse(self, raw):
+        try:
+            record = json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            raise InvalidRecord(f'некорректный JSON ({e})')
+
+        task = Task(**self.common_fields(record))
+        subtasks = record.get('subtasks') or []
+        if not isinstance(subtasks, list):
+            raise InvalidRecord('subtasks должен быть массивом')
+        return task, [SubTask(**self.common_fields(item)) for item in subtasks]
+
+    def common_fields(self, record):
+        if not isinstance(record, dict):
+            raise InvalidRecord('ожидается JSON-объект')
+        title = record.get('title')
+        if not isinstance(title, str) or not title.strip():
+            raise InvalidRecord('нет title')
+        if len(title) > 200:
+            raise InvalidRecord('title длиннее 200 символов')
+
+        deadline = record.get('deadline')
+        try:
+            deadline = parse_datetime(deadline) if isinstance(deadline, str) else None
+        except ValueError:
+            deadline = None
+        if deadline is None:
+            raise InvalidRecord('нет или некорректный deadline')
+        if timezone.is_naive(deadline):
+            deadline = timezone.make_aware(deadline)
+
+        status_name = record.get('status')
+        if status_name is None or status_name == '':
+            status_name = self.default_status
+        if not isinstance(status_name, str):
+            raise InvalidRecord('status должен быть строкой')
+        status = status_cache.find(status_name)
+        if status is None:
+            raise InvalidRecord(f'неизвестный статус "{status_name}"')
+
+        description = record.get('description')
+        if description is None:
+            description = ''
+        if not isinstance(description, str):
+            raise InvalidRecord('description должен быть строкой')
+
+        return {
+            'title': title,
+            'description': description,
+            'status': status,
+            'deadline': deadline,
+        }
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks import rollup
+from tasks.http_cache import bump_tasks
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = ('Сверяет и пересчитывает сводку по подзадачам в задачах '
+            '(subtask_total, subtask_done, next_subtask_deadline) пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Задач в одной пачке (своя транзакция)')
+        parser.add_argument('--check', action='store_true',
+                            help='Только показать расхождения, ничего не записывая')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            # Пачки по pk (keyset), а не OFFSET: каждая — поиск по первичному ключу
+            pks = list(Task.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                drift = rollup.drift(Task.objects.filter(pk__in=pks))
+                for pk, diff in drift:
+                    self.stdout.write(f'task {pk}: ' + ', '.join(
+                        f'{name} {current} -> {expected}' for name, (current, expected) in diff.items()))
+                if drift and not options['check']:
+                    task_ids = [pk for pk, _ in drift]
+                    rollup.refresh(task_ids)
+                    bump_tasks(task_ids)
+            checked += len(pks)
+            fixed += len(drift)
+
+        if options['check']:
+            self.stdout.write(f'Проверено задач: {checked}, расхождений: {fixed}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Проверено задач: {checked}, исправлено: {fixed}'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс (FTS5) задач и подзадач'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Индекс tasks_search недоступен (нужен SQLite с FTS5 и миграции tasks)')
+        with transaction.atomic():
+            count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✅ Индекс пересобран: {count} записей'))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tasks import counters
+from tasks.models import StatCounter, Status
+from tasks.stats import table_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики статистики (StatCounter) по данным таблиц Task/SubTask'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только показать расхождения, ничего не записывая')
+
+    def handle(self, *args, **options):
+        drift = 0
+        with transaction.atomic():
+            statuses = list(Status.objects.order_by('id'))
+            stored = counters.read_all()
+            for model, scope in counters.SCOPES.items():
+                # Полный пересчёт одним агрегирующим запросом на таблицу
+                actual = table_stats(model, statuses, timezone.now())
+                expected = {
+                    counters.TOTAL: actual['total'],
+                    counters.WITHOUT_DESCRIPTION: actual['without_description'],
+                }
+                for status in statuses:
+                    expected[counters.status_key(status.id)] = actual['by_status'][status.name]
+
+                current = stored.get(scope, {})
+                for key in sorted(set(expected) | set(current)):
+                    if expected.get(key, 0) != current.get(key, 0):
+                        drift += 1
+                        self.stdout.write(
+                            f'{scope}.{key}: {current.get(key, 0)} -> {expected.get(key, 0)}'
+                        )
+
+                if not options['check']:
+                    StatCounter.objects.filter(scope=scope).delete()
+                    StatCounter.objects.bulk_create([
+                        StatCounter(scope=scope, key=key, value=value)
+                        for key, value in expected.items()
+                    ])
+
+        if options['check']:
+            self.stdout.write(f'Расхождений: {drift}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Счётчики пересчитаны, исправлено: {drift}'))
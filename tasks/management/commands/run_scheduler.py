@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from tasks.scheduler import scheduler
+
+
+class Command(BaseCommand):
+    help = ('Планировщик просрочки: отмечает задачи и подзадачи с наступившим дедлайном '
+            '(is_overdue) и рассылает событие became_overdue. Для TASKS_OVERDUE_SCHEDULER = "off"')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Один проход: отметить всё, что уже наступило, и выйти')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            flipped = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f'✅ Отмечено просроченными: {flipped}'))
+            return
+        self.stdout.write('Планировщик просрочки запущен (Ctrl+C — остановка)')
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'✅ Отмечено просроченными: {scheduler.flipped}'))
@@ -0,0 +1,195 @@
+import math
+import random
+import re
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tasks import bulk, rollup, signals
+from tasks.models import SubTask, Task
+from tasks.status_cache import status_cache
+
+VERBS = ['Подготовить', 'Проверить', 'Согласовать', 'Обновить', 'Исправить', 'Настроить',
+         'Описать', 'Протестировать', 'Обсудить', 'Отправить', 'Собрать', 'Запланировать']
+OBJECTS = ['отчёт', 'релиз', 'презентацию', 'договор', 'макет', 'документацию', 'сервер',
+           'бюджет', 'интеграцию', 'миграцию', 'счёт', 'демо', 'план работ', 'резервную копию']
+PROJECTS = ['Альфа', 'Бета', 'Гамма', 'Дельта', 'Омега', 'Сириус', 'Вега', 'Орион']
+SENTENCES = [
+    'Нужно уточнить требования у заказчика.',
+    'Черновик лежит в общей папке.',
+    'Срок согласован с руководителем.',
+    'Зависит от предыдущей задачи.',
+    'После выполнения сообщить в чат команды.',
+    'Проверить на тестовом окружении.',
+    'Приложить ссылки на материалы.',
+    'Оценка — полдня работы.',
+]
+
+# Статус по весам: у просроченных задач выше доля выполненных
+STATUS_WEIGHTS = {
+    'overdue': {'To Do': 30, 'In Progress': 30, 'Done': 40},
+    'upcoming': {'To Do': 50, 'In Progress': 35, 'Done': 15},
+}
+EMPTY_DESCRIPTION_RATIO = 0.25
+
+TASK_FIELDS = ('title', 'description', 'status_id', 'deadline', 'is_overdue')
+SUBTASK_FIELDS = ('title', 'description', 'status_id', 'deadline', 'is_overdue', 'task_id')
+
+
+def parse_distribution(spec):
+    """
+    Распределение числа подзадач на задачу: fixed:N, uniform:A-B или
+    poisson:СРЕДНЕЕ. Возвращает функцию rng -> int.
+    """
+    kind, _, value = spec.partition(':')
+    try:
+        if kind == 'fixed':
+            count = int(value)
+            if count >= 0:
+                return lambda rng: count
+        elif kind == 'uniform':
+            low, high = map(int, re.fullmatch(r'(\d+)-(\d+)', value).groups())
+            if low <= high:
+                return lambda rng: rng.randint(low, high)
+        elif kind == 'poisson':
+            mean = float(value)
+            if 0 <= mean <= 500:
+                limit = math.exp(-mean)
+
+                def poisson(rng):
+                    # Алгоритм Кнута: для небольших средних быстрее и проще обращения CDF
+                    count, product = 0, rng.random()
+                    while product > limit:
+                        count += 1
+                        product *= rng.random()
+                    return count
+                return poisson
+    except (ValueError, AttributeError):
+        pass
+    raise CommandError(f'Некорректное распределение "{spec}": ожидается fixed:N, uniform:A-B или poisson:M')
+
+
+class Command(BaseCommand):
+    help = ('Генерирует детерминированный набор задач и подзадач заданного размера '
+            '(для нагрузочных тестов и бенчмарков)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='Число задач (по умолчанию 10000)')
+        parser.add_argument('--subtasks-per-task', default='poisson:2',
+                            help='Распределение числа подзадач: fixed:N, uniform:A-B, '
+                                 'poisson:M (по умолчанию poisson:2)')
+        parser.add_argument('--overdue-ratio', type=float, default=0.1,
+                            help='Доля задач с прошедшим дедлайном (по умолчанию 0.1)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Зерно генератора: одинаковые параметры дают одинаковые данные')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Задач в одной транзакции (по умолчанию 5000)')
+        parser.add_argument('--now', help='Момент отсчёта дедлайнов, ISO 8601 (по умолчанию — сейчас)')
+
+    def handle(self, *args, **options):
+        if options['tasks'] < 0 or options['batch_size'] < 1:
+            raise CommandError('--tasks не может быть отрицательным, --batch-size должен быть положительным')
+        if not 0 <= options['overdue_ratio'] <= 1:
+            raise CommandError('--overdue-ratio должен быть от 0 до 1')
+        subtasks_per_task = parse_distribution(options['subtasks_per_task'])
+        now = self.checked_at = timezone.now()
+        if options['now']:
+            now = parse_datetime(options['now'])
+            if now is None:
+                raise CommandError(f'Некорректная дата --now: {options["now"]}')
+            if timezone.is_naive(now):
+                now = timezone.make_aware(now)
+
+        self.rng = random.Random(options['seed'])
+        self.now = now
+        self.overdue_ratio = options['overdue_ratio']
+        self.statuses = {name: status_cache.get_or_create(name)
+                         for name in ('To Do', 'In Progress', 'Done')}
+        self.weights = {
+            kind: ([self.statuses[name].id for name in weights], list(accumulate(weights.values())))
+            for kind, weights in STATUS_WEIGHTS.items()
+        }
+
+        self.totals = {'tasks': 0, 'subtasks': 0}
+        self.started = time.monotonic()
+        # Сводку по подзадачам считаем один раз в конце, по построенным индексам
+        if Task.objects.exists() or SubTask.objects.exists():
+            with rollup.deferred():
+                self.load(options['tasks'], options['batch_size'], subtasks_per_task)
+                self.stdout.write('Сводка по подзадачам...')
+        else:
+            # Пустая база: индексы и поиск строим один раз по готовым таблицам
+            with signals.initial_load():
+                with rollup.deferred():
+                    with bulk.deferred_indexes(Task, SubTask):
+                        self.load(options['tasks'], options['batch_size'], subtasks_per_task)
+                        self.stdout.write('Построение индексов...')
+                    self.stdout.write('Сводка по подзадачам...')
+                self.stdout.write('Поисковый индекс...')
+
+        totals = self.totals
+        elapsed = time.monotonic() - self.started
+        rows = totals['tasks'] + totals['subtasks']
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Создано задач: {totals["tasks"]}, подзадач: {totals["subtasks"]} '
+            f'за {elapsed:.1f} с ({rows / elapsed if elapsed else 0:,.0f} строк/с)'))
+
+    def load(self, count, batch_size, subtasks_per_task):
+        totals = self.totals
+        while count:
+            size = min(batch_size, count)
+            # В памяти только текущая пачка
+            with transaction.atomic():
+                tasks = bulk.insert_rows(Task, TASK_FIELDS, [self.task() for _ in range(size)])
+                subtasks = bulk.insert_rows(SubTask, SUBTASK_FIELDS, [
+                    self.subtask(task) for task in tasks for _ in range(subtasks_per_task(self.rng))
+                ])
+            count -= size
+            totals['tasks'] += len(tasks)
+            totals['subtasks'] += len(subtasks)
+            elapsed = time.monotonic() - self.started
+            self.stdout.write(f'{totals["tasks"]} задач, {totals["subtasks"]} подзадач, '
+                              f'{(totals["tasks"] + totals["subtasks"]) / elapsed:,.0f} строк/с')
+
+    def description(self):
+        rng = self.rng
+        if rng.random() < EMPTY_DESCRIPTION_RATIO:
+            return ''
+        return ' '.join(rng.choices(SENTENCES, k=rng.randint(1, 4)))
+
+    def task(self):
+        rng = self.rng
+        if rng.random() < self.overdue_ratio:
+            kind, deadline = 'overdue', self.now - timedelta(seconds=rng.randint(60, 90 * 86400))
+        else:
+            kind, deadline = 'upcoming', self.now + timedelta(seconds=rng.randint(3600, 180 * 86400))
+        statuses, cum_weights = self.weights[kind]
+        return (f'{rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(PROJECTS)}',
+                self.description(),
+                rng.choices(statuses, cum_weights=cum_weights)[0],
+                deadline,
+                # Флаг по реальному времени (--now может быть в прошлом), без событий просрочки
+                deadline <= self.checked_at)
+
+    def subtask(self, task):
+        """Строка подзадачи; ``task`` — строка задачи из bulk.insert_rows"""
+        rng = self.rng
+        done_id = self.statuses['Done'].id
+        if task.status_id == done_id:
+            status_id = done_id
+        else:
+            statuses, cum_weights = self.weights['upcoming']
+            status_id = rng.choices(statuses, cum_weights=cum_weights)[0]
+        # Подзадача заканчивается не позже задачи
+        deadline = task.deadline - timedelta(seconds=rng.randint(0, 7 * 86400))
+        return (f'{rng.choice(VERBS)} {rng.choice(OBJECTS)}',
+                self.description(),
+                status_id,
+                deadline,
+                deadline <= self.checked_at,
+                task.pk)
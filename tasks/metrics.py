@@ -0,0 +1,319 @@
+"""
+Метрики эндпоинтов в формате Prometheus (``GET /metrics``).
+
+``MetricsMiddleware`` на каждый запрос записывает:
+
+* ``tasks_http_requests_total{view, method, status}`` — счётчик ответов;
+* ``tasks_http_request_duration_seconds{view}`` — гистограмма времени ответа;
+* ``tasks_http_request_db_seconds{view}`` — гистограмма времени SQL за запрос
+  (из tasks.query_budget) и ``tasks_http_request_db_queries_total{view}``;
+
+а кэши — ``tasks_cache_requests_total{cache, result}`` (response — кэш
+ответов http_cache, status — справочник status_cache, calendar — дни
+tasks.deadline_calendar) и вычисляемый при
+выдаче ``tasks_cache_hit_ratio{cache}``. ``view`` — имя URL, так что число
+рядов ограничено числом маршрутов. ``tasks_overdue_transitions_total{model}``
+считает строки, ставшие просроченными (tasks.scheduler).
+
+Запись без блокировок: каждый поток пишет в свой буфер, итог процесса
+собирается из буферов только при выдаче и при сбросе в файл. Буферы
+завершившихся потоков (поток на запрос у runserver и threaded WSGI)
+вливаются в общий итог процесса и удаляются — их число не растёт с числом
+запросов.
+
+Несколько процессов (gunicorn/uwsgi): при заданном ``TASKS_METRICS_DIR``
+каждый процесс не реже чем раз в ``TASKS_METRICS_FLUSH_INTERVAL`` секунд
+атомарно перезаписывает свой файл ``<pid>-<start>.json`` в этом каталоге,
+а ``/metrics`` суммирует файлы всех процессов (свой — свежим снимком).
+Файлы завершившихся процессов остаются, чтобы счётчики не убывали;
+каталог очищают при деплое. Без ``TASKS_METRICS_DIR`` метрики только
+процессные.
+"""
+import glob
+import json
+import os
+import threading
+import time
+import weakref
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+# Границы корзин гистограмм, секунды
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HELP = {
+    'tasks_http_requests_total': ('counter', 'HTTP responses by view, method and status code'),
+    'tasks_http_request_duration_seconds': ('histogram', 'Request latency by view'),
+    'tasks_http_request_db_seconds': ('histogram', 'Total SQL time per request by view'),
+    'tasks_http_request_db_queries_total': ('counter', 'SQL queries by view'),
+    'tasks_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit/miss)'),
+    'tasks_cache_hit_ratio': ('gauge', 'Cache hits / lookups since start'),
+    'tasks_overdue_transitions_total': ('counter', 'Rows that became overdue, by model'),
+}
+
+
+class _Buffer:
+    """Метрики одного потока: {(имя, метки): значение} и {(имя, метки): [корзины..., sum, count]}"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._name = f'{self._pid}-{int(time.time() * 1000)}'
+        self._local = threading.local()
+        self._buffers = []  # [(weakref на поток, его _Buffer)]
+        self._retired = _Buffer()  # итог потоков, которые уже завершились
+        self._flushed_at = time.monotonic()
+
+    def _buffer(self):
+        if os.getpid() != self._pid:
+            # Процесс после fork: счётчики родителя не наши
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._reset()
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = _Buffer()
+            with self._lock:
+                self._retire_dead()
+                self._buffers.append((weakref.ref(threading.current_thread()), buffer))
+        return buffer
+
+    def _retire_dead(self):
+        """Влить буферы завершившихся потоков в _retired (под self._lock)"""
+        alive = []
+        for thread_ref, buffer in self._buffers:
+            thread = thread_ref()
+            if thread is not None and thread.is_alive():
+                alive.append((thread_ref, buffer))
+                continue
+            # Поток завершён — в буфер больше никто не пишет
+            _merge(self._retired, buffer)
+        self._buffers = alive
+
+    def inc(self, name, labels, value=1):
+        counters = self._buffer().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        histograms = self._buffer().histograms
+        key = (name, labels)
+        series = histograms.get(key)
+        if series is None:
+            series = histograms[key] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    def snapshot(self):
+        """Итог процесса: {'counters': {...}, 'histograms': {...}} с ключами (имя, метки)"""
+        with self._lock:
+            self._retire_dead()
+            total = _merge(_Buffer(), self._retired)
+            buffers = [buffer for _, buffer in self._buffers]
+        for buffer in buffers:
+            # dict.copy() атомарен под GIL, даже если поток-владелец пишет
+            _merge(total, buffer)
+        return {'counters': total.counters, 'histograms': total.histograms}
+
+    def clear(self):
+        """Сбросить метрики процесса (для тестов)"""
+        with self._lock:
+            self._reset()
+
+    # --- несколько процессов ---
+
+    def _path(self):
+        return os.path.join(settings.TASKS_METRICS_DIR, f'{self._name}.json')
+
+    def maybe_flush(self):
+        """Сбросить снимок в файл, если прошло TASKS_METRICS_FLUSH_INTERVAL секунд"""
+        if not getattr(settings, 'TASKS_METRICS_DIR', None):
+            return
+        interval = getattr(settings, 'TASKS_METRICS_FLUSH_INTERVAL', 5)
+        if time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def flush(self):
+        if not self._flush_lock.acquire(blocking=False):
+            return  # сбрасывает другой поток
+        try:
+            self._flushed_at = time.monotonic()
+            path = self._path()
+            snapshot = self.snapshot()
+            data = {
+                'counters': [[name, labels, value]
+                             for (name, labels), value in snapshot['counters'].items()],
+                'histograms': [[name, labels, series]
+                               for (name, labels), series in snapshot['histograms'].items()],
+            }
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(data, f)
+            os.replace(f'{path}.tmp', path)
+        finally:
+            self._flush_lock.release()
+
+    def collect(self):
+        """Итог по всем процессам (или только по текущему без TASKS_METRICS_DIR)"""
+        total = self.snapshot()
+        directory = getattr(settings, 'TASKS_METRICS_DIR', None)
+        if not directory:
+            return total
+        own = self._path()
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            if path == own:
+                continue
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue  # файл удалён или повреждён
+            for name, labels, value in data['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                total['counters'][key] = total['counters'].get(key, 0) + value
+            for name, labels, series in data['histograms']:
+                _add_series(total['histograms'], (name, tuple(map(tuple, labels))), series)
+        return total
+
+
+def _add_series(histograms, key, series):
+    current = histograms.get(key)
+    if current is None:
+        histograms[key] = list(series)
+    else:
+        for i, value in enumerate(series):
+            current[i] += value
+
+
+def _merge(target, buffer):
+    """Прибавить _Buffer ``buffer`` к ``target``; возвращает ``target``"""
+    for key, value in buffer.counters.copy().items():
+        target.counters[key] = target.counters.get(key, 0) + value
+    for key, series in buffer.histograms.copy().items():
+        _add_series(target.histograms, key, series)
+    return target
+
+
+registry = Registry()
+
+
+def cache_lookup(cache, hit, count=1):
+    registry.inc('tasks_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')), count)
+
+
+# --- выдача ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _hit_ratios(counters):
+    lookups = {}
+    for (name, labels), value in counters.items():
+        if name == 'tasks_cache_requests_total':
+            labels = dict(labels)
+            hits, total = lookups.get(labels['cache'], (0, 0))
+            lookups[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    return {(('cache', cache),): hits / total for cache, (hits, total) in lookups.items() if total}
+
+
+def render(data):
+    """Текстовый формат Prometheus 0.0.4"""
+    series = {}
+    for (name, labels), value in data['counters'].items():
+        series.setdefault(name, []).append((labels, value))
+    for labels, value in _hit_ratios(data['counters']).items():
+        series.setdefault('tasks_cache_hit_ratio', []).append((labels, value))
+    for (name, labels), value in data['histograms'].items():
+        series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(series):
+        kind, help_text = HELP[name]
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series[name]):
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {value[-1]}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """GET /metrics"""
+    return HttpResponse(render(registry.collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# --- запись ---
+
+class MetricsMiddleware:
+    """Ставится первым в MIDDLEWARE, до QueryBudgetMiddleware (он даёт request.query_stats)"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, duration):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name or match.view_name) if match else 'unmatched'
+        registry.inc('tasks_http_requests_total', (('view', view), ('method', request.method),
+                                                   ('status', str(response.status_code))))
+        labels = (('view', view),)
+        registry.observe('tasks_http_request_duration_seconds', labels, duration)
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            registry.observe('tasks_http_request_db_seconds', labels, stats.time)
+            registry.inc('tasks_http_request_db_queries_total', labels, stats.count)
+        registry.maybe_flush()
@@ -0,0 +1,49 @@
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_counters(apps, schema_editor):
+    """Начальное заполнение счётчиков по уже существующим данным"""
+    StatCounter = apps.get_model('tasks', 'StatCounter')
+    Status = apps.get_model('tasks', 'Status')
+    status_ids = list(Status.objects.values_list('id', flat=True))
+    for model_name, scope in (('Task', 'task'), ('SubTask', 'subtask')):
+        model = apps.get_model('tasks', model_name)
+        aggregates = {
+            'total': Count('id'),
+            'without_description': Count('id', filter=Q(description='')),
+        }
+        for status_id in status_ids:
+            aggregates[f'status:{status_id}'] = Count('id', filter=Q(status_id=status_id))
+        row = model.objects.aggregate(**aggregates)
+        StatCounter.objects.bulk_create([
+            StatCounter(scope=scope, key=key, value=value) for key, value in row.items()
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_deadline_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='statcounter',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='statcounter_scope_key_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['deadline'], name='subtask_deadline_idx'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+from django.db import migrations, OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    """FTS5-индекс для поиска (только SQLite, и только если FTS5 собран)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE tasks_search USING fts5("
+                "title, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        except OperationalError:
+            return
+        cursor.execute(
+            "INSERT INTO tasks_search (rowid, title, description) "
+            "SELECT id * 2, title, description FROM tasks_task"
+        )
+        cursor.execute(
+            "INSERT INTO tasks_search (rowid, title, description) "
+            "SELECT id * 2 + 1, title, description FROM tasks_subtask"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS tasks_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_overdue(apps, schema_editor):
+    """Флаг для уже прошедших дедлайнов, без событий: они наступили до появления флага"""
+    now = timezone.now()
+    for name in ('Task', 'SubTask'):
+        apps.get_model('tasks', name).objects.filter(deadline__lte=now).update(is_overdue=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='is_overdue',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='subtask',
+            name='is_overdue',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_overdue, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['is_overdue', 'deadline', 'id'], name='task_overdue_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subtask',
+            index=models.Index(fields=['is_overdue', 'deadline'], name='subtask_overdue_deadline_idx'),
+        ),
+    ]
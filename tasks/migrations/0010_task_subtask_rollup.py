@@ -0,0 +1,48 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_rollup(apps, schema_editor):
+    """Сводка по уже существующим подзадачам (как tasks.rollup.expressions)"""
+    Task = apps.get_model('tasks', 'Task')
+    SubTask = apps.get_model('tasks', 'SubTask')
+    done = apps.get_model('tasks', 'Status').objects.filter(name='Done').first()
+
+    def per_task(subtasks, aggregate):
+        return Subquery(subtasks.values('task_id').annotate(value=aggregate).values('value'))
+
+    subtasks = SubTask.objects.filter(task_id=OuterRef('pk')).order_by()
+    pending = None if done is None else ~Q(status_id=done.id)
+    Task.objects.filter(pk__in=SubTask.objects.values('task_id')).update(
+        subtask_total=Coalesce(per_task(subtasks, Count('id')), 0),
+        subtask_done=(Value(0) if done is None else
+                      Coalesce(per_task(subtasks, Count('id', filter=Q(status_id=done.id))), 0)),
+        next_subtask_deadline=per_task(subtasks, Min('deadline', filter=pending)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_is_overdue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='subtask_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_done',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='next_subtask_deadline',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_rollup, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,24 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+_deadline_field = models.DateTimeField()
+
+# Сводка по подзадачам в строке Task; пишет только tasks.rollup
+ROLLUP_FIELDS = ('subtask_total', 'subtask_done', 'next_subtask_deadline')
+
+
+def deadline_passed(deadline, now=None):
+    """Прошёл ли дедлайн (значение поля может быть ещё строкой из формы/JSON)"""
+    deadline = _deadline_field.to_python(deadline)
+    if deadline is None:
+        return False
+    now = now or timezone.now()
+    if timezone.is_naive(deadline) and timezone.is_aware(now):
+        deadline = timezone.make_aware(deadline)
+    return deadline <= now
 
 
 class Status(models.Model):
@@ -15,10 +33,41 @@ class Task(models.Model):
     description = models.TextField(blank=True)
     status = models.ForeignKey(Status, on_delete=models.CASCADE)
     deadline = models.DateTimeField()
+    # Дедлайн прошёл; ставит tasks.scheduler (и запись с прошедшим дедлайном)
+    is_overdue = models.BooleanField(default=False, editable=False)
+    # Сводка по подзадачам (tasks.rollup): всего, выполнено, ближайший дедлайн невыполненных
+    subtask_total = models.PositiveIntegerField(default=0, editable=False)
+    subtask_done = models.PositiveIntegerField(default=0, editable=False)
+    next_subtask_deadline = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset-пагинация api_task_list: ORDER BY deadline DESC, id DESC
+            models.Index(fields=['deadline', 'id'], name='task_deadline_id_idx'),
+            # ?overdue=true, счётчики просроченных и ожидающие планировщика (is_overdue=False)
+            models.Index(fields=['is_overdue', 'deadline', 'id'], name='task_overdue_deadline_idx'),
+            # api_task_list ?status=, status-transitions, admin list_filter
+            models.Index(fields=['status', 'deadline', 'id'], name='task_status_deadline_idx'),
+            models.Index(fields=['title'], name='task_title_idx'),
+            # Частичный индекс «без описания»: только пустые description
+            models.Index(fields=['deadline'], condition=Q(description=''),
+                         name='task_no_description_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        full_update = not (self._state.adding or args or kwargs.get('force_insert'))
+        if full_update and kwargs.get('update_fields') is None:
+            # Экземпляр, загруженный до записи подзадач, не должен затирать их сводку
+            skip = set(ROLLUP_FIELDS) | self.get_deferred_fields()
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.attname not in skip]
+        # Запись и обновление счётчиков статистики (post_save) — одна транзакция
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     # def clean(self):
     #     """Валидация данных перед сохранением"""
     #     if self.deadline and self.deadline < timezone.now():
@@ -47,10 +96,26 @@ class SubTask(models.Model):
     deadline = models.DateTimeField()
     task = models.ForeignKey(Task, related_name='subtasks', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)  # Добавим поле created_at
+    is_overdue = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deadline'], name='subtask_deadline_idx'),
+            models.Index(fields=['is_overdue', 'deadline'], name='subtask_overdue_deadline_idx'),
+            models.Index(fields=['status', 'deadline', 'id'], name='subtask_status_deadline_idx'),
+            models.Index(fields=['title'], name='subtask_title_idx'),
+            models.Index(fields=['deadline'], condition=Q(description=''),
+                         name='subtask_no_description_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Запись и обновление счётчиков статистики (post_save) — одна транзакция
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     # def clean(self):
     #     """Валидация данных перед сохранением"""
     #     if self.deadline and self.deadline < timezone.now():
@@ -69,4 +134,34 @@ class SubTask(models.Model):
             return f"{self.title[:10]}..."
         return self.title
 
-    short_title.short_description = "Title"
\ No newline at end of file
+    short_title.short_description = "Title"
+
+
+class StatCounter(models.Model):
+    """
+    Денормализованные счётчики для api_task_stats (см. tasks.counters).
+    scope — 'task' или 'subtask', key — 'total', 'without_description'
+    или 'status:<id>'.
+    """
+    scope = models.CharField(max_length=20)
+    key = models.CharField(max_length=50)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='statcounter_scope_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}.{self.key}={self.value}"
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция последней закоммиченной строки импорта (команда import_tasks)"""
+    source = models.CharField(max_length=500, unique=True)
+    line = models.BigIntegerField(default=0)
+    offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source}:{self.line}"
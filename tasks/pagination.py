@@ -0,0 +1,126 @@
+"""
+Keyset (cursor) пагинация для списков задач.
+
+Страница определяется не OFFSET'ом, а позицией последней строки по ключу
+(deadline, id), поэтому страница N стоит столько же, сколько первая: запрос
+всегда идёт по индексу ``task_deadline_id_idx`` начиная с курсора.
+Курсор для клиента непрозрачен — это base64 от JSON с ключом и направлением.
+
+``limit=None`` — без пагинации: весь queryset в том же порядке (списки без
+limit и cursor отдают всё, как до появления пагинации).
+"""
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+NEXT = 'n'
+PREV = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или сформирован не этим API."""
+
+
+def encode_cursor(deadline, pk, direction):
+    payload = json.dumps([deadline.isoformat(), pk, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Возвращает (deadline, id, direction) или бросает InvalidCursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        deadline_raw, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+        deadline = parse_datetime(deadline_raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if deadline is None or not isinstance(pk, int) or direction not in (NEXT, PREV):
+        raise InvalidCursor('Invalid cursor')
+    return deadline, pk, direction
+
+
+def parse_limit(raw, default=DEFAULT_PAGE_SIZE):
+    """Размер страницы из query-параметра ``limit`` (1..MAX_PAGE_SIZE); без него — ``default``."""
+    if raw in (None, ''):
+        return default
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _page_queryset(queryset, limit, cursor):
+    """(queryset страницы + одна лишняя строка, направление)"""
+    direction = NEXT
+    if cursor:
+        deadline, pk, direction = decode_cursor(cursor)
+        if direction == NEXT:
+            # Всё, что «ниже» курсора в порядке убывания
+            queryset = queryset.filter(Q(deadline__lt=deadline) | Q(deadline=deadline, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(deadline__gt=deadline) | Q(deadline=deadline, id__gt=pk))
+
+    if direction == NEXT:
+        queryset = queryset.order_by('-deadline', '-id')
+    else:
+        # Идём назад по индексу в прямом порядке, затем разворачиваем страницу
+        queryset = queryset.order_by('deadline', 'id')
+
+    if limit is None:
+        return queryset, direction
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+    return queryset[:limit + 1], direction
+
+
+def _key(row):
+    """(deadline, id) строки — объекта модели или словаря из values()"""
+    if isinstance(row, dict):
+        return row['deadline'], row['id']
+    return row.deadline, row.id
+
+
+def _page(rows, limit, direction, cursor):
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+    if direction == PREV:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = _key(rows[0]), _key(rows[-1])
+        if direction == NEXT:
+            if has_more:
+                next_cursor = encode_cursor(*last, NEXT)
+            if cursor:
+                prev_cursor = encode_cursor(*first, PREV)
+        else:
+            if has_more:
+                prev_cursor = encode_cursor(*first, PREV)
+            next_cursor = encode_cursor(*last, NEXT)
+    return rows, next_cursor, prev_cursor
+
+
+def paginate_by_deadline(queryset, limit, cursor=None):
+    """
+    Одна страница ``queryset`` в порядке ``-deadline, -id``.
+
+    Возвращает (rows, next_cursor, prev_cursor). Курсоры равны None, если в
+    соответствующую сторону записей больше нет.
+    """
+    queryset, direction = _page_queryset(queryset, limit, cursor)
+    return _page(list(queryset), limit, direction, cursor)
+
+
+async def apaginate_by_deadline(queryset, limit, cursor=None):
+    """Асинхронный вариант paginate_by_deadline (async ORM)"""
+    queryset, direction = _page_queryset(queryset, limit, cursor)
+    return _page([row async for row in queryset], limit, direction, cursor)
@@ -0,0 +1,190 @@
+"""
+Учёт SQL-запросов на запрос HTTP и бюджет запросов вью.
+
+``QueryBudgetMiddleware`` считает для каждого запроса число SQL-запросов,
+их суммарное время и «отпечатки» — текст запроса без значений, так что
+N+1 (один и тот же SELECT на каждую строку) виден как повторяющийся
+отпечаток. Результат — ``request.query_stats`` (QueryStats), при DEBUG ещё
+и заголовок ``Server-Timing``.
+
+Вью объявляет бюджет декоратором::
+
+    @query_budget(2)                # не больше 2 запросов, без повторов
+    @query_budget(5, duplicates=3)  # повторы одного запроса — не больше 3
+
+Превышение при ``TASKS_QUERY_BUDGET_RAISE`` (по умолчанию только тесты, в
+остальных случаях — явно, переменной окружения) бросает QueryBudgetExceeded, иначе пишет предупреждение в лог. Исключение
+только для безопасных методов (GET, HEAD, OPTIONS): проверка идёт после
+вью, и запись POST уже закоммичена — клиент не должен получить 500 за
+успешную запись. У записи превышение уходит в лог и, при
+TASKS_QUERY_BUDGET_RAISE, в заголовок ``Query-Budget-Exceeded``. Вью без
+бюджета не проверяются. Управление транзакцией (BEGIN, SAVEPOINT,
+RELEASE...) входит в число запросов, но повтором не считается. У потоковых ответов учитываются только запросы,
+сделанные до начала выдачи.
+
+Счётчик подключается к каждому соединению (connection_created), а активный
+QueryStats хранится в ContextVar — поэтому учёт работает и для async-вью,
+чьи запросы к БД выполняются в потоке sync_to_async.
+"""
+import logging
+import re
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('tasks_query_stats', default=None)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:(?:%s|\?)\s*,\s*)*(?:%s|\?)\s*\)')
+_TRANSACTION_CONTROL = re.compile(r'(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """SQL без значений: литералы и списки параметров IN (...) схлопываются"""
+    sql = _LITERALS.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+class QueryStats:
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.time += duration
+        self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """
+        {отпечаток: сколько раз выполнен} для запросов, выполненных больше
+        одного раза; без управления транзакцией (два atomic() — два BEGIN)
+        """
+        return {sql: n for sql, n in self.fingerprints.items()
+                if n > 1 and not _TRANSACTION_CONTROL.match(sql)}
+
+
+class Budget(namedtuple('Budget', 'queries duplicates')):
+
+    def violations(self, stats):
+        problems = []
+        if self.queries is not None and stats.count > self.queries:
+            problems.append(f'{stats.count} queries, budget {self.queries}')
+        if self.duplicates is not None:
+            problems.extend(f'{n}x {sql}' for sql, n in stats.duplicates.items()
+                            if n - 1 > self.duplicates)
+        return problems
+
+
+def query_budget(queries, duplicates=0):
+    """
+    Бюджет вью: не больше ``queries`` запросов (None — без ограничения) и не
+    больше ``duplicates`` повторов одного отпечатка (None — без ограничения).
+    """
+    def decorator(view):
+        view.query_budget = Budget(queries, duplicates)
+        return view
+    return decorator
+
+
+def _record(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_recorder(sender, connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+@contextmanager
+def recording():
+    """Считать запросы внутри блока (во всех соединениях текущего контекста)"""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with recording() as stats:
+            response = self.get_response(request)
+        return self._finish(request, response, stats)
+
+    async def __acall__(self, request):
+        with recording() as stats:
+            response = await self.get_response(request)
+        return self._finish(request, response, stats)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+    def _finish(self, request, response, stats):
+        request.query_stats = stats
+        if settings.DEBUG:
+            response['Server-Timing'] = f'db;dur={stats.time * 1000:.1f};desc="{stats.count} queries"'
+        budget = getattr(request, 'query_budget', None)
+        problems = budget.violations(stats) if budget is not None else []
+        if problems:
+            message = f'{request.method} {request.path}: ' + '; '.join(problems)
+            strict = getattr(settings, 'TASKS_QUERY_BUDGET_RAISE', False)
+            if strict and request.method in SAFE_METHODS:
+                raise QueryBudgetExceeded(message)
+            logger.warning('Query budget exceeded: %s', message)
+            if strict:
+                # Запись уже сделана: не 500, а отметка в ответе
+                response['Query-Budget-Exceeded'] = '; '.join(problems)
+        return response
+
+
+class QueryBudgetAssertions:
+    """Примесь к TestCase: проверки запросов, сделанных при обработке ответа"""
+
+    def query_stats(self, response):
+        request = getattr(response, 'wsgi_request', None) or response.asgi_request
+        return request.query_stats
+
+    def assertRequestQueries(self, response, expected):
+        stats = self.query_stats(response)
+        self.assertEqual(stats.count, expected,
+                         f'{stats.count} queries, expected {expected}: {dict(stats.fingerprints)}')
+
+    def assertNoDuplicateQueries(self, response):
+        self.assertEqual(self.query_stats(response).duplicates, {})
@@ -0,0 +1,64 @@
+"""
+Рендеринг JSON-ответов API — общий для всех вью tasks.
+
+Энкодер выбирается настройкой ``TASKS_JSON_RENDERER``:
+
+* ``'auto'`` (по умолчанию) — orjson, если установлен, иначе stdlib;
+* ``'orjson'`` — только orjson (без него — ImproperlyConfigured);
+* ``'stdlib'`` — json из стандартной библиотеки, ответ байт в байт как у
+  прежнего ``JsonResponse(..., json_dumps_params={'ensure_ascii': False})``.
+
+orjson пишет сразу в bytes и сам кодирует datetime (RFC 3339, как
+``isoformat()``), поэтому вью могут отдавать даты объектами, без
+``.isoformat()`` в Python. Для stdlib то же делает ``_default``.
+"""
+import datetime
+import decimal
+import json
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # необязательная зависимость
+    orjson = None
+
+BACKENDS = ('auto', 'orjson', 'stdlib')
+
+
+def _default(obj):
+    """Типы, которых нет в JSON: так же, как их кодирует orjson"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal, Promise)):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def backend():
+    name = getattr(settings, 'TASKS_JSON_RENDERER', 'auto')
+    if name not in BACKENDS:
+        raise ImproperlyConfigured(
+            f'TASKS_JSON_RENDERER must be one of {", ".join(BACKENDS)}, got "{name}"')
+    if name == 'auto':
+        return 'orjson' if orjson is not None else 'stdlib'
+    if name == 'orjson' and orjson is None:
+        raise ImproperlyConfigured('TASKS_JSON_RENDERER = "orjson", but orjson is not installed')
+    return name
+
+
+def dumps(data, compact=False):
+    """JSON в bytes (UTF-8, без \\u-экранирования). ``compact`` — без пробелов (для stdlib)"""
+    if backend() == 'orjson':
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    separators = (',', ':') if compact else None
+    return json.dumps(data, ensure_ascii=False, separators=separators, default=_default).encode()
+
+
+def json_response(data, status=200):
+    """Замена JsonResponse для вью tasks"""
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
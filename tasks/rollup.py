@@ -0,0 +1,119 @@
+"""
+Сводка по подзадачам в строке Task — чтобы список задач показывал «3/7
+подзадач выполнено» без запроса подзадач на каждую задачу:
+
+* ``subtask_total`` — число подзадач;
+* ``subtask_done`` — из них в статусе DONE_STATUS;
+* ``next_subtask_deadline`` — ближайший дедлайн невыполненных подзадач,
+  в том числе уже прошедший; NULL, если таких нет.
+
+Сводка пересчитывается по подзадачам целиком — одним UPDATE с подзапросами
+по индексу subtask.task_id — в той же транзакции, что и запись подзадачи:
+сигналы save/delete (создание, удаление, смена статуса или дедлайна,
+перенос в другую задачу — обе задачи) и массовые операции tasks.bulk (см.
+tasks.signals). Пересчёт, а не приращения: после выполнения или удаления
+подзадачи ближайший дедлайн всё равно ищется заново. Где есть SELECT ...
+FOR UPDATE, строки задач сначала блокируются, и пересчёт видит подзадачи
+параллельных транзакций, закоммиченные до него.
+
+Сам Task.save() сводку не записывает (см. Task.save). Переименование
+статуса DONE_STATUS и UPDATE в обход tasks.bulk сводку не меняют — сверка
+и пересчёт командой ``rebuild_rollups``.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import Count, Min, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ROLLUP_FIELDS, SubTask, Task
+from .status_cache import status_cache
+
+DONE_STATUS = 'Done'
+FIELDS = ROLLUP_FIELDS
+# Поля подзадачи, от которых зависит сводка её задачи
+SOURCE_FIELDS = ('status_id', 'deadline', 'task_id')
+BATCH_SIZE = 500
+
+_local = threading.local()
+
+
+def _per_task(subtasks, aggregate):
+    return Subquery(subtasks.values('task_id').annotate(value=aggregate).values('value'))
+
+
+def expressions():
+    """{поле: выражение} сводки для update()/annotate() над Task"""
+    # Условие на статус — в агрегате, а не в WHERE подзапроса: иначе SQLite
+    # выбирает индекс по status_id и перебирает все выполненные подзадачи
+    subtasks = SubTask.objects.filter(task_id=OuterRef('pk')).order_by()
+    done_id = status_cache.id_for(DONE_STATUS)
+    if done_id is None:
+        done, pending = Value(0), None
+    else:
+        done = Coalesce(_per_task(subtasks, Count('id', filter=Q(status_id=done_id))), 0)
+        pending = ~Q(status_id=done_id)
+    return {
+        'subtask_total': Coalesce(_per_task(subtasks, Count('id')), 0),
+        'subtask_done': done,
+        'next_subtask_deadline': _per_task(subtasks, Min('deadline', filter=pending)),
+    }
+
+
+def changed(before, instance):
+    """Меняет ли запись подзадачи сводку; ``before`` — её поля до записи или None"""
+    return before is None or any(before[name] != getattr(instance, name) for name in SOURCE_FIELDS)
+
+
+def refresh(task_ids):
+    """Пересчитать сводку задач ``task_ids`` (внутри deferred() — при выходе из него)"""
+    task_ids = {pk for pk in task_ids if pk is not None}
+    pending = getattr(_local, 'deferred', None)
+    if pending is not None:
+        pending.update(task_ids)
+        return
+    if not task_ids:
+        return
+    task_ids = sorted(task_ids)  # один порядок блокировок у всех транзакций
+    values = expressions()
+    with transaction.atomic():
+        for start in range(0, len(task_ids), BATCH_SIZE):
+            tasks = Task.objects.filter(pk__in=task_ids[start:start + BATCH_SIZE])
+            if connection.features.has_select_for_update:
+                list(tasks.select_for_update().values_list('pk', flat=True))
+            tasks.update(**values)
+
+
+@contextmanager
+def deferred():
+    """
+    Копит пересчёт сводки внутри блока и делает его один раз на выходе —
+    для загрузки тысяч подзадач пачками (seed_tasks), где пересчёт после
+    каждой пачки лишний, а индексы могут быть сняты (bulk.deferred_indexes).
+    При ошибке пересчёта нет — сводку восстановит ``rebuild_rollups``.
+    """
+    if getattr(_local, 'deferred', None) is not None:
+        yield
+        return
+    _local.deferred = set()
+    try:
+        yield
+    finally:
+        task_ids, _local.deferred = _local.deferred, None
+    refresh(task_ids)
+
+
+def drift(tasks):
+    """
+    Расхождения сводки у задач ``tasks`` (queryset): [(pk, {поле: (сейчас, верно)})]
+    одним запросом.
+    """
+    expected = {f'expected_{name}': value for name, value in expressions().items()}
+    result = []
+    for row in tasks.order_by('pk').annotate(**expected).values('pk', *FIELDS, *expected):
+        diff = {name: (row[name], row[f'expected_{name}']) for name in FIELDS
+                if row[name] != row[f'expected_{name}']}
+        if diff:
+            result.append((row['pk'], diff))
+    return result
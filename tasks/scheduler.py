@@ -0,0 +1,238 @@
+"""
+Планировщик просрочки: флаг ``is_overdue`` у Task/SubTask и событие
+«стала просроченной» (сигнал tasks.signals.became_overdue).
+
+Флаг хранится в строке, поэтому фильтр ``?overdue=true`` и число
+просроченных в статистике — поиск по индексу (is_overdue, deadline), а не
+сравнение каждой строки с текущим временем. Флаг ставят:
+
+* запись (save, bulk.create) с уже прошедшим дедлайном — сразу, а перенос
+  дедлайна в будущее флаг снимает (tasks.signals);
+* этот планировщик — когда дедлайн наступает.
+
+Переход False -> True делается условным UPDATE (``WHERE NOT is_overdue``
+... RETURNING), и в той же транзакции рассылается became_overdue только для
+строк, которые изменил этот UPDATE, — поэтому обработчики получают каждое
+событие ровно один раз, даже если планировщиков несколько.
+
+Куча ``DeadlineScheduler`` хранит ближайшие дедлайны (на
+``TASKS_OVERDUE_HORIZON`` секунд вперёд) и определяет только момент
+пробуждения; какие строки переводить, решает запрос к БД по индексу —
+пачками по ``TASKS_OVERDUE_BATCH_SIZE``. Дедлайны, записанные в этом же
+процессе, попадают в кучу сразу после коммита, записанные другими
+процессами — при перечитывании кучи раз в ``TASKS_OVERDUE_RELOAD_INTERVAL``
+секунд. Состояние целиком в БД: после перезапуска первый же проход
+переводит всё, что наступило, пока планировщик не работал (непоставленный
+флаг и есть ещё не отправленное событие).
+
+Запуск: по умолчанию (``TASKS_OVERDUE_SCHEDULER = 'thread'``) — поток в
+процессе веб-сервера (wsgi/asgi, в том числе runserver). С несколькими
+воркерами планировщиков тоже несколько: события не дублируются, но работа
+— да; тогда ``'off'`` и один отдельный процесс ``manage.py run_scheduler``.
+При ``'off'`` без этого процесса наступившие дедлайны флаг не получают.
+"""
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, connections, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import SubTask, Task
+from .signals import became_overdue, bulk_created
+
+logger = logging.getLogger(__name__)
+
+MODELS = (Task, SubTask)
+# Пауза после ошибки БД (например, база заблокирована), секунд
+RETRY_DELAY = 5
+
+
+def _setting(name, default):
+    return getattr(settings, f'TASKS_OVERDUE_{name}', default)
+
+
+def flip_due(model, now, batch_size=None):
+    """
+    Отмечает просроченными строки ``model`` с дедлайном не позже ``now``,
+    пачками, каждая в своей транзакции с рассылкой became_overdue.
+    Возвращает число переведённых строк.
+    """
+    batch_size = batch_size or _setting('BATCH_SIZE', 500)
+    task_field = 'task_id' if model is SubTask else 'pk'
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(model.objects.select_for_update()
+                        .filter(is_overdue=False, deadline__lte=now)
+                        .order_by('deadline').values_list('pk', task_field)[:batch_size])
+            if not rows:
+                return total
+            # В событие — только строки, которые перевёл именно этот UPDATE:
+            # на SQLite select_for_update() ничего не блокирует, и ту же пачку
+            # мог выбрать планировщик другого процесса
+            flipped = _mark_overdue(model, [pk for pk, _ in rows], task_field)
+            if flipped:
+                became_overdue.send(sender=model, pks=[pk for pk, _ in flipped],
+                                    task_ids={task_id for _, task_id in flipped})
+        total += len(flipped)
+        if len(rows) < batch_size:
+            return total
+
+
+def _mark_overdue(model, pks, task_field):
+    """UPDATE ... WHERE NOT is_overdue; возвращает [(pk, task_id)] действительно изменённых строк"""
+    if not connection.features.can_return_columns_from_insert:
+        # Без RETURNING (MySQL): строки заблокированы select_for_update, выбор = изменение
+        rows = list(model.objects.filter(pk__in=pks, is_overdue=False).values_list('pk', task_field))
+        model.objects.filter(pk__in=pks, is_overdue=False).update(is_overdue=True)
+        return rows
+    # SQLite >= 3.35 и PostgreSQL умеют RETURNING и в UPDATE
+    opts = model._meta
+    quote = connection.ops.quote_name
+    flag = quote(opts.get_field('is_overdue').column)
+    pk_column = quote(opts.pk.column)
+    task_column = quote(opts.get_field('task').column) if model is SubTask else pk_column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {quote(opts.db_table)} SET {flag} = %s '
+            f'WHERE {pk_column} IN ({", ".join(["%s"] * len(pks))}) AND {flag} = %s '
+            f'RETURNING {pk_column}, {task_column}',
+            [True, *pks, False])
+        return cursor.fetchall()
+
+
+class DeadlineScheduler:
+
+    def __init__(self):
+        self._heap = []  # ближайшие дедлайны, datetime
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._horizon_end = None
+        self._reload_at = None
+        self.flipped = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def load(self, now):
+        """Перечитать кучу: ожидающие дедлайны на горизонт вперёд"""
+        horizon_end = now + timedelta(seconds=_setting('HORIZON', 3600))
+        reload_at = now + timedelta(seconds=_setting('RELOAD_INTERVAL', 30))
+        limit = _setting('LOAD_LIMIT', 10000)
+        deadlines = []
+        for model in MODELS:
+            loaded = list(model.objects.filter(is_overdue=False, deadline__gt=now, deadline__lte=horizon_end)
+                          .order_by('deadline').values_list('deadline', flat=True)[:limit])
+            if len(loaded) == limit:
+                # Загружена не вся очередь — перечитать, когда дойдём до её конца
+                reload_at = min(reload_at, loaded[-1])
+            deadlines.extend(loaded)
+        heap = sorted(set(deadlines))
+        with self._lock:
+            self._heap = heap
+            self._horizon_end = horizon_end
+            self._reload_at = reload_at
+
+    def push(self, deadline):
+        """Новый дедлайн из этого процесса; дальние подхватит перечитывание"""
+        if not isinstance(deadline, datetime):
+            return
+        with self._lock:
+            if self._horizon_end is None or deadline > self._horizon_end:
+                return
+            heapq.heappush(self._heap, deadline)
+        self._wakeup.set()
+
+    def tick(self, now=None):
+        """Один проход: перевести наступившие дедлайны, при необходимости перечитать кучу"""
+        now = now or timezone.now()
+        flipped = sum(flip_due(model, now) for model in MODELS)
+        with self._lock:
+            while self._heap and self._heap[0] <= now:
+                heapq.heappop(self._heap)
+            reload = self._reload_at is None or now >= self._reload_at
+        if reload:
+            self.load(now)
+        self.flipped += flipped
+        return flipped
+
+    def sleep_time(self, now=None):
+        """Секунд до следующего прохода: ближайший дедлайн или перечитывание"""
+        now = now or timezone.now()
+        with self._lock:
+            wake_at = min(self._heap[:1] + [self._reload_at or now])
+        return max((wake_at - now).total_seconds(), 0)
+
+    def run(self):
+        """Цикл планировщика до stop(): сначала догоняет пропущенное, затем спит до дедлайнов"""
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                flipped = self.tick()
+                timeout = self.sleep_time()
+            except DatabaseError:
+                logger.exception('Overdue scheduler pass failed')
+                timeout = RETRY_DELAY
+            else:
+                if flipped:
+                    logger.info('Marked %d rows overdue', flipped)
+            self._wakeup.wait(timeout)
+        connections.close_all()
+
+    def start(self):
+        """Запустить цикл в фоновом потоке (если ещё не запущен)"""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name='tasks-overdue-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+
+scheduler = DeadlineScheduler()
+
+
+def autostart():
+    """Поток планировщика в процессе веб-сервера при TASKS_OVERDUE_SCHEDULER = 'thread'"""
+    if getattr(settings, 'TASKS_OVERDUE_SCHEDULER', 'thread') == 'thread':
+        scheduler.start()
+
+
+def _push_after_commit(deadlines):
+    if not scheduler.running:
+        return
+
+    def push():
+        for deadline in deadlines:
+            scheduler.push(deadline)
+    transaction.on_commit(push)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SubTask)
+def schedule_saved(sender, instance, raw=False, **kwargs):
+    if not raw and not instance.is_overdue:
+        _push_after_commit([instance.deadline])
+
+
+@receiver(bulk_created)
+def schedule_bulk_created(sender, objs, **kwargs):
+    if sender in MODELS:
+        _push_after_commit([obj.deadline for obj in objs if not obj.is_overdue])
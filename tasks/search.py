@@ -0,0 +1,149 @@
+"""
+Полнотекстовый поиск по задачам и подзадачам (SQLite FTS5).
+
+Виртуальная таблица ``tasks_search`` (миграция 0008) зеркалит title и
+description обеих моделей. rowid кодирует тип и id строки: ``id * 2 + kind``,
+где kind 0 — Task, 1 — SubTask; поэтому обновление строки — это DELETE и
+INSERT по rowid, без отдельного отображения. Индекс поддерживается
+сигналами (tasks.signals) в той же транзакции, что и запись, и полностью
+пересобирается командой ``rebuild_search_index``.
+
+На других СУБД (или SQLite без FTS5) таблицы нет: ``is_available()``
+возвращает False и поиск откатывается к обычным icontains-фильтрам.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import SubTask, Task
+
+TABLE = 'tasks_search'
+
+KINDS = {
+    Task: 0,
+    SubTask: 1,
+}
+MODELS = {kind: model for model, kind in KINDS.items()}
+TYPE_NAMES = {Task: 'task', SubTask: 'subtask'}
+
+# Границы совпадения от FTS5 — символы из области частного использования:
+# текст экранируется целиком, и только потом они становятся тегами <b>
+MATCH_START, MATCH_END = '\ue000', '\ue001'
+
+_available = None
+
+
+def is_available():
+    global _available
+    if _available is None:
+        _available = (connection.vendor == 'sqlite'
+                      and TABLE in connection.introspection.table_names())
+    return _available
+
+
+def _rowid(model, pk):
+    return pk * 2 + KINDS[model]
+
+
+def to_match_query(text):
+    """
+    Пользовательский ввод -> выражение MATCH: каждое слово в кавычках
+    (операторы FTS5 не интерпретируются) с поиском по префиксу, слова через AND.
+    """
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index(model, objs, replace=True):
+    """Добавить строки в индекс; ``replace`` — сначала удалить прежние версии"""
+    if not is_available():
+        return
+    rows = [(_rowid(model, obj.pk), obj.title, obj.description) for obj in objs]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        if replace:
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, description) VALUES (%s, %s, %s)', rows)
+
+
+def remove(model, pks):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s',
+                           [(_rowid(model, pk),) for pk in pks])
+
+
+def rebuild(optimize=True):
+    """
+    Полная пересборка индекса одним INSERT ... SELECT на модель; ``optimize``
+    — затем слить сегменты FTS5 в один (после заливки можно не ждать,
+    сегменты сольёт automerge)
+    """
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for model, kind in KINDS.items():
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, title, description) '
+                f'SELECT id * 2 + {kind}, title, description FROM {model._meta.db_table}'
+            )
+        if optimize:
+            cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search(text, models=(Task, SubTask), limit=20):
+    """
+    Ранжированные совпадения (bm25, title весит больше description) со
+    сниппетами: [{'type', 'id', 'title', 'snippet', 'rank'}]. title и
+    snippet — HTML: пользовательский текст экранирован, совпадения в <b>.
+    """
+    query = to_match_query(text)
+    if not query or not is_available():
+        return []
+    kinds = ', '.join(str(KINDS[model]) for model in models)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, highlight({TABLE}, 0, %s, %s), "
+            f"snippet({TABLE}, 1, %s, %s, '…', 12), bm25({TABLE}, 10.0, 1.0) AS score "
+            f"FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% 2 IN ({kinds}) "
+            f"ORDER BY score LIMIT %s",
+            [MATCH_START, MATCH_END, MATCH_START, MATCH_END, query, limit],
+        )
+        rows = cursor.fetchall()
+    return [
+        {
+            'type': TYPE_NAMES[MODELS[rowid % 2]],
+            'id': rowid // 2,
+            'title': _markup(title),
+            'snippet': _markup(snippet),
+            'rank': rank,
+        }
+        for rowid, title, snippet, rank in rows
+    ]
+
+
+def _markup(text):
+    """Экранировать текст и заменить границы совпадений на <b>...</b>"""
+    if text is None:
+        return None
+    return escape(text).replace(MATCH_START, '<b>').replace(MATCH_END, '</b>')
+
+
+def filter_queryset(queryset, text):
+    """Сузить queryset Task/SubTask до совпадений — подзапросом к индексу, без списка id"""
+    query = to_match_query(text)
+    if not query:
+        return queryset.none()
+    kind = KINDS[queryset.model]
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid / 2 FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% 2 = %s',
+        (query, kind),
+    ))
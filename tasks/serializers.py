@@ -1,5 +1,7 @@
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Task, Status
+from .models import Task, Status, SubTask
+from .status_cache import status_cache
 
 
 class StatusSerializer(serializers.ModelSerializer):
@@ -8,10 +10,52 @@ class StatusSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
+class CachedStatusField(serializers.PrimaryKeyRelatedField):
+    """status_id через справочник status_cache — без запроса Status на каждый элемент"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', Status.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return status_cache.get_by_id(pk)
+        except Status.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class TaskBulkListSerializer(serializers.ListSerializer):
+    """
+    TaskSerializer(many=True) для массового создания: все элементы проверяются
+    за один проход, ошибки возвращаются по индексам, а корректные элементы
+    остаются доступны в ``valid_items`` как [(index, validated_data)].
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({'non_field_errors': ['Expected a list of items.']})
+        self.valid_items = []
+        errors = []
+        for index, item in enumerate(data):
+            try:
+                self.valid_items.append((index, self.child.run_validation(item)))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                errors.append(exc.detail)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [validated for _, validated in self.valid_items]
+
+
 class TaskSerializer(serializers.ModelSerializer):
     status = StatusSerializer(read_only=True)
-    status_id = serializers.PrimaryKeyRelatedField(
-        queryset=Status.objects.all(),
+    status_id = CachedStatusField(
         source='status',
         write_only=True,
         required=False
@@ -19,13 +63,103 @@ class TaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'status', 'status_id', 'deadline']
-        read_only_fields = ['id', 'status']
+        fields = ['id', 'title', 'description', 'status', 'status_id', 'deadline',
+                  'subtask_total', 'subtask_done', 'next_subtask_deadline']
+        # Сводку по подзадачам поддерживает tasks.rollup
+        read_only_fields = ['id', 'status', 'subtask_total', 'subtask_done', 'next_subtask_deadline']
+        list_serializer_class = TaskBulkListSerializer
 
     def create(self, validated_data):
         # Если статус не указан, используем статус "To Do" по умолчанию
         if 'status' not in validated_data:
-            status, created = Status.objects.get_or_create(name='To Do')
-            validated_data['status'] = status
+            validated_data['status'] = status_cache.get_or_create('To Do')
+
+        return Task.objects.create(**validated_data)
+
+
+class TaskCreateSerializer(TaskSerializer):
+    """Создание задачи через API: дедлайн не в прошлом"""
+
+    def validate_deadline(self, value):
+        if value < timezone.now():
+            raise serializers.ValidationError('Нельзя устанавливать дедлайн в прошлом.')
+        return value
+
+
+class SubTaskBriefSerializer(serializers.ModelSerializer):
+    """Подзадача внутри задачи (TaskDetailSerializer.subtasks)"""
+    status = StatusSerializer(read_only=True)
+
+    class Meta:
+        model = SubTask
+        fields = ['id', 'title', 'description', 'status', 'deadline', 'created_at']
+
+
+class TaskDetailSerializer(TaskSerializer):
+    """Задача с подзадачами; быстрый путь api_task_detail (tasks.fieldsets) отдаёт тот же JSON"""
+    subtasks = SubTaskBriefSerializer(many=True, read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ['subtasks']
+
+
+class SubTaskDetailSerializer(serializers.ModelSerializer):
+    """Подзадача с задачей; быстрый путь api_task_subtasks (tasks.fieldsets) отдаёт тот же JSON"""
+    status = StatusSerializer(read_only=True)
+    task = TaskSerializer(read_only=True)
+
+    class Meta:
+        model = SubTask
+        fields = ['id', 'title', 'description', 'status', 'deadline', 'task', 'created_at']
+
+
+class SubTaskCreateSerializer(serializers.ModelSerializer):
+    task_id = serializers.PrimaryKeyRelatedField(queryset=Task.objects.all(), source='task')
+    status_id = CachedStatusField(source='status')
+
+    class Meta:
+        model = SubTask
+        fields = ['id', 'title', 'description', 'status_id', 'deadline', 'task_id', 'created_at']
+        read_only_fields = ['id', 'created_at']
+
+
+class TransitionFilterSerializer(serializers.Serializer):
+    status = serializers.CharField(required=False)
+    deadline_from = serializers.DateTimeField(required=False)
+    deadline_to = serializers.DateTimeField(required=False)
+    task_id = serializers.IntegerField(required=False)
+
+
+class StatusTransitionSerializer(serializers.Serializer):
+    """Запрос массовой смены статуса (POST /api/status-transitions/)"""
+    TARGETS = ('tasks', 'subtasks', 'both')
+
+    status = serializers.CharField()
+    target = serializers.ChoiceField(choices=TARGETS, default='tasks')
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False)
+    filter = TransitionFilterSerializer(required=False)
+    cascade = serializers.BooleanField(default=False)
+    chunk_size = serializers.IntegerField(min_value=1, max_value=5000, default=500)
+
+    def validate_status(self, value):
+        status = status_cache.find(value)
+        if status is None:
+            raise serializers.ValidationError(f'Unknown status "{value}".')
+        return status
 
-        return Task.objects.create(**validated_data)
\ No newline at end of file
+    def validate(self, attrs):
+        if ('ids' in attrs) == bool(attrs.get('filter')):
+            raise serializers.ValidationError('Specify either "ids" or a non-empty "filter".')
+        if 'ids' in attrs and attrs['target'] == 'both':
+            raise serializers.ValidationError('"ids" needs target "tasks" or "subtasks".')
+        transition_filter = attrs.get('filter') or {}
+        if 'task_id' in transition_filter and attrs['target'] != 'subtasks':
+            raise serializers.ValidationError('"filter.task_id" applies only to target "subtasks".')
+        if 'status' in transition_filter:
+            current = status_cache.find(transition_filter['status'])
+            if current is None:
+                raise serializers.ValidationError(
+                    f'Unknown status "{transition_filter["status"]}".')
+            transition_filter['status'] = current
+        return attrs
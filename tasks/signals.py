@@ -0,0 +1,184 @@
+"""
+Сигналы приложения tasks.
+
+Стандартные pre_save/post_save/post_delete поддерживают производные данные
+(счётчики статистики и т.п.) при обычных save()/delete(). Массовые операции
+(bulk_create, QuerySet.update) сигналов Django не шлют — для них
+tasks.bulk отправляет собственные сигналы ``bulk_created`` и
+``status_updated``, и все обработчики подписываются на оба пути.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import counters, deadline_calendar, http_cache, metrics, rollup, search
+from .models import Status, SubTask, Task, deadline_passed
+from .status_cache import status_cache
+from .suggest import prefix_index
+
+# sender — модель, objs — список созданных объектов (с pk)
+bulk_created = Signal()
+
+# sender — модель, pks — id затронутых строк,
+# before — {старый status_id: число строк}, status — новый Status,
+# task_ids — id задач, чьё представление изменилось (для SubTask — родители),
+# deadlines — дедлайны затронутых строк
+status_updated = Signal()
+
+# Строки стали просроченными (is_overdue: False -> True), рассылается ровно
+# один раз на переход; sender — модель, pks — id строк, task_ids — id задач
+# (для SubTask — родители). См. tasks.scheduler
+became_overdue = Signal()
+
+_local = threading.local()
+
+
+@contextmanager
+def initial_load():
+    """
+    Заливка пустых таблиц Task/SubTask (seed_tasks). Поисковый индекс
+    строится один раз на выходе (search.rebuild), а не дописывается каждой
+    пачкой, и версии ответов отдельных задач не меняются: кэшируются только
+    ответы 200, а загружаемых задач до этого не было. Поэтому подзадачи
+    вставляются в одной транзакции со своими задачами. При ошибке пересборки
+    нет — индекс восстановит ``rebuild_search_index``.
+    """
+    if getattr(_local, 'initial_load', False):
+        yield
+        return
+    _local.initial_load = True
+    try:
+        yield
+    finally:
+        _local.initial_load = False
+    search.rebuild(optimize=False)
+    http_cache.bump_tasks([])
+
+
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def status_changed(sender, **kwargs):
+    # Незакоммиченный статус не должен попасть в общий снимок (см. status_cache)
+    status_cache.changed()
+
+
+# Поля, значения которых обработчикам нужны «до» записи
+TRACKED_FIELDS = {
+    Task: ('status_id', 'title', 'description', 'deadline', 'is_overdue'),
+    SubTask: ('status_id', 'title', 'description', 'deadline', 'task_id', 'is_overdue'),
+}
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=SubTask)
+def remember_state(sender, instance, raw=False, **kwargs):
+    """Запоминает состояние строки в БД до UPDATE"""
+    instance._state_before_save = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._state_before_save = (sender.objects.filter(pk=instance.pk)
+                                   .values(*TRACKED_FIELDS[sender]).first())
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=SubTask)
+def set_overdue_flag(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Флаг по дедлайну на момент записи; наступление дедлайна потом отмечает tasks.scheduler"""
+    if raw or (update_fields is not None and 'is_overdue' not in update_fields):
+        return
+    instance.is_overdue = deadline_passed(instance.deadline)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=SubTask)
+def row_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_state_before_save', None)
+    if instance.is_overdue and not (before and before['is_overdue']):
+        task_id = instance.pk if sender is Task else instance.task_id
+        became_overdue.send(sender=sender, pks=[instance.pk], task_ids=[task_id])
+    counters.on_saved(sender, instance, created, before)
+    rollup_changed = sender is SubTask and rollup.changed(before, instance)
+    if rollup_changed:
+        rollup.refresh([instance.task_id, before and before['task_id']])
+    bump_response_cache(sender, instance, before, list_changed=sender is Task or rollup_changed)
+    if before is None:
+        deadline_calendar.bump_days([instance.deadline])
+    elif (before['deadline'], before['status_id']) != (instance.deadline, instance.status_id):
+        deadline_calendar.bump_days([before['deadline'], instance.deadline])
+    text = (instance.title, instance.description)
+    if before is None or (before['title'], before['description']) != text:
+        search.index(sender, [instance], replace=before is not None)
+    if before is None or before['title'] != instance.title:
+        removed = [(instance.pk, before['title'])] if before is not None else []
+        added = [(instance.pk, instance.title)]
+        # Процессный индекс не откатывается вместе с транзакцией — только после коммита
+        transaction.on_commit(lambda: prefix_index.apply(sender, added, removed))
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=SubTask)
+def row_deleted(sender, instance, **kwargs):
+    counters.on_deleted(sender, instance)
+    if sender is SubTask:
+        rollup.refresh([instance.task_id])
+    bump_response_cache(sender, instance)
+    deadline_calendar.bump_days([instance.deadline])
+    search.remove(sender, [instance.pk])
+    removed = [(instance.pk, instance.title)]
+    transaction.on_commit(lambda: prefix_index.apply(sender, removed=removed))
+
+
+def bump_response_cache(sender, instance, before=None, list_changed=True):
+    if sender is Task:
+        http_cache.bump_tasks([instance.pk], list_changed=list_changed)
+        return
+    # Подзадачи входят в детали задачи, их сводка (tasks.rollup) — ещё и в список;
+    # при переносе меняются обе задачи
+    task_ids = [instance.task_id]
+    if before is not None:
+        task_ids.append(before['task_id'])
+    http_cache.bump_tasks(task_ids, list_changed=list_changed)
+
+
+@receiver(bulk_created)
+def rows_bulk_created(sender, objs, **kwargs):
+    loading = getattr(_local, 'initial_load', False)
+    if sender in counters.SCOPES:
+        counters.on_bulk_created(sender, objs)
+        if not loading:
+            search.index(sender, objs, replace=False)
+        deadline_calendar.bump_days({obj.deadline for obj in objs})
+        added = [(obj.pk, obj.title) for obj in objs]
+        transaction.on_commit(lambda: prefix_index.apply(sender, added))
+    if sender is Task:
+        http_cache.bump_tasks([])
+    elif sender is SubTask:
+        task_ids = {obj.task_id for obj in objs}
+        rollup.refresh(task_ids)
+        # Задачи загружены в этой же транзакции — их ответов в кэше нет
+        http_cache.bump_tasks([] if loading else task_ids)
+
+
+@receiver(status_updated)
+def rows_status_updated(sender, before, status, task_ids=(), deadlines=(), **kwargs):
+    if sender in counters.SCOPES:
+        counters.on_status_updated(sender, before, status.id)
+        deadline_calendar.bump_days(deadlines)
+    if sender is SubTask:
+        rollup.refresh(task_ids)
+    if sender in (Task, SubTask):
+        http_cache.bump_tasks(task_ids)
+
+
+@receiver(became_overdue)
+def rows_became_overdue(sender, pks, **kwargs):
+    # is_overdue есть только в элементах списка задач (api_task_list)
+    if sender is Task:
+        http_cache.bump_tasks([])
+    labels = (('model', sender._meta.model_name),)
+    transaction.on_commit(lambda: metrics.registry.inc('tasks_overdue_transitions_total', labels, len(pks)))
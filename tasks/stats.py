@@ -0,0 +1,123 @@
+"""
+Статистика по задачам и подзадачам.
+
+api_task_stats читает денормализованные счётчики (tasks.counters) — это
+O(1) от объёма данных. «Просроченные» — COUNT по индексу (is_overdue,
+deadline): флаг ставит tasks.scheduler, когда дедлайн наступает.
+
+``table_stats`` — полный пересчёт одним SELECT с условной агрегацией
+``COUNT(...) FILTER (WHERE ...)``; им пользуется ``rebuild_stats`` для сверки.
+Набор статусов берётся из таблицы Status, а не из захардкоженного списка.
+
+``acollect_stats`` — то же для асинхронного api_task_stats: независимые
+запросы запускаются одновременно через asyncio.gather.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import counters
+from .models import Task, SubTask
+from .status_cache import status_cache
+
+UPCOMING_LIMIT = 3
+
+
+def table_stats(model, statuses, now):
+    """Все метрики одной таблицы одним запросом."""
+    aggregates = {
+        'total': Count('id'),
+        'overdue': Count('id', filter=Q(deadline__lt=now)),
+        'without_description': Count('id', filter=Q(description='')),
+    }
+    for status in statuses:
+        aggregates[f'status_{status.id}'] = Count('id', filter=Q(status_id=status.id))
+
+    row = model.objects.aggregate(**aggregates)
+    return {
+        'total': row['total'],
+        'by_status': {status.name: row[f'status_{status.id}'] for status in statuses},
+        'overdue': row['overdue'],
+        'without_description': row['without_description'],
+    }
+
+
+def _upcoming_queryset(now, limit):
+    return (Task.objects.filter(is_overdue=False, deadline__gte=now)
+            .order_by('deadline')
+            .only('id', 'title', 'deadline')[:limit])
+
+
+def _upcoming_to_list(upcoming, now):
+    return [
+        {
+            'id': task.id,
+            'title': task.title,
+            'deadline': task.deadline.isoformat(),
+            'days_until': (task.deadline - now).days
+        }
+        for task in upcoming
+    ]
+
+
+def upcoming_deadlines(now, limit=UPCOMING_LIMIT):
+    """Ближайшие дедлайны задач"""
+    return _upcoming_to_list(_upcoming_queryset(now, limit), now)
+
+
+async def aupcoming_deadlines(now, limit=UPCOMING_LIMIT):
+    return _upcoming_to_list([task async for task in _upcoming_queryset(now, limit)], now)
+
+
+def counter_stats(scope_counters, statuses, overdue):
+    """Метрики одной таблицы из готовых счётчиков"""
+    return {
+        'total': scope_counters.get(counters.TOTAL, 0),
+        'by_status': {status.name: scope_counters.get(counters.status_key(status.id), 0)
+                      for status in statuses},
+        'overdue': overdue,
+        'without_description': scope_counters.get(counters.WITHOUT_DESCRIPTION, 0),
+    }
+
+
+def collect_stats(now=None):
+    """
+    Полный блок ``stats`` для api_task_stats: 4 запроса независимо от объёма
+    данных (счётчики, два индексных COUNT по is_overdue, ближайшие дедлайны);
+    статусы берутся из status_cache.
+    """
+    now = now or timezone.now()
+    statuses = status_cache.all()
+    values = counters.read_all()
+
+    return {
+        'tasks': counter_stats(values[counters.SCOPES[Task]], statuses,
+                               Task.objects.filter(is_overdue=True).count()),
+        'subtasks': counter_stats(values[counters.SCOPES[SubTask]], statuses,
+                                  SubTask.objects.filter(is_overdue=True).count()),
+        'upcoming_deadlines': upcoming_deadlines(now),
+    }
+
+
+async def acollect_stats(now=None):
+    """
+    Асинхронный collect_stats: те же 4 запроса, но ожидаются одновременно.
+    Запросы, которым нет async-API (справочник статусов, счётчики), идут
+    через sync_to_async.
+    """
+    now = now or timezone.now()
+    statuses, values, tasks_overdue, subtasks_overdue, upcoming = await asyncio.gather(
+        sync_to_async(status_cache.all)(),
+        sync_to_async(counters.read_all)(),
+        Task.objects.filter(is_overdue=True).acount(),
+        SubTask.objects.filter(is_overdue=True).acount(),
+        aupcoming_deadlines(now),
+    )
+
+    return {
+        'tasks': counter_stats(values[counters.SCOPES[Task]], statuses, tasks_overdue),
+        'subtasks': counter_stats(values[counters.SCOPES[SubTask]], statuses, subtasks_overdue),
+        'upcoming_deadlines': upcoming,
+    }
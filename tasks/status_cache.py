@@ -0,0 +1,202 @@
+"""
+Процессный кэш справочника Status (name <-> id <-> объект).
+
+Статусов единицы и меняются они редко, а нужны почти в каждом запросе.
+Весь справочник держится в памяти процесса и перечитывается одним запросом,
+когда меняется общая версия в кэше Django (``VERSION_KEY``). Версию меняют
+обработчики post_save/post_delete модели Status (см. tasks.signals) после
+коммита. С общим бэкендом кэша (Redis, Memcached) это сразу видят все
+процессы; с процессным (LocMem, по умолчанию) — только процесс, где была
+запись, а остальные перечитывают справочник не реже чем раз в
+``TASKS_STATUS_CACHE_TTL`` секунд: настолько может отставать переименование
+или удаление статуса, сделанное другим воркером, админкой или командой.
+
+Промах по имени или id тоже перечитывает справочник: статус мог появиться
+в другом процессе. Чтобы запросы с несуществующим именем (?status=...) не
+ходили в БД каждый раз, такое перечитывание не чаще MISS_RELOAD_INTERVAL.
+
+Пока транзакция, изменившая справочник, не закончилась, поток, который её
+ведёт, читает справочник в свой отдельный снимок: незакоммиченные статусы
+не попадают в общий снимок процесса, а после отката снимок просто
+отбрасывается.
+
+Возвращаемые объекты Status общие для всего процесса — их нельзя изменять.
+"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import metrics
+from .models import Status
+
+VERSION_KEY = 'tasks:status:version'
+# Минимальный интервал (с) между перечитываниями справочника из-за промаха
+MISS_RELOAD_INTERVAL = 1.0
+# Версия снимка, прочитанного внутри транзакции, изменившей справочник
+_IN_TRANSACTION = 'transaction'
+
+
+def _max_age():
+    return getattr(settings, 'TASKS_STATUS_CACHE_TTL', 30)
+
+
+class StatusCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (версия, {name: Status}, {id: Status}) — заменяется целиком
+        self._snapshot = (None, {}, {})
+        self._loaded_at = float('-inf')
+        # state: (точки сохранения при изменении, снимок или None) — у потока,
+        # чья транзакция изменила справочник (см. changed)
+        self._local = threading.local()
+
+    def _shared_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Ключ ещё не создан или вытеснен: новая уникальная версия
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _fresh(self, snapshot, version):
+        return snapshot[0] == version and time.monotonic() - self._loaded_at < _max_age()
+
+    def _load(self, force=False):
+        local = self._local_snapshot(force)
+        if local is not None:
+            return local
+        version = self._shared_version()
+        snapshot = self._snapshot
+        if not force and self._fresh(snapshot, version):
+            metrics.cache_lookup('status', True)
+            return snapshot
+        metrics.cache_lookup('status', False)
+        with self._lock:
+            if not force and self._fresh(self._snapshot, version):
+                return self._snapshot
+            return self._reload(version)
+
+    def _read(self, version):
+        statuses = list(Status.objects.order_by('id'))
+        return (
+            version,
+            {status.name: status for status in statuses},
+            {status.id: status for status in statuses},
+        )
+
+    def _reload(self, version):
+        # Вызывается под self._lock
+        self._snapshot = self._read(version)
+        self._loaded_at = time.monotonic()
+        return self._snapshot
+
+    def _reload_on_miss(self):
+        """Перечитать справочник, если снимок старше MISS_RELOAD_INTERVAL"""
+        local = self._local_snapshot()
+        if local is not None:
+            return local
+        with self._lock:
+            if time.monotonic() - self._loaded_at < MISS_RELOAD_INTERVAL:
+                return self._snapshot
+            return self._reload(self._shared_version())
+
+    def _local_snapshot(self, force=False):
+        """Снимок текущей транзакции, изменившей справочник, или None"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            return None
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            # Транзакция откатилась: после коммита состояние убирает _committed
+            self._local.state = None
+            return None
+        savepoints, snapshot = state
+        current = tuple(connection.savepoint_ids)
+        if force or snapshot is None or current[:len(savepoints)] != savepoints:
+            # Точки сохранения, открытые при изменении, закрыты — возможно, откатом
+            snapshot = self._read(_IN_TRANSACTION)
+            self._local.state = (current, snapshot)
+        return snapshot
+
+    def all(self):
+        """Все статусы в порядке id"""
+        return list(self._load()[2].values())
+
+    def by_id(self):
+        """Снимок {id: Status} для многих поисков подряд (не изменять)"""
+        return self._load()[2]
+
+    def find(self, name):
+        """Status по имени или None; промах перечитывает справочник (с ограничением частоты)"""
+        status = self._load()[1].get(name)
+        if status is None:
+            status = self._reload_on_miss()[1].get(name)
+        return status
+
+    def id_for(self, name):
+        status = self.find(name)
+        return status.id if status is not None else None
+
+    def get(self, name):
+        """Status по имени; как и ORM, бросает Status.DoesNotExist"""
+        status = self.find(name)
+        if status is None:
+            raise Status.DoesNotExist(f'Status matching name={name!r} does not exist.')
+        return status
+
+    def get_by_id(self, pk):
+        """Status по id. id берутся из внешних ключей, поэтому промах — повод перечитать справочник"""
+        status = self._load()[2].get(pk)
+        if status is None:
+            status = self._reload_on_miss()[2].get(pk)
+        if status is None:
+            raise Status.DoesNotExist(f'Status matching id={pk!r} does not exist.')
+        return status
+
+    def name_for(self, pk):
+        return self.get_by_id(pk).name
+
+    def get_or_create(self, name):
+        status = self.find(name)
+        if status is None:
+            status, created = Status.objects.get_or_create(name=name)
+            if not created:
+                # Уже закоммичен кем-то другим; новый статус сбросит кэш сам (changed)
+                self.invalidate()
+        return status
+
+    def changed(self):
+        """
+        Справочник изменён (post_save/post_delete Status). Вне транзакции —
+        сразу сбросить кэш; в транзакции — до её конца читать справочник
+        этого потока из БД, а сбросить кэш после коммита.
+        """
+        connection = transaction.get_connection()
+        if not connection.in_atomic_block:
+            self.invalidate()
+            return
+        self._local.state = (tuple(connection.savepoint_ids), None)
+        # На каждое изменение: колбэк из откаченной точки сохранения Django отбрасывает
+        transaction.on_commit(self._committed)
+
+    def _committed(self):
+        self._local.state = None
+        self.invalidate()
+
+    def invalidate(self):
+        """Сбросить кэш во всех процессах"""
+        cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+    def clear(self):
+        """Сбросить только локальные снимки (для тестов)"""
+        self._snapshot = (None, {}, {})
+        self._loaded_at = float('-inf')
+        self._local.state = None
+
+
+status_cache = StatusCache()
@@ -0,0 +1,54 @@
+"""
+Потоковая выдача больших списков задач (экспорт, синхронизация).
+
+Строки читаются через ``QuerySet.iterator(chunk_size=...)`` и сразу уходят в
+``StreamingHttpResponse`` — полный список в памяти не собирается, поэтому
+RSS воркера не зависит от того, сколько строк попало под фильтр.
+Куски кодируются сразу в bytes энкодером tasks.rendering.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .rendering import dumps
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def chunk_size():
+    return getattr(settings, 'TASKS_STREAM_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def _dumps(obj):
+    return dumps(obj, compact=True)
+
+
+def iter_ndjson(queryset, to_dict):
+    """По одной JSON-записи на строку."""
+    for obj in queryset.iterator(chunk_size=chunk_size()):
+        yield _dumps(to_dict(obj)) + b'\n'
+
+
+def iter_json(queryset, to_dict, key, extra=None):
+    """
+    Один JSON-документ вида ``{key: [...], "count": N, **extra}``,
+    собираемый по кусочкам. ``count`` пишется в конце, когда он уже известен.
+    """
+    yield b'{' + _dumps(key) + b':['
+    count = 0
+    for obj in queryset.iterator(chunk_size=chunk_size()):
+        yield (b',' if count else b'') + _dumps(to_dict(obj))
+        count += 1
+    tail = {'count': count}
+    tail.update(extra or {})
+    # Хвост документа без внешних фигурных скобок: ],"count":N,...}
+    yield b'],' + _dumps(tail)[1:]
+
+
+def ndjson_response(queryset, to_dict):
+    return StreamingHttpResponse(iter_ndjson(queryset, to_dict),
+                                 content_type='application/x-ndjson; charset=utf-8')
+
+
+def json_stream_response(queryset, to_dict, key, extra=None):
+    return StreamingHttpResponse(iter_json(queryset, to_dict, key, extra),
+                                 content_type='application/json; charset=utf-8')
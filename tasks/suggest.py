@@ -0,0 +1,198 @@
+"""
+Процессный префиксный индекс заголовков Task/SubTask для автодополнения.
+
+Индекс — отсортированный массив ключей ``<title.casefold()>\\x00<kind><id>``
+и параллельный массив (title, kind, id): поиск префикса — bisect плюс
+последовательный проход, без обращений к БД. Строится при первом запросе
+одним проходом по таблицам и дальше обновляется инкрементально сигналами
+моделей после коммита транзакции (tasks.signals).
+
+Изменения из других процессов видны через общую версию в кэше
+``TASKS_VERSION_CACHE`` (по умолчанию файловый — общий для всех процессов
+машины, в отличие от процессного LocMem): если её поменял кто-то другой,
+индекс перестраивается, но не чаще, чем раз в
+``TASKS_SUGGEST_REBUILD_INTERVAL`` секунд.
+
+При ``TASKS_SUGGEST_PRELOAD`` индекс собирается в фоне при старте
+веб-сервера (``autostart`` из wsgi/asgi), а не первым запросом. Не в
+AppConfig.ready: там к БД обращаться нельзя — ready выполняется и для
+migrate на пустой базе, и в тестах.
+"""
+import bisect
+import logging
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+
+from .models import SubTask, Task
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'tasks:suggest:version'
+
+KINDS = {Task: 't', SubTask: 's'}
+TYPE_NAMES = {'t': 'task', 's': 'subtask'}
+
+MAX_LIMIT = 50
+
+
+def _versions():
+    return caches[getattr(settings, 'TASKS_VERSION_CACHE', 'default')]
+
+
+def _key(title, kind, pk):
+    return f'{title.casefold()}\x00{kind}{pk}'
+
+
+class PrefixIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._keys = []
+        self._items = []
+        self._version = None
+        self._built_at = None
+        self._build_seconds = None
+
+    def _shared_version(self):
+        versions = _versions()
+        version = versions.get(VERSION_KEY)
+        if version is None:
+            versions.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = versions.get(VERSION_KEY)
+        return version
+
+    def _fresh(self, version):
+        if self._built_at is None:
+            return False
+        interval = getattr(settings, 'TASKS_SUGGEST_REBUILD_INTERVAL', 30)
+        return version == self._version or time.time() - self._built_at < interval
+
+    def _ensure_fresh(self):
+        version = self._shared_version()
+        if self._fresh(version):
+            return
+        # Одна сборка на процесс: остальные запросы (и фоновая сборка) ждут её
+        with self._build_lock:
+            if not self._fresh(version):
+                self.build(version)
+
+    def preload(self):
+        """Собрать индекс заранее, если он ещё не собран"""
+        self._ensure_fresh()
+
+    def build(self, version=None):
+        """Полная сборка индекса из БД"""
+        started = time.monotonic()
+        version = version or self._shared_version()
+        entries = []
+        for model, kind in KINDS.items():
+            for pk, title in model.objects.values_list('pk', 'title').iterator(chunk_size=5000):
+                entries.append((_key(title, kind, pk), (title, kind, pk)))
+        entries.sort(key=lambda entry: entry[0])
+        with self._lock:
+            self._keys = [key for key, _ in entries]
+            self._items = [item for _, item in entries]
+            self._version = version
+            self._built_at = time.time()
+            self._build_seconds = time.monotonic() - started
+
+    def suggest(self, prefix, limit=10):
+        """До ``limit`` заголовков, начинающихся с ``prefix`` (без учёта регистра)"""
+        self._ensure_fresh()
+        folded = prefix.casefold()
+        result = []
+        with self._lock:
+            keys, items = self._keys, self._items
+            position = bisect.bisect_left(keys, folded)
+            while position < len(keys) and len(result) < limit:
+                if not keys[position].startswith(folded):
+                    break
+                title, kind, pk = items[position]
+                result.append({'type': TYPE_NAMES[kind], 'id': pk, 'title': title})
+                position += 1
+        return result
+
+    def apply(self, model, added=(), removed=()):
+        """
+        Инкрементальное обновление: ``added`` — [(pk, title)], ``removed`` — [(pk, title)].
+        Собственное изменение не должно вызывать перестройку в этом процессе,
+        поэтому новая общая версия сразу записывается и как локальная.
+        """
+        if self._built_at is None:
+            self._bump_shared()
+            return
+        kind = KINDS[model]
+        with self._lock:
+            for pk, title in removed:
+                key = _key(title, kind, pk)
+                position = bisect.bisect_left(self._keys, key)
+                if position < len(self._keys) and self._keys[position] == key:
+                    del self._keys[position]
+                    del self._items[position]
+            for pk, title in added:
+                key = _key(title, kind, pk)
+                position = bisect.bisect_left(self._keys, key)
+                if position < len(self._keys) and self._keys[position] == key:
+                    continue
+                self._keys.insert(position, key)
+                self._items.insert(position, (title, kind, pk))
+            in_sync = self._version == self._shared_version()
+            version = self._bump_shared()
+            if in_sync:
+                self._version = version
+
+    def _bump_shared(self):
+        version = uuid.uuid4().hex
+        _versions().set(VERSION_KEY, version, None)
+        return version
+
+    def memory_report(self):
+        """Оценка занимаемой индексом памяти (байты, по sys.getsizeof)"""
+        with self._lock:
+            keys, items = self._keys, self._items
+            keys_bytes = sys.getsizeof(keys) + sum(sys.getsizeof(key) for key in keys)
+            items_bytes = sys.getsizeof(items) + sum(
+                sys.getsizeof(item) + sys.getsizeof(item[0]) + sys.getsizeof(item[2])
+                for item in items
+            )
+        return {
+            'entries': len(keys),
+            'keys_bytes': keys_bytes,
+            'items_bytes': items_bytes,
+            'total_bytes': keys_bytes + items_bytes,
+            'bytes_per_entry': round((keys_bytes + items_bytes) / len(keys), 1) if keys else 0,
+            'built_at': self._built_at,
+            'build_seconds': self._build_seconds,
+        }
+
+    def clear(self):
+        """Сбросить индекс процесса (для тестов)"""
+        with self._lock:
+            self._keys, self._items = [], []
+            self._version = self._built_at = self._build_seconds = None
+
+
+prefix_index = PrefixIndex()
+
+
+def _preload():
+    try:
+        prefix_index.preload()
+    except DatabaseError:
+        # Например, база ещё не мигрирована: индекс соберёт первый запрос
+        logger.exception('Suggest index preload failed')
+    finally:
+        connections.close_all()
+
+
+def autostart():
+    """Фоновая сборка индекса при старте веб-сервера при TASKS_SUGGEST_PRELOAD"""
+    if getattr(settings, 'TASKS_SUGGEST_PRELOAD', True):
+        threading.Thread(target=_preload, name='tasks-suggest-preload', daemon=True).start()
@@ -0,0 +1,66 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, SubTask, Status
+from tasks.status_cache import status_cache
+
+
+class AsyncViewsTest(TestCase):
+    """Async-эндпоинты отдают то же, что синхронные"""
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        now = timezone.now()
+        for i in range(5):
+            task = Task.objects.create(title=f"Задача {i}", description="" if i % 2 else "текст",
+                                       status=self.done if i % 2 else self.todo,
+                                       deadline=now + timedelta(days=i - 2))
+            SubTask.objects.create(title=f"Подзадача {i}", status=self.todo,
+                                   deadline=task.deadline, task=task)
+        self.task = task
+
+    async def assertSameResponse(self, sync_name, async_name, *args, **params):
+        expected = await sync_to_async(self.client.get)(reverse(sync_name, args=args), params)
+        cache.clear()  # async-вью не должно получить готовый ответ синхронного
+        actual = await self.async_client.get(reverse(async_name, args=args), params)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.json(), expected.json())
+        return actual
+
+    async def test_task_list(self):
+        await self.assertSameResponse('api_task_list', 'api_async_task_list')
+        await self.assertSameResponse('api_task_list', 'api_async_task_list', status='Done')
+        await self.assertSameResponse('api_task_list', 'api_async_task_list', overdue='true')
+        page = await self.assertSameResponse('api_task_list', 'api_async_task_list', limit=2)
+        await self.assertSameResponse('api_task_list', 'api_async_task_list',
+                                      limit=2, cursor=page.json()['next'])
+        await self.assertSameResponse('api_task_list', 'api_async_task_list', limit='x')
+
+    async def test_task_detail_and_subtasks(self):
+        await self.assertSameResponse('api_task_detail', 'api_async_task_detail', self.task.id)
+        await self.assertSameResponse('api_task_subtasks', 'api_async_task_subtasks', self.task.id)
+        response = await self.async_client.get(reverse('api_async_task_detail', args=[999]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('api_async_task_subtasks', args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_stats(self):
+        expected = (await sync_to_async(self.client.get)(reverse('api_task_stats'))).json()
+        actual = (await self.async_client.get(reverse('api_async_task_stats'))).json()
+        self.assertEqual(actual['stats'], expected['stats'])
+
+    async def test_cached_and_conditional(self):
+        url = reverse('api_async_task_subtasks', args=[self.task.id])
+        first = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_get_only(self):
+        response = await self.async_client.post(reverse('api_async_task_list'))
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,78 @@
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import counters
+from tasks.models import Task, Status
+from tasks.status_cache import status_cache
+
+
+class BulkCreateTasksTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.url = reverse('api_task_bulk_create')
+        self.deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def post(self, items, **params):
+        url = self.url + ('?batch_size=%d' % params['batch_size'] if params else '')
+        return self.client.post(url, json.dumps(items), content_type='application/json')
+
+    def test_create_many(self):
+        """Все корректные задачи создаются, статус по имени, по id и по умолчанию"""
+        items = [{'title': f'Задача {i}', 'deadline': self.deadline} for i in range(10)]
+        items[0]['status'] = 'Done'
+        items[1]['status_id'] = self.done.id
+        response = self.post(items, batch_size=3)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(len(data['created']), 10)
+        self.assertEqual(data['errors'], {})
+        self.assertEqual(Task.objects.filter(status=self.done).count(), 2)
+        self.assertEqual(Task.objects.filter(status=self.todo).count(), 8)
+        self.assertEqual(counters.read_all()['task'][counters.TOTAL], 10)
+
+    def test_errors_by_index(self):
+        """Ошибки привязаны к индексам, корректные элементы всё равно сохраняются"""
+        items = [
+            {'title': 'ok', 'deadline': self.deadline},
+            {'title': 'без дедлайна'},
+            {'title': 'ok 2', 'deadline': self.deadline, 'status': 'Нет такого'},
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual([c['index'] for c in data['created']], [0])
+        self.assertIn('deadline', data['errors']['1'])
+        self.assertIn('status', data['errors']['2'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_statuses_resolved_once(self):
+        """Число запросов не растёт с числом элементов: статусы — из status_cache"""
+        def queries(n):
+            items = [{'title': f'Задача {i}', 'deadline': self.deadline,
+                      'status_id': self.done.id if i % 2 else self.todo.id} for i in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.post(items).status_code, 201)
+            return len([q for q in ctx.captured_queries if 'tasks_status"' in q['sql']])
+
+        status_cache.all()
+        self.assertEqual(queries(5), 0)
+        self.assertEqual(queries(50), 0)
+
+    def test_past_deadline_rejected(self):
+        """Та же проверка дедлайна, что у /api/tasks/create/"""
+        past = (timezone.now() - timedelta(days=1)).isoformat()
+        data = self.post([{'title': 'ok', 'deadline': self.deadline},
+                          {'title': 'прошлое', 'deadline': past}]).json()
+        self.assertEqual(data['errors']['1']['deadline'], ['Нельзя устанавливать дедлайн в прошлом.'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_rejects_non_array(self):
+        self.assertEqual(self.post({'title': 'x'}).status_code, 400)
+        self.assertEqual(self.post([{'title': 'x'}]).status_code, 400)
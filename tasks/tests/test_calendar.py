@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks import bulk
+from tasks.models import Task, SubTask, Status
+from tasks.status_cache import status_cache
+
+
+def at(day, hour=12):
+    return timezone.make_aware(datetime.fromisoformat(day) + timedelta(hours=hour))
+
+
+class CalendarTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.url = reverse('api_task_calendar')
+        self.task = Task.objects.create(title="A", status=self.todo, deadline=at('2026-03-02'))
+        Task.objects.create(title="B", status=self.done, deadline=at('2026-03-02', 23))
+        Task.objects.create(title="C", status=self.todo, deadline=at('2026-03-04'))
+        SubTask.objects.create(title="S", status=self.done, deadline=at('2026-03-03'), task=self.task)
+        status_cache.all()
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_day_buckets(self):
+        data = self.get(**{'from': '2026-03-01', 'to': '2026-03-04'})
+        self.assertEqual([b['start'] for b in data['buckets']],
+                         ['2026-03-01', '2026-03-02', '2026-03-03', '2026-03-04'])
+        self.assertEqual(data['buckets'][0]['tasks'], {'total': 0, 'by_status': {'To Do': 0, 'Done': 0}})
+        self.assertEqual(data['buckets'][1]['tasks'], {'total': 2, 'by_status': {'To Do': 1, 'Done': 1}})
+        self.assertEqual(data['buckets'][2]['subtasks'], {'total': 1, 'by_status': {'To Do': 0, 'Done': 1}})
+        self.assertEqual(data['timezone'], 'UTC')
+
+    @override_settings(TIME_ZONE='Europe/Moscow')
+    def test_days_in_project_timezone(self):
+        """23:00 UTC 2 марта — это уже 3 марта по Москве"""
+        data = self.get(**{'from': '2026-03-02', 'to': '2026-03-03'})
+        self.assertEqual([b['tasks']['total'] for b in data['buckets']], [1, 1])
+
+    def test_week_and_month_buckets(self):
+        data = self.get(**{'from': '2026-03-04', 'to': '2026-03-10', 'bucket': 'week'})
+        # Границы расширены до целых недель (с понедельника)
+        self.assertEqual((data['from'], data['to']), ('2026-03-02', '2026-03-15'))
+        self.assertEqual([(b['start'], b['tasks']['total']) for b in data['buckets']],
+                         [('2026-03-02', 3), ('2026-03-09', 0)])
+        data = self.get(**{'from': '2026-02-10', 'to': '2026-03-10T10:00:00+00:00', 'bucket': 'month'})
+        self.assertEqual([(b['start'], b['tasks']['total'], b['subtasks']['total']) for b in data['buckets']],
+                         [('2026-02-01', 0, 0), ('2026-03-01', 3, 1)])
+
+    def test_cached_until_write_to_the_day(self):
+        params = {'from': '2026-01-01', 'to': '2026-12-31'}
+        self.get(**params)
+        with self.assertNumQueries(0):
+            self.get(**params)
+
+        # Перенос дедлайна: меняются старый и новый день, остальные берутся из кэша
+        self.task.deadline = at('2026-06-01')
+        self.task.save()
+        with self.assertNumQueries(2):  # по запросу на таблицу за два дня
+            data = self.get(**params)
+        totals = {b['start']: b['tasks']['total'] for b in data['buckets'] if b['tasks']['total']}
+        self.assertEqual(totals, {'2026-03-02': 1, '2026-03-04': 1, '2026-06-01': 1})
+
+        bulk.update_status(Task.objects.filter(deadline__date='2026-03-04'), self.done)
+        data = self.get(**{'from': '2026-03-04', 'to': '2026-03-04'})
+        self.assertEqual(data['buckets'][0]['tasks']['by_status'], {'To Do': 0, 'Done': 1})
+
+    def test_invalid_params(self):
+        for params in [{}, {'from': '2026-03-01'}, {'from': 'вчера', 'to': '2026-03-01'},
+                       {'from': '2026-03-02', 'to': '2026-03-01'},
+                       {'from': '2026-03-01', 'to': '2026-03-02', 'bucket': 'year'},
+                       {'from': '2000-01-01', 'to': '2026-01-01'}]:
+            with self.subTest(params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connections, transaction
+from django.test import Client, SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks import db
+from tasks.models import Status, SubTask, Task
+from tasks.status_cache import status_cache
+
+
+class PragmaConfigTest(SimpleTestCase):
+
+    def test_profiles_and_env_overrides(self):
+        self.assertEqual(db.pragmas('default', environ={}), {})
+        production = db.pragmas('production', environ={'TASKS_SQLITE_BUSY_TIMEOUT': '100'})
+        self.assertEqual(production['journal_mode'], 'WAL')
+        self.assertEqual(production['busy_timeout'], '100')
+
+    def test_invalid_configuration(self):
+        with self.assertRaises(ImproperlyConfigured):
+            db.pragmas('fast', environ={})
+        with self.assertRaises(ImproperlyConfigured):
+            db.pragmas('production', environ={'TASKS_SQLITE_SYNCHRONOUS': 'OFF; DROP TABLE x'})
+
+
+class ConnectionSetupTest(SimpleTestCase):
+
+    @override_settings(TASKS_DB_PROFILE='production')
+    def test_pragmas_applied_on_connection_created(self):
+        # Новое соединение: у соединения тестов уже открыта транзакция
+        new_connection = connections.create_connection('default')
+        self.addCleanup(new_connection.close)
+        with new_connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+@override_settings(TASKS_DB_PROFILE='production')
+class ConcurrencyTest(TransactionTestCase):
+    """
+    Настоящие api_create_task / api_create_subtask и api_task_list из нескольких
+    потоков, у каждого своё соединение Django. Тестовая БД — в памяти, а WAL
+    бывает только у файла, поэтому потоки работают с файловой копией её схемы.
+    """
+    # Копия базы — со строками из миграций (счётчики StatCounter), даже если их снёс предыдущий TransactionTestCase
+    serialized_rollback = True
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        # Снимок статусов из файловой базы не должен достаться другим тестам
+        self.addCleanup(status_cache.clear)
+        self.addCleanup(cache.clear)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'db.sqlite3')
+        source = connections['default']
+        source.ensure_connection()
+        target = sqlite3.connect(self.path)
+        source.connection.backup(target)
+        # Без соединений Django: режим журнала файла задаёт профиль самого теста
+        with target:
+            self.status_id = target.execute(
+                f"INSERT INTO {Status._meta.db_table} (name) VALUES ('To Do')").lastrowid
+        target.close()
+        self.deadline = (timezone.now() + timedelta(days=1)).isoformat()
+
+    def run_threads(self, *targets):
+        """Выполнить функции в потоках с соединениями к файловой базе; их результаты по порядку"""
+        results, errors = [None] * len(targets), []
+
+        def worker(index, target):
+            connection = connections['default'].__class__(
+                {**connections['default'].settings_dict, 'NAME': self.path}, 'default')
+            connections['default'] = connection  # только для этого потока
+            try:
+                results[index] = target()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=item) for item in enumerate(targets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        if errors:
+            raise errors[0]
+        return results
+
+    def post(self, client, name, data):
+        response = client.post(reverse(name), json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def count_tasks(self):
+        response = Client().get(reverse('api_task_list'))
+        self.assertEqual(response.status_code, 200)
+        return len(response.json()['tasks'])
+
+    def test_concurrent_writers_and_readers(self):
+        """Писатели ждут друг друга (busy_timeout), а не падают с "database is locked" """
+        def writer():
+            client = Client()
+            for i in range(5):
+                task = self.post(client, 'api_task_create', {'title': f'Задача {i}', 'deadline': self.deadline})
+                self.post(client, 'api_subtask_create', {
+                    'title': f'Подзадача {i}', 'deadline': self.deadline,
+                    'task_id': task['task']['id'], 'status_id': self.status_id})
+
+        def reader():
+            return [self.count_tasks() for _ in range(10)]
+
+        results = self.run_threads(*[writer] * 4, *[reader] * 2)
+        for counts in results[4:]:
+            self.assertEqual(counts, sorted(counts))  # видны только закоммиченные задачи, без отката
+        self.assertEqual(self.run_threads(lambda: (Task.objects.count(), SubTask.objects.count()))[0], (20, 20))
+
+    def hold_write(self, reader):
+        """
+        Выполнить ``reader`` в другом потоке, пока открыта большая транзакция записи
+        (api_create_task и пачка задач, как при импорте). Кэш страниц писателя мал,
+        и транзакция сбрасывает страницы в файл до коммита — как крупная запись.
+        """
+        written, released = threading.Event(), threading.Event()
+
+        def writer():
+            with connections['default'].cursor() as cursor:
+                cursor.execute('PRAGMA cache_size = 10')
+            with transaction.atomic():
+                self.post(Client(), 'api_task_create', {'title': 'Задача', 'deadline': self.deadline})
+                Task.objects.bulk_create([Task(title=f'Пачка {i}', status_id=self.status_id, deadline=self.deadline)
+                                          for i in range(2000)])
+                written.set()
+                released.wait(10)
+
+        def wrapped():
+            self.assertTrue(written.wait(10))
+            with connections['default'].cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout = 0')  # блокировка — сразу ошибка
+            try:
+                return reader()
+            finally:
+                released.set()
+
+        return self.run_threads(writer, wrapped)[1]
+
+    def test_wal_reader_not_blocked(self):
+        """Пока запись не закоммичена, список читается сразу — последнее закоммиченное состояние"""
+        self.assertEqual(self.hold_write(self.count_tasks), 0)
+        self.assertEqual(self.run_threads(Task.objects.count), [2001])
+
+    @override_settings(TASKS_DB_PROFILE='default')
+    def test_default_profile_reader_blocked(self):
+        with self.assertRaisesRegex(OperationalError, 'locked'):
+            self.hold_write(Task.objects.count)
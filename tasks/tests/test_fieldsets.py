@@ -0,0 +1,100 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, SubTask, Status
+from tasks.serializers import SubTaskDetailSerializer, TaskDetailSerializer
+from tasks.status_cache import status_cache
+
+
+class FieldsetsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        self.todo = Status.objects.create(name="To Do")
+        deadline = timezone.now() + timedelta(days=1)
+        self.task = Task.objects.create(title="Задача", description="Длинное описание " * 50,
+                                        status=self.todo, deadline=deadline)
+        for i in range(3):
+            SubTask.objects.create(title=f"Подзадача {i}", description="текст", status=self.todo,
+                                   deadline=deadline, task=self.task)
+        self.task.refresh_from_db()  # сводка по подзадачам (tasks.rollup) записана UPDATE-ом
+
+    def get(self, name, *args, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name, args=args), params)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def subtask_ids(self):
+        return list(SubTask.objects.order_by('id').values_list('id', flat=True))
+
+    def test_list_projection(self):
+        status_cache.all()
+        response, queries = self.get('api_task_list', fields='id,title,status')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tasks'], [
+            {'id': self.task.id, 'title': 'Задача', 'status': 'To Do'}])
+        task_select = next(sql for sql in queries if 'FROM "tasks_task"' in sql)
+        self.assertNotIn('"description"', task_select)
+
+        full = self.client.get(reverse('api_task_list')).json()['tasks'][0]
+        self.assertEqual(set(full), {'id', 'title', 'description', 'status', 'deadline', 'is_overdue',
+                                     'subtask_total', 'subtask_done', 'next_subtask_deadline'})
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('api_task_list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('api_task_detail', args=[self.task.id]), {'expand': 'owner'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_without_expand_skips_subtasks(self):
+        response, queries = self.get('api_task_detail', self.task.id, fields='id,title')
+        self.assertEqual(response.json(), {'id': self.task.id, 'title': 'Задача'})
+        self.assertFalse([sql for sql in queries if 'tasks_subtask' in sql])
+
+    @override_settings(TASKS_JSON_RENDERER='stdlib')
+    def test_detail_matches_drf_serializer(self):
+        """Быстрый путь отдаёт байт в байт то же, что TaskDetailSerializer"""
+        expected = JsonResponse(TaskDetailSerializer(self.task).data,
+                                json_dumps_params={'ensure_ascii': False}).content
+        url = reverse('api_task_detail', args=[self.task.id])
+        self.assertEqual(self.client.get(url).content, expected)
+        cache.clear()
+        self.assertEqual(self.client.get(url, {'expand': 'subtasks'}).content, expected)
+
+    @override_settings(TASKS_JSON_RENDERER='stdlib')
+    def test_subtasks_projection_and_expand(self):
+        url = 'api_task_subtasks'
+        response, queries = self.get(url, self.task.id, fields='id,title')
+        self.assertEqual(response.json()['subtasks'][0], {'id': self.subtask_ids()[0], 'title': 'Подзадача 0'})
+        self.assertFalse([sql for sql in queries if '"description"' in sql and 'tasks_subtask' in sql])
+
+        expected = JsonResponse({
+            'subtasks': SubTaskDetailSerializer(self.task.subtasks.all(), many=True).data,
+            'task_id': self.task.id,
+        }, json_dumps_params={'ensure_ascii': False}).content
+        self.assertEqual(self.client.get(reverse(url, args=[self.task.id])).content, expected)
+        self.assertEqual(self.client.get(reverse(url, args=[self.task.id]), {'expand': 'task'}).content,
+                         expected)
+
+    def test_subtasks_serialization_queries(self):
+        """Без DRF: статус и задача не подгружаются по одной на подзадачу"""
+        status_cache.all()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('api_task_subtasks', args=[self.task.id]))
+
+    async def test_async_views_support_fields(self):
+        for sync_name, async_name, args, params in [
+            ('api_task_list', 'api_async_task_list', [], {'fields': 'title,is_overdue'}),
+            ('api_task_detail', 'api_async_task_detail', [self.task.id], {'fields': 'status', 'expand': 'subtasks'}),
+            ('api_task_subtasks', 'api_async_task_subtasks', [self.task.id], {'fields': 'deadline', 'expand': 'task'}),
+        ]:
+            expected = await sync_to_async(self.client.get)(reverse(sync_name, args=args), params)
+            actual = await self.async_client.get(reverse(async_name, args=args), params)
+            self.assertEqual(actual.json(), expected.json())
@@ -0,0 +1,64 @@
+import time
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk
+from tasks.scheduler import DeadlineScheduler
+from tasks.models import Task, SubTask, Status
+
+
+class ResponseCacheTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        deadline = timezone.now() + timedelta(days=1)
+        self.task = Task.objects.create(title="Кэш", status=self.todo, deadline=deadline)
+        self.subtask = SubTask.objects.create(title="Под", status=self.todo,
+                                              deadline=deadline, task=self.task)
+        self.list_url = reverse('api_task_list')
+        self.subtasks_url = reverse('api_task_subtasks', args=[self.task.id])
+
+    def test_repeated_read_hits_cache(self):
+        """Повторный GET не трогает БД и отдаёт тот же ETag"""
+        first = self.client.get(self.list_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_conditional_get(self):
+        """If-None-Match с текущим ETag — 304 без тела"""
+        etag = self.client.get(self.subtasks_url)['ETag']
+        response = self.client.get(self.subtasks_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_writes_invalidate(self):
+        """Запись задачи, подзадачи или массовая смена статуса меняют ETag"""
+        list_etag = self.client.get(self.list_url)['ETag']
+        self.task.title = "Кэш 2"
+        self.task.save()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tasks'][0]['title'], "Кэш 2")
+
+        etag = self.client.get(self.subtasks_url)['ETag']
+        bulk.update_status(SubTask.objects.filter(pk=self.subtask.pk), self.done)
+        response = self.client.get(self.subtasks_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_overdue_transition_invalidates_list(self):
+        """Планировщик отметил задачу просроченной — закэшированный список устарел"""
+        Task.objects.create(title="Скоро", status=self.todo,
+                            deadline=timezone.now() + timedelta(milliseconds=50))
+        self.client.get(self.list_url)
+        time.sleep(0.1)
+        DeadlineScheduler().tick()
+        data = self.client.get(self.list_url).json()
+        soon = [t for t in data['tasks'] if t['title'] == "Скоро"][0]
+        self.assertTrue(soon['is_overdue'])
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from tasks.models import Task, SubTask, Status, ImportCheckpoint
+from tasks.management.commands import import_tasks
+
+
+class ImportTasksCommandTest(TestCase):
+
+    def setUp(self):
+        Status.objects.create(name="To Do")
+        Status.objects.create(name="Done")
+        fd, self.path = tempfile.mkstemp(suffix='.ndjson')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for i in range(10):
+                f.write(json.dumps({
+                    'title': f'Задача {i}',
+                    'deadline': '2030-01-01T10:00:00Z',
+                    'status': 'Done' if i % 2 else 'To Do',
+                    'subtasks': [
+                        {'title': f'Подзадача {i}.{j}', 'deadline': '2030-01-01T09:00:00'}
+                        for j in range(i % 3)
+                    ],
+                }, ensure_ascii=False) + '\n')
+            f.write('{битая строка\n')
+        self.addCleanup(os.remove, self.path)
+
+    def run_import(self, *args):
+        out = StringIO()
+        call_command('import_tasks', self.path, *args, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_import(self):
+        """Задачи и подзадачи загружаются, некорректная строка пропускается"""
+        out = self.run_import('--chunk-size', '3')
+        self.assertIn('пропущено строк 1', out)
+        self.assertEqual(Task.objects.count(), 10)
+        self.assertEqual(SubTask.objects.count(), sum(i % 3 for i in range(10)))
+        task = Task.objects.get(title='Задача 5')
+        self.assertEqual(task.status.name, 'Done')
+        self.assertEqual(task.subtasks.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().line, 11)
+
+    def test_resume_after_crash(self):
+        """После сбоя импорт продолжается с последней закоммиченной строки"""
+        original = import_tasks.Command.commit_chunk
+        calls = []
+
+        def crash_on_second_chunk(command, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(command, *args, **kwargs)
+
+        with mock.patch.object(import_tasks.Command, 'commit_chunk', crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import('--chunk-size', '4')
+        self.assertEqual(Task.objects.count(), 4)
+        self.assertEqual(ImportCheckpoint.objects.get().line, 4)
+
+        out = self.run_import('--chunk-size', '4')
+        self.assertIn('Продолжаем со строки 5', out)
+        self.assertEqual(Task.objects.count(), 10)
+        self.assertEqual(Task.objects.filter(title='Задача 0').count(), 1)
+
+    def test_wrong_field_types_skip_record(self):
+        """status/description не строкой — запись пропускается, импорт идёт дальше"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for bad in [{'status': ['Done']}, {'status': {}}, {'description': 5},
+                        {'subtasks': [{'title': 'П', 'deadline': '2030-01-01T09:00:00', 'status': ['x']}]}]:
+                f.write(json.dumps({'title': 'Плохая', 'deadline': '2030-01-01T10:00:00Z', **bad}) + '\n')
+        out = self.run_import()
+        self.assertIn('пропущено строк 5', out)
+        self.assertEqual(Task.objects.count(), 10)
+
+    def test_strict(self):
+        """--strict останавливает импорт на некорректной строке"""
+        with self.assertRaises(CommandError):
+            self.run_import('--strict')
@@ -0,0 +1,105 @@
+import re
+import tempfile
+import threading
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.metrics import Registry, registry, render
+from tasks.models import Task, Status
+
+
+def sample(text, series):
+    """Значение ряда ``series`` (имя с метками) из вывода /metrics"""
+    match = re.search(r'^' + re.escape(series) + r' (\S+)$', text, re.M)
+    return float(match.group(1)) if match else None
+
+
+class MetricsEndpointTest(TestCase):
+
+    def setUp(self):
+        todo = Status.objects.create(name="To Do")
+        Task.objects.create(title="Задача", status=todo, deadline=timezone.now() + timedelta(days=1))
+        registry.clear()
+
+    def metrics(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_request_metrics(self):
+        url = reverse('api_task_list')
+        self.client.get(url)
+        self.client.get(url)
+        self.client.post(url)
+        text = self.metrics()
+
+        self.assertEqual(sample(text, 'tasks_http_requests_total{view="api_task_list",method="GET",status="200"}'), 2)
+        self.assertEqual(sample(text, 'tasks_http_requests_total{view="api_task_list",method="POST",status="405"}'), 1)
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_count{view="api_task_list"}'), 3)
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_bucket{view="api_task_list",le="+Inf"}'), 3)
+        self.assertGreater(sample(text, 'tasks_http_request_db_queries_total{view="api_task_list"}'), 0)
+        self.assertIn('# TYPE tasks_http_request_db_seconds histogram', text)
+        # Второй GET — из кэша ответов
+        self.assertEqual(sample(text, 'tasks_cache_requests_total{cache="response",result="hit"}'), 1)
+        self.assertEqual(sample(text, 'tasks_cache_hit_ratio{cache="response"}'), 0.5)
+
+
+class RegistryTest(SimpleTestCase):
+
+    def test_threads_write_own_buffers(self):
+        local = Registry()
+
+        def work():
+            for _ in range(1000):
+                local.inc('tasks_http_requests_total', (('view', 'x'),))
+                local.observe('tasks_http_request_duration_seconds', (('view', 'x'),), 0.02)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = local.snapshot()
+        self.assertEqual(snapshot['counters'][('tasks_http_requests_total', (('view', 'x'),))], 4000)
+        self.assertEqual(snapshot['histograms'][('tasks_http_request_duration_seconds', (('view', 'x'),))][-1], 4000)
+
+    def test_finished_threads_are_folded(self):
+        """Поток на запрос: буферы завершившихся потоков не копятся"""
+        local = Registry()
+        for _ in range(50):
+            thread = threading.Thread(target=local.inc, args=('tasks_http_requests_total', (('view', 'x'),)))
+            thread.start()
+            thread.join()
+        local.observe('tasks_http_request_duration_seconds', (('view', 'x'),), 0.02)
+        snapshot = local.snapshot()
+        self.assertEqual(snapshot['counters'][('tasks_http_requests_total', (('view', 'x'),))], 50)
+        self.assertEqual(len(local._buffers), 1)  # только буфер текущего потока
+        self.assertEqual(local.snapshot(), snapshot)
+
+    def test_histogram_buckets_are_cumulative(self):
+        local = Registry()
+        for value in (0.0005, 0.003, 0.003, 20):
+            local.observe('tasks_http_request_duration_seconds', (('view', 'x'),), value)
+        text = render(local.snapshot())
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_bucket{view="x",le="0.001"}'), 1)
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_bucket{view="x",le="0.005"}'), 3)
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_bucket{view="x",le="10"}'), 3)
+        self.assertEqual(sample(text, 'tasks_http_request_duration_seconds_bucket{view="x",le="+Inf"}'), 4)
+        self.assertAlmostEqual(sample(text, 'tasks_http_request_duration_seconds_sum{view="x"}'), 20.0065)
+
+    def test_processes_aggregate_through_files(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(TASKS_METRICS_DIR=directory):
+            workers = [Registry(), Registry()]
+            workers[1]._name += '-other'  # как второй процесс
+            for n, worker in enumerate(workers, 1):
+                worker.inc('tasks_http_requests_total', (('view', 'x'),), n)
+                worker.observe('tasks_http_request_db_seconds', (('view', 'x'),), 0.002)
+                worker.flush()
+
+            workers[0].inc('tasks_http_requests_total', (('view', 'x'),))  # ещё не сброшено
+            text = render(workers[0].collect())
+            self.assertEqual(sample(text, 'tasks_http_requests_total{view="x"}'), 4)
+            self.assertEqual(sample(text, 'tasks_http_request_db_seconds_count{view="x"}'), 2)
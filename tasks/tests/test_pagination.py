@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, Status
+
+
+class TaskListPaginationTest(TestCase):
+
+    def setUp(self):
+        """Настройка тестовых данных: 7 задач, две с одинаковым дедлайном"""
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        base = timezone.now() + timedelta(days=1)
+        self.tasks = []
+        for i in range(7):
+            deadline = base if i < 2 else base + timedelta(hours=i)
+            self.tasks.append(Task.objects.create(
+                title=f"Task {i}",
+                status=self.done if i % 2 else self.todo,
+                deadline=deadline
+            ))
+        self.url = reverse('api_task_list')
+
+    def expected_order(self, tasks):
+        return [t.id for t in sorted(tasks, key=lambda t: (t.deadline, t.id), reverse=True)]
+
+    def test_walk_forward_and_back(self):
+        """Проход вперёд по курсорам даёт весь список в порядке -deadline, -id, и назад тоже"""
+        seen, pages, cursor = [], [], None
+        while True:
+            params = {'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.url, params).json()
+            pages.append(data)
+            seen.extend(t['id'] for t in data['tasks'])
+            cursor = data['next']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, self.expected_order(self.tasks))
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['prev'])
+
+        back = self.client.get(self.url, {'limit': 3, 'cursor': pages[2]['prev']}).json()
+        self.assertEqual(back['tasks'], pages[1]['tasks'])
+
+    def test_filters_are_kept(self):
+        """Фильтр по статусу работает вместе с пагинацией"""
+        data = self.client.get(self.url, {'status': 'Done', 'limit': 100}).json()
+        expected = [t for t in self.tasks if t.status_id == self.done.id]
+        self.assertEqual([t['id'] for t in data['tasks']], self.expected_order(expected))
+        self.assertIsNone(data['next'])
+
+    def test_without_limit_and_cursor_returns_all(self):
+        """Клиенты без limit и cursor получают весь список, как до пагинации"""
+        with mock.patch('tasks.views.DEFAULT_PAGE_SIZE', 3):
+            data = self.client.get(self.url).json()
+            self.assertEqual([t['id'] for t in data['tasks']], self.expected_order(self.tasks))
+            self.assertEqual((data['count'], data['limit'], data['next']), (7, None, None))
+
+            # С курсором без limit — страница размера по умолчанию
+            cursor = self.client.get(self.url, {'limit': 2}).json()['next']
+            data = self.client.get(self.url, {'cursor': cursor}).json()
+            self.assertEqual([t['id'] for t in data['tasks']], self.expected_order(self.tasks)[2:5])
+            self.assertEqual(data['limit'], 3)
+
+    def test_invalid_cursor(self):
+        """Повреждённый курсор или limit — ошибка 400"""
+        self.assertEqual(self.client.get(self.url, {'cursor': 'garbage!'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 'abc'}).status_code, 400)
@@ -0,0 +1,150 @@
+import json
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, SubTask, Status
+from tasks.query_budget import (QueryBudgetAssertions, QueryBudgetExceeded, QueryBudgetMiddleware,
+                                QueryStats, fingerprint, query_budget)
+from tasks.status_cache import status_cache
+
+
+class FingerprintTest(SimpleTestCase):
+
+    def test_values_are_dropped(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id = 5 AND name = \'a\'\'b\' LIMIT 21'),
+                         'SELECT * FROM t WHERE id = ? AND name = ? LIMIT ?')
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+                         fingerprint('SELECT * FROM t WHERE id IN (%s)'))
+
+
+class MiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+
+    def call(self, budget, queries, method='get'):
+        @query_budget(*budget)
+        def view(request):
+            for _ in range(queries):
+                list(Status.objects.filter(id=self.todo.id))
+            return HttpResponse()
+
+        request = getattr(RequestFactory(), method)('/')
+        middleware = QueryBudgetMiddleware(lambda request: view(request))
+        middleware.process_view(request, view, (), {})
+        self.response = middleware(request)
+        return request.query_stats
+
+    def test_stats(self):
+        stats = self.call((None, None), 3)
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(list(stats.duplicates.values()), [3])
+
+    def test_over_budget_raises(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3 queries, budget 2'):
+            self.call((2, None), 3)
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3x SELECT'):
+            self.call((None, 1), 3)
+
+    def test_write_over_budget_does_not_raise(self):
+        """POST уже закоммичен — превышение в лог и заголовок, а не 500"""
+        with self.assertLogs('tasks.query_budget', 'WARNING'):
+            self.call((2, None), 3, method='post')
+        self.assertEqual(self.response['Query-Budget-Exceeded'], '3 queries, budget 2')
+
+    def test_transaction_control_is_not_duplicate(self):
+        """Два atomic() во вью — два BEGIN, но это не N+1"""
+        stats = QueryStats()
+        for sql in ['BEGIN', 'SELECT 1', 'BEGIN', 'RELEASE SAVEPOINT "s1_x1"', 'RELEASE SAVEPOINT "s1_x1"']:
+            stats.record(sql, 0)
+        self.assertEqual(stats.count, 5)
+        self.assertEqual(stats.duplicates, {})
+
+    @override_settings(TASKS_QUERY_BUDGET_RAISE=False)
+    def test_over_budget_logs_in_production(self):
+        with self.assertLogs('tasks.query_budget', 'WARNING') as logs:
+            self.call((1,), 2)
+        self.assertIn('2 queries, budget 1', logs.output[0])
+
+    @override_settings(DEBUG=True, TASKS_QUERY_BUDGET_RAISE=False)
+    def test_over_budget_logs_under_debug(self):
+        """runserver с DEBUG не отдаёт 500 за превышение — только предупреждение"""
+        with self.assertLogs('tasks.query_budget', 'WARNING'):
+            self.call((1,), 2)
+        self.assertEqual(self.response.status_code, 200)
+
+
+class EndpointQueriesTest(QueryBudgetAssertions, TestCase):
+    """Число запросов эндпоинтов не зависит от числа строк в ответе"""
+
+    def setUp(self):
+        status_cache.clear()
+        statuses = [Status.objects.create(name=name) for name in ("To Do", "In Progress", "Done")]
+        deadline = timezone.now() + timedelta(days=1)
+        self.task = None
+        for i in range(6):
+            task = Task.objects.create(title=f"Задача {i}", status=statuses[i % 3], deadline=deadline)
+            SubTask.objects.create(title=f"Подзадача {i}", status=statuses[i % 3],
+                                   deadline=deadline, task=task)
+            self.task = self.task or task
+        status_cache.all()
+
+    def test_html_list_has_no_n_plus_one(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Список задач (6)')
+        self.assertRequestQueries(response, 1)
+        self.assertNoDuplicateQueries(response)
+
+    def test_read_endpoints(self):
+        for name, args, expected in [
+            ('api_task_list', [], 1),
+            ('api_task_detail', [self.task.id], 2),
+            ('api_task_subtasks', [self.task.id], 2),
+        ]:
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+                self.assertRequestQueries(response, expected)
+                self.assertNoDuplicateQueries(response)
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('api_task_list'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="1 queries"$')
+
+    async def test_async_view_is_counted(self):
+        response = await self.async_client.get(reverse('api_async_task_detail', args=[self.task.id]))
+        self.assertEqual(response.status_code, 200)
+        # Запросы идут в потоке sync_to_async, но учитываются для этого запроса
+        self.assertRequestQueries(response, 2)
+
+
+class WriteEndpointsColdPathTest(TransactionTestCase):
+    """Бюджеты записи — по холодному пути: новая база, пустые кэши, настоящие BEGIN/COMMIT"""
+    # Строки из миграций (счётчики StatCounter), даже если их снёс предыдущий TransactionTestCase
+    serialized_rollback = True
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        # База очищается после теста, а снимок статусов остался бы в процессе
+        self.addCleanup(status_cache.clear)
+        self.addCleanup(cache.clear)
+
+    def post(self, name, data):
+        response = self.client.post(reverse(name), json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertNotIn('Query-Budget-Exceeded', response)
+        return response.json()
+
+    def test_create_task_and_subtask(self):
+        deadline = (timezone.now() + timedelta(days=1)).isoformat()
+        task = self.post('api_task_create', {'title': 'Задача', 'deadline': deadline})['task']
+        cache.clear()
+        status_cache.clear()
+        self.post('api_subtask_create', {'title': 'Подзадача', 'deadline': deadline, 'task_id': task['id'],
+                                         'status_id': Status.objects.get().id})
@@ -0,0 +1,138 @@
+import io
+import json
+import re
+from contextlib import redirect_stdout
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk, stats
+from tasks.models import Task, SubTask, Status
+from tasks.orm_operations import perform_all_orm_operations
+from tasks.scheduler import DeadlineScheduler
+
+# Таблицы ограниченного размера: полный проход по ним допустим
+SMALL_TABLES = {'tasks_status', 'tasks_statcounter', 'tasks_importcheckpoint'}
+
+FULL_SCAN = re.compile(r'\bSCAN (\w+)(?: AS \w+)?$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN — синтаксис SQLite')
+class QueryPlanTest(TestCase):
+    """
+    Регрессия индексов: каждый SELECT эндпоинтов, админки и orm_operations
+    прогоняется через EXPLAIN QUERY PLAN на заполненной базе. Тест падает,
+    если запрос к таблице приложения уходит в полный просмотр таблицы
+    (SCAN без USING INDEX).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.todo = Status.objects.create(name="To Do")
+        cls.done = Status.objects.create(name="Done")
+        now = timezone.now()
+        tasks = bulk.create(Task, [
+            Task(title=f"Task {i}", description="text" if i % 5 else "",
+                 status=cls.done if i % 3 else cls.todo,
+                 deadline=now + timedelta(hours=i - 100))
+            for i in range(300)
+        ])
+        bulk.create(SubTask, [
+            SubTask(title=f"Sub {i}", description="" if i % 7 == 0 else "text", status=cls.todo,
+                    deadline=task.deadline, task=task)
+            for i, task in enumerate(tasks) for _ in range(2)
+        ])
+        cls.task = tasks[0]
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        # Ответы эндпоинтов кэшируются — нужны реальные запросы к БД
+        cache.clear()
+
+    def assertNoFullScans(self, action):
+        with CaptureQueriesContext(connection) as ctx:
+            action()
+        selects = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, 'ни одного SELECT не выполнено')
+        problems = []
+        with connection.cursor() as cursor:
+            for sql in selects:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                for row in cursor.fetchall():
+                    match = FULL_SCAN.search(row[-1])
+                    if match and match.group(1).startswith('tasks_') \
+                            and match.group(1) not in SMALL_TABLES:
+                        problems.append(f'{row[-1]}\n    {sql}')
+        self.assertFalse(problems, 'Полный просмотр таблицы:\n' + '\n'.join(problems))
+
+    def get(self, name, *args, **params):
+        return lambda: self.assertEqual(
+            self.client.get(reverse(name, args=args), params).status_code, 200)
+
+    def test_task_list(self):
+        self.assertNoFullScans(self.get('api_task_list'))
+        self.assertNoFullScans(self.get('api_task_list', status='To Do'))
+        self.assertNoFullScans(self.get('api_task_list', overdue='true'))
+        cursor = self.client.get(reverse('api_task_list'), {'status': 'Done', 'limit': 5}).json()['next']
+        self.assertNoFullScans(self.get('api_task_list', status='Done', limit=5, cursor=cursor))
+
+    def test_task_detail_and_subtasks(self):
+        self.assertNoFullScans(self.get('api_task_detail', self.task.id))
+        self.assertNoFullScans(self.get('api_task_subtasks', self.task.id))
+
+    def test_stats(self):
+        self.assertNoFullScans(self.get('api_task_stats'))
+
+    def test_calendar(self):
+        today = timezone.localdate()
+        self.assertNoFullScans(self.get('api_task_calendar', **{
+            'from': (today - timedelta(days=10)).isoformat(), 'to': (today + timedelta(days=10)).isoformat()}))
+
+    def test_overdue_scheduler(self):
+        """Проход планировщика: поиск наступивших и загрузка кучи — по индексу is_overdue"""
+        self.assertNoFullScans(lambda: DeadlineScheduler().tick(timezone.now() + timedelta(hours=2)))
+
+    def test_description_filters(self):
+        self.assertNoFullScans(lambda: Task.objects.filter(description='').count())
+        self.assertNoFullScans(lambda: SubTask.objects.filter(description='').count())
+
+    def test_status_transitions(self):
+        def transition():
+            response = self.client.post(reverse('api_status_transitions'), json.dumps({
+                'status': 'Done',
+                'target': 'both',
+                'filter': {'status': 'To Do',
+                           'deadline_to': (timezone.now() + timedelta(days=1)).isoformat()},
+                'chunk_size': 50,
+            }), content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        self.assertNoFullScans(transition)
+
+    def test_admin_changelists(self):
+        self.client.force_login(self.admin)
+        for model in ('task', 'subtask'):
+            url = f'admin:tasks_{model}_changelist'
+            self.assertNoFullScans(self.get(url))
+            self.assertNoFullScans(self.get(url, status__id__exact=self.todo.id))
+            self.assertNoFullScans(self.get(url, deadline__year=timezone.now().year))
+            # search_fields через FTS5, а не LIKE по всей таблице
+            self.assertNoFullScans(self.get(url, q='Task 1'))
+
+    def test_orm_operations(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertNoFullScans(perform_all_orm_operations)
+
+    def test_rebuild_stats_is_single_pass(self):
+        """Полный пересчёт — один проход по таблице, а не по разу на метрику"""
+        with CaptureQueriesContext(connection) as ctx:
+            stats.table_stats(Task, [self.todo, self.done], timezone.now())
+        self.assertEqual(len(ctx.captured_queries), 1)
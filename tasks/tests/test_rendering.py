@@ -0,0 +1,65 @@
+import json
+import unittest
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import JsonResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import rendering
+from tasks.models import Task, Status
+
+
+class DumpsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.data = {'title': 'Задача', 'deadline': timezone.now(), 'count': Decimal('1.5'),
+                     'items': [1, None, True]}
+
+    @override_settings(TASKS_JSON_RENDERER='stdlib')
+    def test_stdlib_matches_json_response(self):
+        data = {'message': 'Готово', 'task': {'id': 1, 'deadline': None}}
+        expected = JsonResponse(data, json_dumps_params={'ensure_ascii': False}).content
+        self.assertEqual(rendering.json_response(data).content, expected)
+
+    @override_settings(TASKS_JSON_RENDERER='stdlib')
+    def test_stdlib_encodes_datetime(self):
+        decoded = json.loads(rendering.dumps(self.data))
+        self.assertEqual(decoded['deadline'], self.data['deadline'].isoformat())
+        self.assertEqual(decoded['count'], '1.5')
+
+    @unittest.skipIf(rendering.orjson is None, 'orjson не установлен')
+    def test_backends_agree(self):
+        with self.settings(TASKS_JSON_RENDERER='stdlib'):
+            stdlib = json.loads(rendering.dumps(self.data))
+        with self.settings(TASKS_JSON_RENDERER='orjson'):
+            self.assertEqual(rendering.backend(), 'orjson')
+            self.assertEqual(json.loads(rendering.dumps(self.data)), stdlib)
+
+    @override_settings(TASKS_JSON_RENDERER='simdjson')
+    def test_unknown_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            rendering.dumps({})
+
+
+class RenderedViewsTest(TestCase):
+
+    def setUp(self):
+        todo = Status.objects.create(name="To Do")
+        self.deadline = timezone.now() + timedelta(days=1)
+        Task.objects.create(title="Задача", status=todo, deadline=self.deadline)
+
+    def test_task_list_with_each_backend(self):
+        backends = ['stdlib'] + (['orjson'] if rendering.orjson is not None else [])
+        for name in backends:
+            with self.subTest(backend=name), self.settings(TASKS_JSON_RENDERER=name):
+                cache.clear()
+                response = self.client.get(reverse('api_task_list'))
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.json()['tasks'][0]['deadline'], self.deadline.isoformat())
+                stream = self.client.get(reverse('api_task_list'), {'format': 'ndjson'})
+                row = json.loads(b''.join(stream.streaming_content))
+                self.assertEqual(row['deadline'], self.deadline.isoformat())
@@ -0,0 +1,113 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from tasks import bulk
+from tasks.models import Task, SubTask, Status
+from tasks.status_cache import status_cache
+
+
+class SubtaskRollupTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.now = timezone.now().replace(microsecond=0)
+        self.task = Task.objects.create(title="Задача", status=self.todo, deadline=self.now + timedelta(days=10))
+        self.other = Task.objects.create(title="Другая", status=self.todo, deadline=self.now + timedelta(days=10))
+
+    def subtask(self, days, status=None, task=None):
+        return SubTask.objects.create(title=f"Подзадача {days}", status=status or self.todo,
+                                      deadline=self.now + timedelta(days=days), task=task or self.task)
+
+    def rollup(self, task=None):
+        return Task.objects.values_list('subtask_total', 'subtask_done', 'next_subtask_deadline').get(
+            pk=(task or self.task).pk)
+
+    def days(self, n):
+        return self.now + timedelta(days=n)
+
+    def test_create_update_delete(self):
+        self.assertEqual(self.rollup(), (0, 0, None))
+        first = self.subtask(3)
+        second = self.subtask(1)
+        self.subtask(2, status=self.done)
+        self.assertEqual(self.rollup(), (3, 1, self.days(1)))
+
+        second.status = self.done
+        second.save()
+        self.assertEqual(self.rollup(), (3, 2, self.days(3)))
+
+        first.deadline = self.days(-1)  # просроченная подзадача — тоже «ближайшая»
+        first.save()
+        self.assertEqual(self.rollup(), (3, 2, self.days(-1)))
+
+        first.delete()
+        self.assertEqual(self.rollup(), (2, 2, None))
+
+    def test_reparent_updates_both_tasks(self):
+        subtask = self.subtask(1)
+        subtask.task = self.other
+        subtask.save()
+        self.assertEqual(self.rollup(), (0, 0, None))
+        self.assertEqual(self.rollup(self.other), (1, 0, self.days(1)))
+
+    def test_stale_task_save_keeps_rollup(self):
+        """Task.save() экземпляра, загруженного до записи подзадач, сводку не затирает"""
+        self.subtask(1)
+        self.task.title = "Переименована"
+        self.task.save()
+        self.assertEqual(self.rollup(), (1, 0, self.days(1)))
+
+    def test_bulk_paths(self):
+        bulk.create(SubTask, [SubTask(title=f"П{i}", status=self.todo, deadline=self.days(i + 1),
+                                      task=self.task if i % 2 else self.other) for i in range(4)])
+        self.assertEqual(self.rollup(), (2, 0, self.days(2)))
+        self.assertEqual(self.rollup(self.other), (2, 0, self.days(1)))
+
+        bulk.update_status(SubTask.objects.filter(task=self.other), self.done)
+        self.assertEqual(self.rollup(self.other), (2, 2, None))
+
+        # Admin action mark_as_done идёт через bulk.update_status
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        self.client.post(reverse('admin:tasks_subtask_changelist'), {
+            'action': 'mark_as_done',
+            '_selected_action': list(SubTask.objects.filter(task=self.task).values_list('pk', flat=True)[:1]),
+        })
+        self.assertEqual(self.rollup(), (2, 1, self.days(4)))
+
+    def test_exposed_in_list_and_detail(self):
+        self.subtask(2)
+        self.subtask(1, status=self.done)
+        listed = self.client.get(reverse('api_task_list')).json()['tasks']
+        self.assertEqual({t['id']: (t['subtask_total'], t['subtask_done']) for t in listed},
+                         {self.task.id: (2, 1), self.other.id: (0, 0)})
+        detail = self.client.get(reverse('api_task_detail', args=[self.task.id]), {
+            'fields': 'subtask_total,subtask_done,next_subtask_deadline'}).json()
+        self.assertEqual(detail['subtask_total'], 2)
+        self.assertIsNotNone(detail['next_subtask_deadline'])
+
+        # Запись подзадачи меняет и закэшированный список
+        self.subtask(5)
+        listed = self.client.get(reverse('api_task_list')).json()['tasks']
+        self.assertIn(3, [t['subtask_total'] for t in listed])
+
+    def test_rebuild_rollups(self):
+        self.subtask(1)
+        self.subtask(2, status=self.done)
+        Task.objects.update(subtask_total=7, next_subtask_deadline=None)  # в обход сигналов
+        out = StringIO()
+        call_command('rebuild_rollups', check=True, stdout=out)
+        self.assertIn('расхождений: 2', out.getvalue())
+        self.assertEqual(self.rollup()[0], 7)
+
+        call_command('rebuild_rollups', batch_size=1, stdout=out)
+        self.assertEqual(self.rollup(), (2, 1, self.days(1)))
+        self.assertEqual(self.rollup(self.other), (0, 0, None))
@@ -0,0 +1,130 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk
+from tasks.models import Task, SubTask, Status
+from tasks import scheduler as scheduler_module
+from tasks.scheduler import DeadlineScheduler
+from tasks.signals import became_overdue
+
+
+class OverdueSchedulerTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.now = timezone.now()
+        self.events = []
+        became_overdue.connect(self.record)
+        self.addCleanup(became_overdue.disconnect, self.record)
+
+    def record(self, sender, pks, task_ids, **kwargs):
+        self.events.append((sender, sorted(pks), sorted(task_ids)))
+
+    def task(self, title, delta, **kwargs):
+        return Task.objects.create(title=title, status=self.todo, deadline=self.now + delta, **kwargs)
+
+    def test_flag_on_save(self):
+        """Запись с прошедшим дедлайном — флаг и событие сразу; перенос в будущее снимает флаг"""
+        task = self.task("Прошла", timedelta(days=-1))
+        self.assertTrue(task.is_overdue)
+        self.assertEqual(self.events, [(Task, [task.pk], [task.pk])])
+
+        task.title = "Прошла 2"
+        task.save()
+        self.assertEqual(len(self.events), 1)  # уже была просрочена — события нет
+
+        task.deadline = self.now + timedelta(days=1)
+        task.save()
+        task.refresh_from_db()
+        self.assertFalse(task.is_overdue)
+
+    def test_deadline_fires_exactly_once(self):
+        task = self.task("Скоро", timedelta(minutes=5))
+        sub = SubTask.objects.create(title="Подзадача", status=self.todo,
+                                     deadline=self.now + timedelta(seconds=20), task=task)
+        later = self.task("Потом", timedelta(days=1))
+        self.assertEqual(self.events, [])
+
+        scheduler = DeadlineScheduler()
+        self.assertEqual(scheduler.tick(self.now), 0)
+        # Спит до ближайшего дедлайна, а не до перечитывания кучи
+        self.assertAlmostEqual(scheduler.sleep_time(self.now), 20, delta=1)
+
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=10)), 2)
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=10)), 0)
+        self.assertCountEqual(self.events, [(Task, [task.pk], [task.pk]), (SubTask, [sub.pk], [task.pk])])
+        self.assertEqual(set(Task.objects.filter(is_overdue=True)), {task})
+        later.refresh_from_db()
+        self.assertFalse(later.is_overdue)
+
+    @override_settings(TASKS_OVERDUE_BATCH_SIZE=2)
+    def test_restart_catches_up_in_batches(self):
+        """Новый экземпляр (перезапуск) отмечает всё наступившее, пока его не было, пачками"""
+        tasks = [self.task(f"Задача {i}", timedelta(minutes=i + 1)) for i in range(5)]
+        DeadlineScheduler().tick(self.now)
+        restarted = DeadlineScheduler()
+        self.assertEqual(restarted.tick(self.now + timedelta(hours=1)), 5)
+        self.assertEqual([len(pks) for _, pks, _ in self.events], [2, 2, 1])
+        self.assertEqual(sorted(pk for _, pks, _ in self.events for pk in pks), [t.pk for t in tasks])
+
+    def test_concurrent_scheduler_does_not_duplicate_events(self):
+        """Ту же пачку выбрал другой процесс и перевёл первым — события у нас нет"""
+        task = self.task("Скоро", timedelta(minutes=1))
+        sub = SubTask.objects.create(title="Подзадача", status=self.todo,
+                                     deadline=self.now + timedelta(minutes=1), task=task)
+        mark = scheduler_module._mark_overdue
+
+        def race(model, pks, task_field):
+            model.objects.filter(pk__in=pks[:1]).update(is_overdue=True)  # «другой воркер»
+            return mark(model, pks, task_field)
+
+        with mock.patch.object(scheduler_module, '_mark_overdue', side_effect=race):
+            self.assertEqual(DeadlineScheduler().tick(self.now + timedelta(minutes=5)), 0)
+        self.assertEqual(self.events, [])
+        self.assertEqual(mark(SubTask, [sub.pk], 'task_id'), [])
+
+    def test_bulk_create(self):
+        tasks = bulk.create(Task, [
+            Task(title="Прошла", status=self.todo, deadline=self.now - timedelta(hours=1)),
+            Task(title="Впереди", status=self.todo, deadline=self.now + timedelta(hours=1)),
+        ])
+        self.assertEqual([task.is_overdue for task in tasks], [True, False])
+        self.assertEqual(self.events, [(Task, [tasks[0].pk], [tasks[0].pk])])
+
+    def test_push_wakes_for_new_deadline(self):
+        scheduler = DeadlineScheduler()
+        scheduler.tick(self.now)
+        scheduler.push(self.now + timedelta(seconds=10))
+        scheduler.push(self.now + timedelta(days=2))  # за горизонтом — подхватит перечитывание
+        self.assertAlmostEqual(scheduler.sleep_time(self.now), 10, delta=1)
+
+    def test_overdue_filter_and_stats_use_flag(self):
+        overdue = self.task("Прошла", timedelta(days=-1))
+        self.task("Впереди", timedelta(days=1))
+        data = self.client.get(reverse('api_task_list'), {'overdue': 'true'}).json()
+        self.assertEqual([t['id'] for t in data['tasks']], [overdue.id])
+        self.assertTrue(data['tasks'][0]['is_overdue'])
+        stats = self.client.get(reverse('api_task_stats')).json()['stats']
+        self.assertEqual(stats['tasks']['overdue'], 1)
+
+    def test_autostart_by_default(self):
+        """Без отдельного run_scheduler флаг ставит поток веб-сервера — он включён по умолчанию"""
+        with mock.patch.object(scheduler_module.scheduler, 'start') as start:
+            scheduler_module.autostart()
+            start.assert_called_once()
+            with override_settings(TASKS_OVERDUE_SCHEDULER='off'):
+                scheduler_module.autostart()
+            start.assert_called_once()
+
+    def test_run_scheduler_once(self):
+        self.task("Скоро", timedelta(milliseconds=1))
+        Task.objects.update(deadline=self.now - timedelta(minutes=1))  # дедлайн наступил без записи флага
+        out = StringIO()
+        call_command('run_scheduler', once=True, stdout=out)
+        self.assertIn('Отмечено просроченными: 1', out.getvalue())
+        self.assertEqual(Task.objects.filter(is_overdue=True).count(), 1)
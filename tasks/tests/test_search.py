@@ -0,0 +1,80 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk, search
+from tasks.models import Task, SubTask, Status
+
+
+class FullTextSearchTest(TestCase):
+
+    def setUp(self):
+        if not search.is_available():
+            self.skipTest('FTS5 недоступен')
+        self.todo = Status.objects.create(name="To Do")
+        deadline = timezone.now() + timedelta(days=1)
+        self.report = Task.objects.create(title="Квартальный отчёт",
+                                          description="Собрать цифры продаж", status=self.todo,
+                                          deadline=deadline)
+        self.other = Task.objects.create(title="Созвон", description="Обсудить отчёт",
+                                         status=self.todo, deadline=deadline)
+        self.sub = SubTask.objects.create(title="Графики", description="Продажи по регионам",
+                                          status=self.todo, deadline=deadline, task=self.report)
+        self.url = reverse('api_search')
+
+    def results(self, **params):
+        return self.client.get(self.url, params).json()['results']
+
+    def test_ranked_with_snippets(self):
+        """Совпадение в заголовке выше совпадения в описании, есть подсветка"""
+        results = self.results(q='отчёт')
+        self.assertEqual([(r['type'], r['id']) for r in results],
+                         [('task', self.report.id), ('task', self.other.id)])
+        self.assertIn('<b>', results[0]['title'])
+        self.assertIn('<b>отчёт</b>', results[1]['snippet'])
+
+    def test_user_markup_is_escaped(self):
+        """Подсветка не превращает пользовательский HTML в живую разметку"""
+        task = Task.objects.create(title='<img src=x onerror=alert(1)> опасный', description='<b>a</b> опасный',
+                                   status=self.todo, deadline=timezone.now())
+        result = next(r for r in self.results(q='опасный') if r['id'] == task.id)
+        self.assertEqual(result['title'], '&lt;img src=x onerror=alert(1)&gt; <b>опасный</b>')
+        self.assertEqual(result['snippet'], '&lt;b&gt;a&lt;/b&gt; <b>опасный</b>')
+
+    def test_prefix_and_type(self):
+        results = self.results(q='продаж', type='subtasks')
+        self.assertEqual([(r['type'], r['id']) for r in results], [('subtask', self.sub.id)])
+
+    def test_sync_on_write(self):
+        """Индекс следует за update/delete/bulk_create"""
+        self.other.title = "Планёрка"
+        self.other.save()
+        self.assertEqual(self.results(q='созвон'), [])
+        self.assertEqual(len(self.results(q='планёрка')), 1)
+
+        self.report.delete()
+        self.assertEqual(self.results(q='графики'), [])
+
+        bulk.create(Task, [Task(title="Импортированная", status=self.todo,
+                                deadline=timezone.now())])
+        self.assertEqual(len(self.results(q='импорт')), 1)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM tasks_search')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.results(q='отчёт')), 2)
+
+    def test_admin_search_uses_index(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.login(username='admin', password='pass')
+        response = self.client.get(reverse('admin:tasks_task_changelist'), {'q': 'квартальн'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.report])
+
+    def test_query_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
@@ -0,0 +1,104 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+
+from tasks import http_cache, search
+from tasks.models import Task, SubTask, Status
+from tasks.status_cache import status_cache
+
+NOW = '2026-01-15T12:00:00+00:00'
+
+
+def seed(**options):
+    options.setdefault('now', NOW)
+    call_command('seed_tasks', stdout=StringIO(), **options)
+
+
+def dump():
+    return (list(Task.objects.order_by('id').values_list('title', 'description', 'status__name', 'deadline')),
+            list(SubTask.objects.order_by('id').values_list('title', 'status__name', 'deadline', 'task__title')))
+
+
+class SeedTasksTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+
+    def test_generates_requested_shape(self):
+        seed(tasks=400, subtasks_per_task='uniform:1-3', overdue_ratio=0.25, batch_size=150)
+        self.assertEqual(Task.objects.count(), 400)
+        self.assertTrue(400 <= SubTask.objects.count() <= 1200)
+        self.assertEqual(set(Status.objects.values_list('name', flat=True)), {'To Do', 'In Progress', 'Done'})
+        overdue = Task.objects.filter(deadline__lt=NOW).count()
+        self.assertTrue(60 <= overdue <= 140, overdue)
+        # Подзадачи выполненной задачи выполнены и заканчиваются не позже неё
+        self.assertFalse(SubTask.objects.filter(task__status__name='Done').exclude(status__name='Done').exists())
+        self.assertFalse(SubTask.objects.filter(deadline__gt=F('task__deadline')).exists())
+
+    def test_same_seed_same_data(self):
+        seed(tasks=50, seed=7)
+        first = dump()
+        Task.objects.all().delete()
+        seed(tasks=50, seed=7)
+        self.assertEqual(dump(), first)
+        Task.objects.all().delete()
+        seed(tasks=50, seed=8)
+        self.assertNotEqual(dump(), first)
+
+    def test_derived_data_is_consistent(self):
+        """Счётчики, сводка по подзадачам и поисковый индекс обновлены, как при обычном создании"""
+        seed(tasks=200, subtasks_per_task='fixed:2')
+        out = StringIO()
+        call_command('rebuild_stats', check=True, stdout=out)
+        self.assertIn('Расхождений: 0', out.getvalue())
+        call_command('rebuild_rollups', check=True, stdout=out)
+        self.assertIn('Проверено задач: 200, расхождений: 0', out.getvalue())
+        if search.is_available():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT count(*) FROM {search.TABLE}')
+                self.assertEqual(cursor.fetchone()[0], 600)
+                # В непустую базу строки индексируются по пачкам
+                seed(tasks=100, subtasks_per_task='fixed:1', seed=1)
+                cursor.execute(f'SELECT count(*) FROM {search.TABLE}')
+                self.assertEqual(cursor.fetchone()[0], 800)
+
+    def test_initial_load_keeps_task_versions(self):
+        """В пустой базе версии ответов отдельных задач не меняются — только списка"""
+        with mock.patch.object(http_cache, 'bump_tasks', wraps=http_cache.bump_tasks) as bump_tasks:
+            seed(tasks=50, subtasks_per_task='fixed:2', batch_size=20)
+        self.assertTrue(bump_tasks.call_args_list)
+        for call in bump_tasks.call_args_list:
+            self.assertFalse(list(call.args[0]))
+
+    def test_invalid_options(self):
+        for options in [{'subtasks_per_task': 'normal:2'}, {'subtasks_per_task': 'uniform:3-1'},
+                        {'subtasks_per_task': 'poisson:x'}, {'overdue_ratio': 1.5}, {'now': 'вчера'}]:
+            with self.subTest(options), self.assertRaises(CommandError):
+                seed(tasks=1, **options)
+
+
+class DeferredIndexesTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        status_cache.clear()
+
+    def index_names(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Task._meta.db_table)
+        return {name for name, info in constraints.items() if info['index']}
+
+    def test_indexes_rebuilt_after_load(self):
+        """В пустую базу грузим без индексов, после загрузки они на месте"""
+        before = self.index_names()
+        self.assertIn('task_deadline_id_idx', before)
+        seed(tasks=100)
+        self.assertEqual(self.index_names(), before)
+        self.assertEqual(Task.objects.count(), 100)
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk, counters
+from tasks.models import Task, SubTask, Status, StatCounter
+from tasks.stats import counter_stats, table_stats
+
+
+class TaskStatsTest(TestCase):
+
+    def setUp(self):
+        """Статусы из таблицы Status, включая нестандартный"""
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.review = Status.objects.create(name="Review")
+        now = timezone.now()
+        self.task = Task.objects.create(title="Overdue", description="", status=self.todo,
+                                        deadline=now - timedelta(days=1))
+        Task.objects.create(title="Soon", description="x", status=self.done,
+                            deadline=now + timedelta(days=2))
+        SubTask.objects.create(title="Sub", description="", status=self.review,
+                               deadline=now - timedelta(hours=1), task=self.task)
+        self.url = reverse('api_task_stats')
+
+    def test_stats_values(self):
+        """Метрики совпадают с данными, нулевые статусы присутствуют"""
+        stats = self.client.get(self.url).json()['stats']
+        self.assertEqual(stats['tasks']['total'], 2)
+        self.assertEqual(stats['tasks']['by_status'], {'To Do': 1, 'Done': 1, 'Review': 0})
+        self.assertEqual(stats['tasks']['overdue'], 1)
+        self.assertEqual(stats['tasks']['without_description'], 1)
+        self.assertEqual(stats['subtasks']['by_status'], {'To Do': 0, 'Done': 0, 'Review': 1})
+        self.assertEqual(stats['subtasks']['overdue'], 1)
+        self.assertEqual([t['title'] for t in stats['upcoming_deadlines']], ["Soon"])
+
+    def test_query_count(self):
+        """Стоимость эндпоинта не зависит от числа статусов и строк"""
+        for i in range(5):
+            Status.objects.create(name=f"Extra {i}")
+        self.client.get(self.url)  # прогрев status_cache
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+
+class StatCountersTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.deadline = timezone.now() + timedelta(days=1)
+
+    def assertCountersMatch(self):
+        """Счётчики совпадают с полным пересчётом по таблицам"""
+        now = timezone.now()
+        statuses = list(Status.objects.order_by('id'))
+        values = counters.read_all()
+        for model, scope in counters.SCOPES.items():
+            actual = table_stats(model, statuses, now)
+            self.assertEqual(counter_stats(values[scope], statuses, actual['overdue']), actual)
+
+    def test_save_update_delete(self):
+        """Создание, смена статуса/описания и каскадное удаление"""
+        task = Task.objects.create(title="T", status=self.todo, deadline=self.deadline)
+        sub = SubTask.objects.create(title="S", status=self.todo, deadline=self.deadline, task=task)
+        self.assertCountersMatch()
+
+        task.status = self.done
+        task.description = "теперь с описанием"
+        task.save()
+        sub.status = self.done
+        sub.save()
+        self.assertCountersMatch()
+
+        task.delete()
+        self.assertCountersMatch()
+        self.assertEqual(counters.read_all()['subtask'][counters.TOTAL], 0)
+
+    def test_bulk_paths(self):
+        """bulk.create и bulk.update_status (admin mark_as_done) обновляют счётчики"""
+        task = Task.objects.create(title="T", status=self.todo, deadline=self.deadline)
+        bulk.create(SubTask, [
+            SubTask(title=f"S{i}", status=self.todo, deadline=self.deadline, task=task)
+            for i in range(4)
+        ])
+        self.assertCountersMatch()
+
+        updated = bulk.update_status(SubTask.objects.filter(title__in=["S0", "S1"]), self.done)
+        self.assertEqual(updated, 2)
+        self.assertCountersMatch()
+        self.assertEqual(counters.read_all()['subtask'][counters.status_key(self.done.id)], 2)
+
+    def test_rebuild_stats(self):
+        """rebuild_stats исправляет рассогласованные счётчики"""
+        Task.objects.create(title="T", status=self.todo, deadline=self.deadline)
+        StatCounter.objects.filter(scope='task').update(value=100)
+        out = StringIO()
+        call_command('rebuild_stats', stdout=out)
+        self.assertIn('исправлено', out.getvalue())
+        self.assertCountersMatch()
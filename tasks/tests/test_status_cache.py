@@ -0,0 +1,107 @@
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, Status
+from tasks.serializers import TaskSerializer
+from tasks import status_cache as status_cache_module
+from tasks.status_cache import status_cache
+
+
+class StatusCacheTest(TestCase):
+
+    def setUp(self):
+        status_cache.clear()
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+
+    def test_lookups_without_queries(self):
+        """После прогрева поиск по имени и id не ходит в БД"""
+        status_cache.all()
+        with self.assertNumQueries(0):
+            self.assertEqual(status_cache.get("Done").id, self.done.id)
+            self.assertEqual(status_cache.name_for(self.todo.id), "To Do")
+            self.assertIsNone(status_cache.id_for("Unknown"))
+            self.assertEqual(status_cache.get_or_create("To Do"), self.todo)
+        with self.assertRaises(Status.DoesNotExist):
+            status_cache.get("Unknown")
+
+    def test_invalidation_on_save_and_delete(self):
+        """Переименование и удаление статуса сбрасывают кэш"""
+        status_cache.all()
+        self.done.name = "Closed"
+        self.done.save()
+        self.assertIsNone(status_cache.find("Done"))
+        self.assertEqual(status_cache.get("Closed").id, self.done.id)
+
+        self.done.delete()
+        self.assertEqual([s.name for s in status_cache.all()], ["To Do"])
+
+    def other_process(self):
+        """Общий снимок процесса, как у воркера, который не видел записей этого теста"""
+        status_cache.clear()
+        status_cache.all()
+
+    def test_miss_reloads_status_from_other_process(self):
+        """Статус, созданный в другом процессе (версия сюда не дошла), находится по промаху"""
+        self.other_process()
+        review = Status.objects.bulk_create([Status(name="Review")])[0]  # без сигналов — как чужая запись
+
+        with self.assertNumQueries(0):  # снимок свежий — промах не перечитывает
+            self.assertIsNone(status_cache.find("Review"))
+
+        status_cache._loaded_at -= status_cache_module.MISS_RELOAD_INTERVAL
+        with self.assertNumQueries(1):
+            self.assertEqual(status_cache.find("Review").id, review.id)
+            self.assertIsNone(status_cache.find("Unknown"))  # повторный промах — без запроса
+        task = Task.objects.create(title="На ревью", status=review, deadline=timezone.now() + timedelta(days=1))
+        data = self.client.get(reverse('api_task_list'), {'status': 'Review'}).json()
+        self.assertEqual([t['id'] for t in data['tasks']], [task.id])
+
+    @override_settings(TASKS_STATUS_CACHE_TTL=30)
+    def test_snapshot_expires(self):
+        """Переименование в другом процессе видно не позже чем через TASKS_STATUS_CACHE_TTL"""
+        self.other_process()
+        Status.objects.filter(pk=self.done.pk).update(name="Closed")
+        with self.assertNumQueries(0):
+            self.assertEqual(status_cache.name_for(self.done.id), "Done")
+        status_cache._loaded_at -= 30
+        self.assertEqual(status_cache.name_for(self.done.id), "Closed")
+        self.assertIsNone(status_cache.find("Done"))
+
+    def test_rolled_back_status_not_cached(self):
+        """Статус из откаченной транзакции не остаётся ни в снимке потока, ни в общем"""
+        self.other_process()
+        try:
+            with transaction.atomic():
+                Status.objects.create(name="Temp")
+                self.assertIsNotNone(status_cache.find("Temp"))  # своя транзакция его видит
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertIsNone(status_cache.find("Temp"))
+        self.assertNotIn("Temp", [s.name for s in status_cache._snapshot[1].values()])
+
+    def test_serializer_default_status(self):
+        """TaskSerializer.create берёт статус 'To Do' из кэша"""
+        status_cache.all()
+        serializer = TaskSerializer(data={
+            'title': 'Новая', 'deadline': (timezone.now() + timedelta(days=1)).isoformat()
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with CaptureQueriesContext(connection) as ctx:
+            task = serializer.save()
+        self.assertEqual(task.status_id, self.todo.id)
+        self.assertFalse([q for q in ctx.captured_queries if 'tasks_status"' in q['sql']])
+
+    def test_task_list_uses_cache(self):
+        """api_task_list не делает JOIN и ленивых запросов статуса на строку"""
+        deadline = timezone.now() + timedelta(days=1)
+        for i in range(5):
+            Task.objects.create(title=f"T{i}", status=self.done, deadline=deadline)
+        status_cache.all()
+        with self.assertNumQueries(1):  # только страница
+            data = self.client.get(reverse('api_task_list'), {'status': 'Done'}).json()
+        self.assertEqual({t['status'] for t in data['tasks']}, {"Done"})
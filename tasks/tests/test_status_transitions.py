@@ -0,0 +1,85 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import counters
+from tasks.models import Task, SubTask, Status
+from tasks.signals import status_updated
+
+
+class StatusTransitionsTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.done = Status.objects.create(name="Done")
+        self.now = timezone.now()
+        self.tasks = [
+            Task.objects.create(title=f"T{i}", status=self.todo,
+                                deadline=self.now + timedelta(days=i))
+            for i in range(7)
+        ]
+        for task in self.tasks[:3]:
+            for j in range(2):
+                SubTask.objects.create(title=f"{task.title}.{j}", status=self.todo,
+                                       deadline=task.deadline, task=task)
+        self.url = reverse('api_status_transitions')
+
+    def post(self, data):
+        return self.client.post(self.url, json.dumps(data), content_type='application/json')
+
+    def test_by_ids(self):
+        response = self.post({'status': 'Done', 'ids': [self.tasks[0].id, self.tasks[1].id]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], {'tasks': 2, 'subtasks': 0})
+        self.assertEqual(Task.objects.filter(status=self.done).count(), 2)
+
+    def test_filter_in_chunks_with_cascade(self):
+        """Фильтр по дедлайну, маленькие чанки и каскад на подзадачи"""
+        response = self.post({
+            'status': 'Done',
+            'filter': {'status': 'To Do',
+                       'deadline_to': (self.now + timedelta(days=4, hours=1)).isoformat()},
+            'cascade': True,
+            'chunk_size': 2,
+        })
+        self.assertEqual(response.json()['updated'], {'tasks': 5, 'subtasks': 6})
+        self.assertEqual(Task.objects.filter(status=self.todo).count(), 2)
+        self.assertFalse(SubTask.objects.filter(status=self.todo).exists())
+        self.assertEqual(counters.read_all()['task'][counters.status_key(self.done.id)], 5)
+
+    def test_both_with_cascade_counts_subtasks_once(self):
+        """target both + cascade: подзадачи задач из фильтра обновляются один раз"""
+        other = SubTask.objects.create(title="Чужая", status=self.todo, task=self.tasks[6],
+                                       deadline=self.now + timedelta(hours=1))
+        received = []
+
+        def on_status_updated(sender, pks, **kwargs):
+            if sender is SubTask:
+                received.extend(pks)
+
+        status_updated.connect(on_status_updated)
+        self.addCleanup(status_updated.disconnect, on_status_updated)
+        response = self.post({
+            'status': 'Done', 'target': 'both', 'cascade': True, 'chunk_size': 2,
+            'filter': {'deadline_to': (self.now + timedelta(days=1, hours=1)).isoformat()},
+        })
+        # Задачи T0, T1 с 4 подзадачами каскадом и подзадача задачи T6 по своему дедлайну
+        self.assertEqual(response.json()['updated'], {'tasks': 2, 'subtasks': 5})
+        self.assertEqual(sorted(received), sorted(set(received)))
+        self.assertEqual(len(received), 5)
+        self.assertEqual(SubTask.objects.get(pk=other.pk).status, self.done)
+        self.assertEqual(counters.read_all()['subtask'][counters.status_key(self.done.id)], 5)
+
+    def test_subtasks_of_parent(self):
+        response = self.post({'status': 'Done', 'target': 'subtasks',
+                              'filter': {'task_id': self.tasks[1].id}})
+        self.assertEqual(response.json()['updated'], {'tasks': 0, 'subtasks': 2})
+
+    def test_validation(self):
+        """Нужен ровно один способ выбора и существующий статус"""
+        self.assertEqual(self.post({'status': 'Done'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'Нет', 'ids': [1]}).status_code, 400)
+        self.assertEqual(self.post({'status': 'Done', 'ids': [1], 'target': 'both'}).status_code, 400)
+        self.assertEqual(self.post({'status': 'Done', 'filter': {'task_id': 1}}).status_code, 400)
@@ -0,0 +1,50 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, Status
+
+
+@override_settings(TASKS_STREAM_CHUNK_SIZE=2)
+class TaskListStreamingTest(TestCase):
+
+    def setUp(self):
+        """5 задач, одна из них просрочена"""
+        self.todo = Status.objects.create(name="To Do")
+        now = timezone.now()
+        for i in range(5):
+            Task.objects.create(
+                title=f"Задача {i}",
+                status=self.todo,
+                deadline=now + timedelta(days=i, hours=-12)
+            )
+        self.url = reverse('api_task_list')
+
+    def test_ndjson(self):
+        """Одна задача на строку, в порядке -deadline"""
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['title'], "Задача 4")
+        self.assertTrue(rows[-1]['is_overdue'])
+
+    def test_json_stream(self):
+        """Потоковый JSON — валидный документ с count и фильтрами"""
+        response = self.client.get(self.url, {'format': 'json-stream', 'overdue': 'true'})
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(len(data['tasks']), 1)
+        self.assertEqual(data['filters'], {'status': None, 'overdue': 'true'})
+
+    def test_json_stream_empty(self):
+        """Пустая выборка — тоже валидный JSON"""
+        response = self.client.get(self.url, {'format': 'json-stream', 'status': 'Done'})
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(data['tasks'], [])
+        self.assertEqual(data['count'], 0)
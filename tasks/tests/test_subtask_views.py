@@ -0,0 +1,29 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, SubTask, Status
+
+
+class SubTaskViewsTest(TestCase):
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.deadline = timezone.now() + timedelta(days=1)
+        self.task = Task.objects.create(title="Задача", status=self.todo, deadline=self.deadline)
+
+    def test_create_and_read(self):
+        response = self.client.post(reverse('subtask-list-create'), {
+            'title': 'Подзадача', 'deadline': self.deadline.isoformat(),
+            'task_id': self.task.id, 'status_id': self.todo.id})
+        self.assertEqual(response.status_code, 201, response.content)
+        subtask = SubTask.objects.get()
+
+        data = self.client.get(reverse('subtask-detail-update-delete', args=[subtask.id])).json()
+        self.assertEqual(data['status'], {'id': self.todo.id, 'name': 'To Do'})
+        self.assertEqual(data['task']['id'], self.task.id)
+        self.assertEqual(data['task']['subtask_total'], 1)
+
+        response = self.client.delete(reverse('subtask-detail-update-delete', args=[subtask.id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(SubTask.objects.exists())
@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks import bulk
+from tasks.models import Task, SubTask, Status
+from tasks import suggest
+from tasks.suggest import prefix_index
+
+
+class SuggestTest(TestCase):
+
+    def setUp(self):
+        prefix_index.clear()
+        self.todo = Status.objects.create(name="To Do")
+        self.deadline = timezone.now() + timedelta(days=1)
+        self.report = Task.objects.create(title="Отчёт за квартал", status=self.todo,
+                                          deadline=self.deadline)
+        Task.objects.create(title="отчёт по продажам", status=self.todo, deadline=self.deadline)
+        SubTask.objects.create(title="Отправить письмо", status=self.todo,
+                               deadline=self.deadline, task=self.report)
+        self.url = reverse('api_task_suggest')
+
+    def titles(self, prefix, **params):
+        response = self.client.get(self.url, {'prefix': prefix, **params})
+        return [s['title'] for s in response.json()['suggestions']]
+
+    def test_prefix_case_insensitive(self):
+        self.assertEqual(self.titles('отч'), ["Отчёт за квартал", "отчёт по продажам"])
+        self.assertEqual(self.titles('ОТ'), ["Отправить письмо", "Отчёт за квартал",
+                                             "отчёт по продажам"])
+        self.assertEqual(self.titles('от', limit=1), ["Отправить письмо"])
+
+    def test_no_queries_after_build(self):
+        self.titles('о')
+        with self.assertNumQueries(0):
+            self.titles('отч')
+
+    def test_incremental_updates_after_commit(self):
+        self.titles('о')  # сборка индекса
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.title = "Годовой отчёт"
+            self.report.save()
+            bulk.create(Task, [Task(title="Отпуск", status=self.todo, deadline=self.deadline)])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('отч'), ["отчёт по продажам"])
+            self.assertEqual(self.titles('год'), ["Годовой отчёт"])
+            self.assertEqual(self.titles('отпу'), ["Отпуск"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.delete()
+        self.assertEqual(self.titles('год'), [])
+        self.assertEqual(self.titles('отпр'), [])
+
+    def test_memory_report(self):
+        self.titles('о')
+        report = self.client.get(reverse('api_task_suggest_stats')).json()['index']
+        self.assertEqual(report['entries'], 3)
+        self.assertGreater(report['total_bytes'], 0)
+
+    def test_prefix_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+
+    @override_settings(TASKS_SUGGEST_REBUILD_INTERVAL=0)
+    def test_other_process_sees_changes(self):
+        """Запись в другом процессе меняет общую версию — индекс этого перестраивается"""
+        self.titles('о')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title="Отчёт годовой", status=self.todo, deadline=self.deadline)
+        self.assertEqual(len(self.titles('отч')), 3)
+        # Другой процесс с теми же settings (в его БД этой задачи нет — важна только версия)
+        subprocess.run([sys.executable, '-c', 'import django; django.setup(); '
+                        'from tasks.suggest import prefix_index; prefix_index._bump_shared()'],
+                       cwd=settings.BASE_DIR, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'Manager_task_12.settings'},
+                       check=True)
+        with mock.patch.object(prefix_index, 'build', wraps=prefix_index.build) as build:
+            self.titles('отч')
+        build.assert_called_once()
+
+    def test_preload_at_startup(self):
+        with mock.patch.object(suggest.threading, 'Thread') as thread:
+            suggest.autostart()
+        thread.assert_called_once_with(target=suggest._preload, name='tasks-suggest-preload', daemon=True)
+        with override_settings(TASKS_SUGGEST_PRELOAD=False), \
+                mock.patch.object(suggest.threading, 'Thread') as thread:
+            suggest.autostart()
+        thread.assert_not_called()
+
+        prefix_index.preload()
+        with self.assertNumQueries(0):  # первый запрос уже без сборки
+            self.assertEqual(self.titles('отч'), ["Отчёт за квартал", "отчёт по продажам"])
@@ -0,0 +1,50 @@
+import json
+
+from django.db import IntegrityError
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, Status
+from tasks.write_queue import write_queue
+
+
+@override_settings(TASKS_WRITE_QUEUE=True, TASKS_WRITE_QUEUE_WINDOW_MS=200)
+class WriteQueueTest(TransactionTestCase):
+    """Писатель работает в своём потоке, поэтому нужны настоящие коммиты"""
+
+    def setUp(self):
+        self.todo = Status.objects.create(name="To Do")
+        self.deadline = timezone.now() + timedelta(days=1)
+        self.addCleanup(write_queue.stop)
+
+    def create(self, title):
+        return lambda: Task.objects.create(title=title, status=self.todo, deadline=self.deadline)
+
+    def test_concurrent_writes_share_one_commit(self):
+        batches = write_queue.batches
+        futures = [write_queue.submit(self.create(f"Задача {i}")) for i in range(5)]
+        tasks = [future.result(timeout=5) for future in futures]
+        self.assertEqual(write_queue.batches, batches + 1)
+        self.assertEqual(sorted(task.id for task in tasks),
+                         sorted(Task.objects.values_list('id', flat=True)))
+
+    def test_failed_write_is_isolated(self):
+        ok = write_queue.submit(self.create("Первая"))
+        failed = write_queue.submit(lambda: Status.objects.create(name="To Do"))
+        also_ok = write_queue.submit(self.create("Вторая"))
+        self.assertIsNotNone(ok.result(timeout=5).id)
+        self.assertIsNotNone(also_ok.result(timeout=5).id)
+        with self.assertRaises(IntegrityError):
+            failed.result(timeout=5)
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(Status.objects.count(), 1)
+
+    def test_create_endpoint(self):
+        response = self.client.post(reverse('api_task_create'), json.dumps({
+            'title': 'Через очередь',
+            'deadline': self.deadline.isoformat(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        task_id = response.json()['task']['id']
+        self.assertEqual(Task.objects.get(id=task_id).title, 'Через очередь')
@@ -0,0 +1,83 @@
+"""
+Массовая смена статуса задач и подзадач (POST /api/status-transitions/).
+
+Выборка задаётся списком id или фильтром и меняется set-based UPDATE через
+tasks.bulk.update_status. Большие выборки режутся на диапазоны id не более
+чем по ``chunk_size`` строк с отдельной транзакцией на каждый: в SQLite
+запись блокирует всю базу, и короткие транзакции не дают читателям простаивать.
+"""
+from django.db import transaction
+
+from . import bulk
+from .models import SubTask, Task
+
+
+def filtered(model, transition_filter, skip_cascaded=False):
+    """
+    QuerySet строк ``model`` по фильтру {status, deadline_from, deadline_to, task_id}.
+    ``skip_cascaded`` — без подзадач задач, попавших под тот же фильтр: их
+    уже перевёл каскад прохода по задачам (target both).
+    """
+    queryset = model.objects.all()
+    if skip_cascaded:
+        # После каскада задачи со старым статусом из фильтра под него уже не
+        # попадают — но и их подзадачи тоже, так что исключение остаётся точным
+        queryset = queryset.exclude(task__in=filtered(Task, transition_filter))
+    if 'status' in transition_filter:
+        queryset = queryset.filter(status=transition_filter['status'])
+    if 'deadline_from' in transition_filter:
+        queryset = queryset.filter(deadline__gte=transition_filter['deadline_from'])
+    if 'deadline_to' in transition_filter:
+        queryset = queryset.filter(deadline__lte=transition_filter['deadline_to'])
+    if 'task_id' in transition_filter:
+        queryset = queryset.filter(task_id=transition_filter['task_id'])
+    return queryset
+
+
+def chunks(model, chunk_size, ids=None, transition_filter=None, skip_cascaded=False):
+    """
+    Части выборки, в каждой не более ``chunk_size`` строк. Для фильтра —
+    диапазоны (lo, hi] по pk: граница ищется по индексу первичного ключа,
+    а сам UPDATE остаётся условием по фильтру и диапазону, без списков id.
+    """
+    if ids is not None:
+        ids = sorted(set(ids))
+        for start in range(0, len(ids), chunk_size):
+            yield model.objects.filter(pk__in=ids[start:start + chunk_size])
+        return
+
+    queryset = filtered(model, transition_filter, skip_cascaded)
+    lo = 0
+    while True:
+        rest = queryset.filter(pk__gt=lo).order_by('pk').values_list('pk', flat=True)
+        bound = list(rest[chunk_size - 1:chunk_size])
+        if not bound:
+            yield queryset.filter(pk__gt=lo)
+            return
+        yield queryset.filter(pk__gt=lo, pk__lte=bound[0])
+        lo = bound[0]
+
+
+def transition(model, status, chunk_size, ids=None, transition_filter=None, cascade=False,
+               skip_cascaded=False):
+    """
+    Переводит выборку в ``status``. Для задач с ``cascade`` тот же статус
+    получают их подзадачи; проход по подзадачам после такого каскада — с
+    ``skip_cascaded`` (см. filtered), чтобы не обновить и не посчитать их
+    дважды. Возвращает {'tasks': n, 'subtasks': m}.
+    """
+    result = {'tasks': 0, 'subtasks': 0}
+    key = 'tasks' if model is Task else 'subtasks'
+    for chunk in chunks(model, chunk_size, ids, transition_filter, skip_cascaded):
+        with transaction.atomic():
+            if cascade and model is Task:
+                # id фиксируем до UPDATE: фильтр по старому статусу после него не совпадёт
+                task_ids = list(chunk.values_list('pk', flat=True))
+                if not task_ids:
+                    continue
+                result['tasks'] += bulk.update_status(Task.objects.filter(pk__in=task_ids), status)
+                result['subtasks'] += bulk.update_status(
+                    SubTask.objects.filter(task_id__in=task_ids), status)
+            else:
+                result[key] += bulk.update_status(chunk, status)
+    return result
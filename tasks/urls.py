@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.urls import path
 from tasks import views  # твои существующие FBV
+from tasks import async_views
 from tasks.views_subtasks import SubTaskListCreateView, SubTaskDetailUpdateDeleteView  # наши CBV
 
 urlpatterns = [
@@ -10,12 +11,25 @@ urlpatterns = [
     path('', views.task_list_html, name='home'),
     path('api/tasks/create/', views.api_create_task, name='api_task_create'),
     path('api/tasks/', views.api_task_list, name='api_task_list'),
+    path('api/tasks/bulk/', views.api_bulk_create_tasks, name='api_task_bulk_create'),
+    path('api/tasks/suggest/', views.api_task_suggest, name='api_task_suggest'),
+    path('api/tasks/suggest/stats/', views.api_task_suggest_stats, name='api_task_suggest_stats'),
+    path('api/tasks/calendar/', views.api_task_calendar, name='api_task_calendar'),
     path('api/tasks/<int:task_id>/', views.api_task_detail, name='api_task_detail'),
     path('api/stats/', views.api_task_stats, name='api_task_stats'),
     path('api/subtasks/create/', views.api_create_subtask, name='api_subtask_create'),
     # ⛔ ВАЖНО: старый detail FBV убрать/закомментировать, иначе он перехватывает PATCH/PUT/DELETE
     # path('api/subtasks/<int:subtask_id>/', views.api_subtask_detail, name='api_subtask_detail'),
     path('api/tasks/<int:task_id>/subtasks/', views.api_task_subtasks, name='api_task_subtasks'),
+    path('api/status-transitions/', views.api_status_transitions, name='api_status_transitions'),
+    path('api/search/', views.api_search, name='api_search'),
+
+    # --- async-версии эндпоинтов чтения (для ASGI) ---
+    path('api/async/tasks/', async_views.api_task_list, name='api_async_task_list'),
+    path('api/async/tasks/<int:task_id>/', async_views.api_task_detail, name='api_async_task_detail'),
+    path('api/async/tasks/<int:task_id>/subtasks/', async_views.api_task_subtasks,
+         name='api_async_task_subtasks'),
+    path('api/async/stats/', async_views.api_task_stats, name='api_async_task_stats'),
 
     # --- НОВЫЕ CBV (csrf_exempt внутри классов) ---
     path('api/subtasks/', SubTaskListCreateView.as_view(), name='subtask-list-create'),
@@ -1,23 +1,37 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import Http404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
+from django.conf import settings
 from django.utils import timezone
 import json
 import datetime
 from .models import Task, Status, SubTask  # <— SubTask нужен
+from .pagination import DEFAULT_PAGE_SIZE, paginate_by_deadline, parse_limit
+from .streaming import ndjson_response, json_stream_response
+from .stats import collect_stats
+from .status_cache import status_cache
+from .http_cache import cached_response, task_keys, task_list_keys
+from .suggest import prefix_index, MAX_LIMIT as SUGGEST_MAX_LIMIT
+from .write_queue import write_queue
+from .query_budget import query_budget
+from .rendering import json_response
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
-from .serializers import (TaskCreateSerializer, SubTaskCreateSerializer, SubTaskDetailSerializer,
+from . import bulk, deadline_calendar, fieldsets, search, transitions
+from .serializers import (StatusTransitionSerializer, TaskCreateSerializer, SubTaskCreateSerializer, SubTaskDetailSerializer,
                           TaskDetailSerializer,)
 
 
+@query_budget(1)
 def task_list_html(request):
     """HTML страница со списком задач"""
-    tasks = Task.objects.all()
+    tasks = Task.objects.select_related('status')
     return render(request, 'tasks/task_list.html', {'tasks': tasks})
 
 
+# Холодный путь (новая база, пустые кэши): статус по умолчанию создаётся,
+# справочник статусов и счётчики статистики заводятся — 15 запросов; дальше 7
+@query_budget(15)
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_create_task(request):
@@ -27,8 +41,9 @@ def api_create_task(request):
 
         serializer = TaskCreateSerializer(data=data)
         if serializer.is_valid():
-            task = serializer.save()  # если status присылаешь строкой — лучше маппить во view/сериализаторе отдельно
-            return JsonResponse({
+            # Сохранение — возможно, в общей транзакции с соседними запросами (см. write_queue)
+            task = write_queue.run(serializer.save)
+            return json_response({
                 'message': 'Task created successfully',
                 'task': {
                     'id': task.id,
@@ -37,18 +52,70 @@ def api_create_task(request):
                     'status': task.status.name if getattr(task, "status", None) else None,
                     'deadline': task.deadline.isoformat() if task.deadline else None
                 }
-            }, status=201, json_dumps_params={'ensure_ascii': False})
+            }, status=201)
 
         # Ошибки валидации DRF (включая "Нельзя устанавливать дедлайн в прошлом.")
-        return JsonResponse({'error': serializer.errors}, status=400,
-                            json_dumps_params={'ensure_ascii': False})
+        return json_response({'error': serializer.errors}, status=400)
 
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400,
-                            json_dumps_params={'ensure_ascii': False})
+        return json_response({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500,
-                            json_dumps_params={'ensure_ascii': False})
+        return json_response({'error': str(e)}, status=500)
+
+# Число INSERT растёт с числом пачек bulk_create — ограничения нет
+@query_budget(None, duplicates=None)
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_bulk_create_tasks(request):
+    """
+    Массовое создание задач: тело — JSON-массив задач (как для TaskCreateSerializer,
+    с той же проверкой дедлайна; вместо status_id можно передать имя статуса в поле status).
+    Все элементы проверяются за один проход, ошибки возвращаются по индексам,
+    корректные задачи пишутся через bulk_create пачками по ?batch_size=
+    (по умолчанию TASKS_BULK_BATCH_SIZE) в одной транзакции.
+    """
+    try:
+        items = json.loads(request.body)
+    except json.JSONDecodeError:
+        return json_response({'error': 'Invalid JSON'}, status=400)
+
+    if not isinstance(items, list):
+        return json_response({'error': 'Expected a JSON array of tasks'}, status=400)
+    max_items = getattr(settings, 'TASKS_BULK_MAX_ITEMS', 10000)
+    if len(items) > max_items:
+        return json_response({'error': f'Too many tasks in one request (max {max_items})'},
+                             status=400)
+    try:
+        batch_size = int(request.GET.get('batch_size') or getattr(settings, 'TASKS_BULK_BATCH_SIZE', 500))
+        if batch_size < 1:
+            raise ValueError
+    except ValueError:
+        return json_response({'error': 'batch_size must be a positive integer'}, status=400)
+
+    # Статусы — по id и по имени — берутся из status_cache: ни одного запроса на элемент
+    serializer = TaskCreateSerializer(data=items, many=True)
+    serializer.is_valid()
+    errors = {index: error for index, error in enumerate(serializer.errors) if error}
+
+    # Имена статусов разрешаются по справочнику (status_cache), без запроса на строку
+    valid = []
+    for index, data in serializer.valid_items:
+        status_name = items[index].get('status') if isinstance(items[index], dict) else None
+        if isinstance(status_name, str) and 'status' not in data:
+            status = status_cache.find(status_name)
+            if status is None:
+                errors[index] = {'status': [f'Unknown status "{status_name}".']}
+                continue
+            data['status'] = status
+        valid.append((index, data))
+
+    created = bulk.create_tasks([data for _, data in valid], batch_size=batch_size)
+
+    return json_response({
+        'message': f'{len(created)} tasks created',
+        'created': [{'index': index, 'id': task.id} for (index, _), task in zip(valid, created)],
+        'errors': {str(index): error for index, error in sorted(errors.items())},
+    }, status=201 if created or not errors else 400)
 
 # def api_create_task(request):
 #     """API эндпоинт для создания задачи"""
@@ -108,7 +175,7 @@ def api_task_detail(request, task_id):
     """
     task = get_object_or_404(Task, id=task_id)
     serializer = TaskDetailSerializer(task)
-    return JsonResponse(serializer.data, json_dumps_params={'ensure_ascii': False})
+    return json_response(serializer.data)
 
 # def api_task_list(request):
 #     """API для получения списка задач"""
@@ -124,15 +191,28 @@ def api_task_detail(request, task_id):
 #             'deadline': task.deadline.isoformat() if task.deadline else None
 #         })
 
-    return JsonResponse({'tasks': tasks_data}, json_dumps_params={'ensure_ascii': False})
+    return json_response({'tasks': tasks_data})
 
 
+@query_budget(3)
 @require_http_methods(["GET"])
+@cached_response(task_keys)
 def api_task_detail(request, task_id):
-    """API для получения деталей конкретной задачи по ID"""
-    task = get_object_or_404(Task, id=task_id)
-    serializer = TaskDetailSerializer(task)
-    return JsonResponse(serializer.data, json_dumps_params={'ensure_ascii': False})
+    """
+    API для получения деталей конкретной задачи по ID (ответ кэшируется, см. http_cache).
+    Ответ собирается из values() без DRF, в формате TaskDetailSerializer (tasks.fieldsets).
+    ?fields= и ?expand=subtasks — выборочные поля; с fields подзадачи
+    включаются только по expand=subtasks.
+    """
+    try:
+        task, subtasks, fields, expand = fieldsets.task_detail_query(request, task_id)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    task = task.first()
+    if task is None:
+        raise Http404('No Task matches the given query.')
+    subtasks = list(subtasks) if subtasks is not None else None
+    return json_response(fieldsets.render_task_detail(task, subtasks, fields, fieldsets.context()))
     # task_data = {
     #     'id': task.id,
     #     'title': task.title,
@@ -152,109 +232,107 @@ def api_task_detail(request, task_id):
     #         'deadline': subtask.deadline.isoformat() if subtask.deadline else None
     #     })
     #
-    # return JsonResponse(task_data, json_dumps_params={'ensure_ascii': False})
+    # return JsonResponse(task_data)
 
 
+@query_budget(2)
 @require_http_methods(["GET"])
+@cached_response(task_list_keys)
 def api_task_list(request):
-    """API для получения списка задач с возможностью фильтрации"""
-    tasks = Task.objects.all().order_by('-deadline')
+    """
+    API для получения списка задач с фильтрацией и keyset-пагинацией (cursor/limit);
+    без limit и cursor — все подходящие задачи одним ответом.
+    ?format=ndjson или ?format=json-stream — потоковая выгрузка всех подходящих задач.
+    ?fields=id,title,... — только эти поля; остальные колонки не читаются из БД.
+    """
+    try:
+        fields = fieldsets.TASK_LIST.parse(request.GET.get('fields'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    tasks = Task.objects.values(*fieldsets.TASK_LIST.columns(fields))
 
-    # Фильтрация по статусу (если передан параметр status)
+    # Фильтрация по статусу (если передан параметр status): имя -> id из кэша, без JOIN
     status_filter = request.GET.get('status')
     if status_filter:
-        tasks = tasks.filter(status__name=status_filter)
+        status_id = status_cache.id_for(status_filter)
+        tasks = tasks.filter(status_id=status_id) if status_id is not None else tasks.none()
+
+    now = timezone.now()
 
-    # Фильтрация по просроченным задачам
+    # Фильтрация по просроченным задачам: флаг ведёт tasks.scheduler, поиск — по индексу
     overdue = request.GET.get('overdue')
     if overdue and overdue.lower() == 'true':
-        tasks = tasks.filter(deadline__lt=timezone.now())
-
-    tasks_data = []
-    for task in tasks:
-        tasks_data.append({
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'status': task.status.name,
-            'deadline': task.deadline.isoformat() if task.deadline else None,
-            'is_overdue': task.deadline < timezone.now() if task.deadline else False
+        tasks = tasks.filter(is_overdue=True)
+
+    output_format = request.GET.get('format')
+    if output_format in ('ndjson', 'json-stream'):
+        # Экспорт: все подходящие задачи потоком, без пагинации
+        tasks = tasks.order_by('-deadline', '-id')
+
+        render, context = fieldsets.TASK_LIST.compile(fields), fieldsets.context(now)
+
+        def to_dict(task):
+            return render(task, context)
+
+        if output_format == 'ndjson':
+            return ndjson_response(tasks, to_dict)
+        return json_stream_response(tasks, to_dict, 'tasks', {
+            'filters': {'status': status_filter, 'overdue': overdue}
         })
 
-    return JsonResponse({
+    cursor = request.GET.get('cursor')
+    try:
+        # Без limit и cursor — весь список, как до пагинации: старые клиенты не теряют строк
+        limit = parse_limit(request.GET.get('limit'), default=DEFAULT_PAGE_SIZE if cursor else None)
+        page, next_cursor, prev_cursor = paginate_by_deadline(tasks, limit, cursor)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    render, context = fieldsets.TASK_LIST.compile(fields), fieldsets.context(now)
+    tasks_data = [render(task, context) for task in page]
+
+    return json_response({
         'tasks': tasks_data,
         'count': len(tasks_data),
+        'limit': limit,
+        'next': next_cursor,
+        'prev': prev_cursor,
         'filters': {
             'status': status_filter,
             'overdue': overdue
         }
-    }, json_dumps_params={'ensure_ascii': False})
+    })
 
 
+@query_budget(3)
+@require_http_methods(["GET"])
+def api_task_calendar(request):
+    """
+    Календарь дедлайнов: ?from=&to= (даты включительно) и bucket=day|week|month —
+    число задач и подзадач в каждой корзине по статусам (см. tasks.deadline_calendar).
+    """
+    try:
+        first, last, bucket = deadline_calendar.parse_range(request.GET)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    return json_response(deadline_calendar.calendar(first, last, bucket))
+
+
+@query_budget(5)
 @require_http_methods(["GET"])
 def api_task_stats(request):
-    """API для получения расширенной статистики по задачам"""
-    # Базовые метрики
-    total_tasks = Task.objects.count()
-    total_subtasks = SubTask.objects.count()
-
-    # Статистика по статусам задач
-    tasks_by_status = Task.objects.values('status__name').annotate(count=Count('id'))
-    status_stats = {item['status__name']: item['count'] for item in tasks_by_status}
-
-    # Статистика по статусам подзадач
-    subtasks_by_status = SubTask.objects.values('status__name').annotate(count=Count('id'))
-    subtask_status_stats = {item['status__name']: item['count'] for item in subtasks_by_status}
-
-    # Просроченные задачи
-    overdue_tasks = Task.objects.filter(deadline__lt=timezone.now()).count()
-    overdue_subtasks = SubTask.objects.filter(deadline__lt=timezone.now()).count()
-
-    # Задачи без описания
-    tasks_without_description = Task.objects.filter(description='').count()
-    subtasks_without_description = SubTask.objects.filter(description='').count()
-
-    # Ближайшие дедлайны (3 ближайшие задачи)
-    upcoming_tasks = Task.objects.filter(deadline__gte=timezone.now()).order_by('deadline')[:3]
-    upcoming_tasks_data = [
-        {
-            'id': task.id,
-            'title': task.title,
-            'deadline': task.deadline.isoformat(),
-            'days_until': (task.deadline - timezone.now()).days
-        }
-        for task in upcoming_tasks
-    ]
-
-    # Заполняем нулевые значения для всех статусов
-    all_statuses = ['To Do', 'In Progress', 'Done']
-    for status in all_statuses:
-        if status not in status_stats:
-            status_stats[status] = 0
-        if status not in subtask_status_stats:
-            subtask_status_stats[status] = 0
-
-    return JsonResponse({
-        'stats': {
-            'tasks': {
-                'total': total_tasks,
-                'by_status': status_stats,
-                'overdue': overdue_tasks,
-                'without_description': tasks_without_description,
-            },
-            'subtasks': {
-                'total': total_subtasks,
-                'by_status': subtask_status_stats,
-                'overdue': overdue_subtasks,
-                'without_description': subtasks_without_description,
-            },
-            'upcoming_deadlines': upcoming_tasks_data,
-        },
-        'timestamp': timezone.now().isoformat(),
+    """API для получения расширенной статистики по задачам (см. tasks.stats)"""
+    now = timezone.now()
+    return json_response({
+        'stats': collect_stats(now),
+        'timestamp': now.isoformat(),
         'success': True
-    }, json_dumps_params={'ensure_ascii': False})
+    })
 
 
+# Холодный путь: 16 запросов (счётчики подзадач заводятся, справочник статусов
+# читается, пересчёт сводки задачи — tasks.rollup); дальше 11
+@query_budget(16)
 @csrf_exempt
 @require_http_methods(["POST"])
 def api_create_subtask(request):
@@ -264,18 +342,16 @@ def api_create_subtask(request):
 
         # Базовая валидация
         if not data.get('title'):
-            return JsonResponse({'error': 'Title is required'}, status=400,
-                                json_dumps_params={'ensure_ascii': False})
+            return json_response({'error': 'Title is required'}, status=400)
 
         if not data.get('deadline'):
-            return JsonResponse({'error': 'Deadline is required'}, status=400,
-                                json_dumps_params={'ensure_ascii': False})
+            return json_response({'error': 'Deadline is required'}, status=400)
 
         # Валидируем и сохраняем через сериализатор (task_id и status_id обрабатываются внутри)
         serializer = SubTaskCreateSerializer(data=data)
         if serializer.is_valid():
-            subtask = serializer.save()
-            return JsonResponse({
+            subtask = write_queue.run(serializer.save)
+            return json_response({
                 'message': 'SubTask created successfully',
                 'subtask': {
                     'id': subtask.id,
@@ -286,33 +362,138 @@ def api_create_subtask(request):
                     'task_id': subtask.task.id,
                     'created_at': subtask.created_at.isoformat() if subtask.created_at else None
                 }
-            }, status=201, json_dumps_params={'ensure_ascii': False})
+            }, status=201)
         else:
-            return JsonResponse({'error': serializer.errors}, status=400,
-                                json_dumps_params={'ensure_ascii': False})
+            return json_response({'error': serializer.errors}, status=400)
 
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400,
-                            json_dumps_params={'ensure_ascii': False})
+        return json_response({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500,
-                            json_dumps_params={'ensure_ascii': False})
+        return json_response({'error': str(e)}, status=500)
 
 
+@query_budget(4)
 @require_http_methods(["GET"])
 def api_subtask_detail(request, subtask_id):
     """API для получения деталей подзадачи по ID"""
     subtask = get_object_or_404(SubTask, id=subtask_id)
     serializer = SubTaskDetailSerializer(subtask)
-    return JsonResponse(serializer.data, json_dumps_params={'ensure_ascii': False})
+    return json_response(serializer.data)
 
 
+@query_budget(3)
 @require_http_methods(["GET"])
+@cached_response(task_keys)
 def api_task_subtasks(request, task_id):
-    """API для получения всех подзадач конкретной задачи"""
-    task = get_object_or_404(Task, id=task_id)
-    subtasks = task.subtasks.all()
+    """
+    API для получения всех подзадач конкретной задачи (ответ кэшируется, см. http_cache).
+    Ответ собирается из values() без DRF, в формате SubTaskDetailSerializer (tasks.fieldsets).
+    ?fields= и ?expand=task — выборочные поля; с fields родительская задача
+    включается только по expand=task.
+    """
+    try:
+        subtasks, task, fields, expand = fieldsets.subtasks_query(request, task_id)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    task = task.first()
+    if task is None:
+        raise Http404('No Task matches the given query.')
+    return json_response({
+        'subtasks': fieldsets.render_subtasks(subtasks, task, fields, expand, fieldsets.context()),
+        'task_id': task_id,
+    })
+
+
+# Один UPDATE на диапазон id размером chunk_size — ограничения нет
+@query_budget(None, duplicates=None)
+@csrf_exempt
+@require_http_methods(["POST"])
+def api_status_transitions(request):
+    """
+    Массовая смена статуса: {"status", "target": tasks|subtasks|both,
+    "ids": [...] | "filter": {status, deadline_from, deadline_to, task_id},
+    "cascade", "chunk_size"}. Один set-based UPDATE на таблицу (на каждый
+    диапазон id размером chunk_size). Возвращает число изменённых строк.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return json_response({'error': 'Invalid JSON'}, status=400)
+
+    serializer = StatusTransitionSerializer(data=data)
+    if not serializer.is_valid():
+        return json_response({'error': serializer.errors}, status=400)
+    params = serializer.validated_data
+
+    updated = {'tasks': 0, 'subtasks': 0}
+    models = {'tasks': [Task], 'subtasks': [SubTask], 'both': [Task, SubTask]}[params['target']]
+    for model in models:
+        result = transitions.transition(model, params['status'], params['chunk_size'],
+                                        ids=params.get('ids'),
+                                        transition_filter=params.get('filter'),
+                                        cascade=params['cascade'],
+                                        skip_cascaded=model is SubTask and params['cascade'] and Task in models)
+        updated['tasks'] += result['tasks']
+        updated['subtasks'] += result['subtasks']
+
+    return json_response({
+        'status': params['status'].name,
+        'updated': updated,
+    })
+
+
+@query_budget(2)
+@require_http_methods(["GET"])
+def api_search(request):
+    """
+    Полнотекстовый поиск по задачам и подзадачам (FTS5, см. tasks.search):
+    ?q=текст&type=tasks|subtasks&limit=N. Результаты ранжированы, со сниппетами.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return json_response({'error': 'Parameter q is required'}, status=400)
+    models = {'tasks': (Task,), 'subtasks': (SubTask,)}.get(request.GET.get('type'), (Task, SubTask))
+    try:
+        limit = parse_limit(request.GET.get('limit'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    if not search.is_available():
+        return json_response({'error': 'Full-text search is not available'}, status=503)
+
+    results = search.search(query, models=models, limit=limit)
+    return json_response({
+        'query': query,
+        'results': results,
+        'count': len(results),
+    })
+
+
+@query_budget(2)  # первое обращение строит индекс
+@require_http_methods(["GET"])
+def api_task_suggest(request):
+    """
+    Автодополнение заголовков задач и подзадач по префиксу из процессного
+    индекса (tasks.suggest), без запросов к БД: ?prefix=...&limit=N (до 50).
+    """
+    prefix = request.GET.get('prefix', '').strip()
+    if not prefix:
+        return json_response({'error': 'Parameter prefix is required'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit') or 10), SUGGEST_MAX_LIMIT)
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return json_response({'error': 'limit must be a positive integer'}, status=400)
 
-    serializer = SubTaskDetailSerializer(subtasks, many=True)
-    return JsonResponse({'subtasks': serializer.data, 'task_id': task_id},
-                        json_dumps_params={'ensure_ascii': False})
+    return json_response({
+        'prefix': prefix,
+        'suggestions': prefix_index.suggest(prefix, limit),
+    })
+
+
+@query_budget(0)
+@require_http_methods(["GET"])
+def api_task_suggest_stats(request):
+    """Размер префиксного индекса в памяти процесса"""
+    return json_response({'index': prefix_index.memory_report()})
@@ -0,0 +1,21 @@
+from rest_framework import generics
+
+from .models import SubTask
+from .serializers import SubTaskCreateSerializer, SubTaskDetailSerializer
+
+
+class SubTaskSerializerMixin:
+    """Запись — SubTaskCreateSerializer (task_id, status_id), чтение — с вложенными задачей и статусом"""
+
+    def get_serializer_class(self):
+        if self.request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return SubTaskDetailSerializer
+        return SubTaskCreateSerializer
+
+
+class SubTaskListCreateView(SubTaskSerializerMixin, generics.ListCreateAPIView):
+    queryset = SubTask.objects.select_related('status', 'task__status').order_by('id')
+
+
+class SubTaskDetailUpdateDeleteView(SubTaskSerializerMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = SubTask.objects.select_related('status', 'task__status')
@@ -0,0 +1,121 @@
+"""
+Групповой коммит для эндпоинтов создания (api_create_task, api_create_subtask).
+
+В SQLite стоимость одиночной вставки — это в основном коммит (fsync и
+блокировка всей базы), а не сама вставка. При ``TASKS_WRITE_QUEUE = True``
+запросы не пишут сами: после валидации они передают сохранение единственному
+потоку-писателю и ждут результат. Писатель собирает всё, что пришло за
+``TASKS_WRITE_QUEUE_WINDOW_MS`` миллисекунд (не более
+``TASKS_WRITE_QUEUE_MAX_BATCH``), выполняет одной транзакцией и только после
+коммита отдаёт каждому запросу его объект с id.
+
+Каждая запись выполняется в своей точке сохранения: ошибка одной записи
+откатывает только её и возвращается только её запросу. Валидация
+сериализатором остаётся в потоке запроса и в пачку не попадает.
+
+По умолчанию выключено — тогда ``run`` просто вызывает функцию на месте.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def enabled():
+    return getattr(settings, 'TASKS_WRITE_QUEUE', False)
+
+
+class WriteQueue:
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+
+    def run(self, fn):
+        """Выполнить ``fn()`` (запись в БД) и вернуть его результат"""
+        if not enabled():
+            return fn()
+        return self.submit(fn).result(timeout=getattr(settings, 'TASKS_WRITE_QUEUE_TIMEOUT', 30))
+
+    def submit(self, fn):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((fn, future))
+        return future
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='tasks-write-queue',
+                                                daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        """Первая запись (ждём сколько угодно) и всё, что успело прийти за окно"""
+        batch = [self._queue.get()]
+        window = getattr(settings, 'TASKS_WRITE_QUEUE_WINDOW_MS', 5) / 1000
+        max_batch = getattr(settings, 'TASKS_WRITE_QUEUE_MAX_BATCH', 200)
+        deadline = time.monotonic() + window
+        while len(batch) < max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            writes = [item for item in batch if item is not None]
+            if writes:
+                close_old_connections()
+                self._commit(writes)
+            if len(writes) < len(batch):  # stop()
+                connections.close_all()
+                return
+
+    def _commit(self, batch):
+        results = []
+        try:
+            with transaction.atomic():
+                for fn, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with transaction.atomic():
+                            results.append((future, fn()))
+                    except Exception as e:
+                        future.set_exception(e)
+        except Exception as e:
+            # Не удался сам коммит — ни одна запись пачки не сохранена
+            logger.exception('Group commit of %d writes failed', len(batch))
+            for future, _ in results:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        for future, result in results:
+            future.set_result(result)
+
+    def stop(self):
+        """Остановить поток-писателя после уже поставленных записей (для тестов)"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+        self._thread = None
+
+
+write_queue = WriteQueue()